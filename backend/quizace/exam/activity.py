@@ -0,0 +1,165 @@
+"""学生每日作答汇总：开考、交卷/收卷、批阅改分与加入错题本时按 (学生, 日期) 增量累加。
+
+开始数记在开考当天，完成数与得分记在交卷当天（按 TIME_ZONE 本地日期）。
+重判等批量改分的路径按学生重建汇总；rebuild_student_activity 命令用于全量修复。
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PracticeAttempt, StudentDailyActivity, WrongBookEntry
+
+ACTIVITY_FIELDS = ("attempts_started", "attempts_completed", "obtained_score", "total_score", "wrong_book_added")
+
+ACTIVITY_TREND_MAX_DAYS = 365
+
+ActivityKey = Tuple[int, date]
+
+
+def _increment(deltas: Dict[ActivityKey, Dict[str, int]]):
+    rebuild_users = set()
+    for (user_id, day), changes in deltas.items():
+        changes = {field: value for field, value in changes.items() if value}
+        if not changes:
+            continue
+        updates = {field: F(field) + value for field, value in changes.items()}
+        row_qs = StudentDailyActivity.objects.filter(user_id=user_id, day=day)
+        if row_qs.update(**updates):
+            continue
+        if any(value < 0 for value in changes.values()):
+            # 扣减时汇总行缺失说明数据已不一致，直接重建该学生
+            rebuild_users.add(user_id)
+            continue
+        try:
+            with transaction.atomic():
+                StudentDailyActivity.objects.create(user_id=user_id, day=day, **changes)
+        except IntegrityError:
+            row_qs.update(**updates)
+    if rebuild_users:
+        rebuild_student_activity(rebuild_users)
+
+
+def record_activity_started(attempt: PracticeAttempt):
+    _increment({(attempt.user_id, timezone.localdate(attempt.started_at)): {"attempts_started": 1}})
+
+
+def record_activity_completed(attempts: Iterable[PracticeAttempt]):
+    """交卷或收卷后调用，attempts 已写入提交时间与得分。"""
+    deltas: Dict[ActivityKey, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for attempt in attempts:
+        entry = deltas[(attempt.user_id, timezone.localdate(attempt.submitted_at))]
+        entry["attempts_completed"] += 1
+        entry["obtained_score"] += attempt.obtained_score or 0
+        entry["total_score"] += attempt.total_score or 0
+    _increment(deltas)
+
+
+def record_activity_score_change(attempt: PracticeAttempt, previous_obtained: int, previous_total: int):
+    """批阅改分后按差值调整交卷当天的得分。"""
+    if attempt.submitted_at is None:
+        return
+    _increment({
+        (attempt.user_id, timezone.localdate(attempt.submitted_at)): {
+            "obtained_score": (attempt.obtained_score or 0) - previous_obtained,
+            "total_score": (attempt.total_score or 0) - previous_total,
+        }
+    })
+
+
+def record_wrong_book_added(user_id: int):
+    _increment({(user_id, timezone.localdate()): {"wrong_book_added": 1}})
+
+
+def compute_student_activity(user_ids: Iterable[int]) -> Dict[ActivityKey, Dict[str, int]]:
+    """按作答表与错题本重新聚合指定学生的每日汇总。
+
+    新增错题数按现存错题的创建日期统计，已移出错题本的条目不再计入。
+    """
+    user_ids = list(user_ids)
+    rows: Dict[ActivityKey, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(ACTIVITY_FIELDS, 0))
+    attempt_qs = PracticeAttempt.objects.filter(user_id__in=user_ids)
+    for item in (
+        attempt_qs.annotate(day=TruncDate("started_at"))
+        .values("user_id", "day")
+        .annotate(started=Count("id"))
+        .order_by()
+    ):
+        rows[(item["user_id"], item["day"])]["attempts_started"] = item["started"]
+    for item in (
+        attempt_qs.filter(submitted_at__isnull=False)
+        .exclude(status="ongoing")
+        .annotate(day=TruncDate("submitted_at"))
+        .values("user_id", "day")
+        .annotate(completed=Count("id"), obtained=Sum("obtained_score"), total=Sum("total_score"))
+        .order_by()
+    ):
+        entry = rows[(item["user_id"], item["day"])]
+        entry["attempts_completed"] = item["completed"]
+        entry["obtained_score"] = item["obtained"] or 0
+        entry["total_score"] = item["total"] or 0
+    for item in (
+        WrongBookEntry.objects.filter(user_id__in=user_ids)
+        .annotate(day=TruncDate("created_at"))
+        .values("user_id", "day")
+        .annotate(added=Count("id"))
+        .order_by()
+    ):
+        rows[(item["user_id"], item["day"])]["wrong_book_added"] = item["added"]
+    return rows
+
+
+def rebuild_student_activity(user_ids: Iterable[int]) -> int:
+    """整体替换指定学生的汇总行，返回写入的行数。"""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return 0
+    rows = compute_student_activity(user_ids)
+    with transaction.atomic():
+        StudentDailyActivity.objects.filter(user_id__in=user_ids).delete()
+        StudentDailyActivity.objects.bulk_create(
+            [StudentDailyActivity(user_id=user_id, day=day, **values) for (user_id, day), values in rows.items()],
+            batch_size=500,
+        )
+    return len(rows)
+
+
+def rebuild_activity_for_attempts(attempt_ids: Iterable[int]):
+    """批量改分（重判）后重建涉及的学生。"""
+    attempt_ids = list(attempt_ids)
+    if not attempt_ids:
+        return
+    rebuild_student_activity(
+        PracticeAttempt.objects.filter(id__in=attempt_ids).values_list("user_id", flat=True).distinct()
+    )
+
+
+def load_activity_trend(user_id: int, days: int) -> Tuple[Dict[str, int], List[dict]]:
+    """返回 (全部日期的累计值, 最近 days 天逐日数据)，共两次按 (学生, 日期) 索引的读取。"""
+    totals = StudentDailyActivity.objects.filter(user_id=user_id).aggregate(
+        **{field: Sum(field) for field in ACTIVITY_FIELDS}
+    )
+    totals = {field: value or 0 for field, value in totals.items()}
+    today = timezone.localdate()
+    window_start = date.fromordinal(today.toordinal() - days + 1)
+    by_day = {
+        row["day"]: row
+        for row in StudentDailyActivity.objects.filter(user_id=user_id, day__gte=window_start).values("day", *ACTIVITY_FIELDS)
+    }
+    trend = []
+    for ordinal in range(window_start.toordinal(), today.toordinal() + 1):
+        day = date.fromordinal(ordinal)
+        row = by_day.get(day) or {}
+        trend.append({
+            "date": day,
+            "count": row.get("attempts_completed", 0),
+            "started": row.get("attempts_started", 0),
+            "obtained_score": row.get("obtained_score", 0),
+            "total_score": row.get("total_score", 0),
+            "wrong_book_added": row.get("wrong_book_added", 0),
+        })
+    return totals, trend
@@ -0,0 +1,95 @@
+"""自动保存的作答缓冲。
+
+自动保存只向 AttemptAnswerLog 追加一行记录（不加行锁、不读取题目），
+日志按 (练习, 题目) 合并后写回 PracticeAttemptItem。日志与业务数据在同一个
+数据库中提交，进程在两次合并之间崩溃也不会丢失作答；合并操作是幂等的。
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import AttemptAnswerLog, PracticeAttempt, PracticeAttemptItem
+
+
+def is_autosave_buffered() -> bool:
+    return getattr(settings, "EXAM_AUTOSAVE_BUFFERED", True)
+
+
+def append_answers(attempt: PracticeAttempt, answer_map: Dict[int, str]):
+    AttemptAnswerLog.objects.bulk_create([
+        AttemptAnswerLog(attempt=attempt, question_id=question_id, user_answer=answer)
+        for question_id, answer in answer_map.items()
+    ])
+
+
+def write_answers(attempt_id: int, answer_map: Dict[int, str]) -> int:
+    """直接写入指定题目的作答，只读取被修改的题目。"""
+    items = PracticeAttemptItem.objects.filter(
+        attempt_id=attempt_id,
+        question_id__in=list(answer_map),
+    ).only("id", "question_id", "user_answer")
+    items_to_update = []
+    for item in items:
+        new_answer = answer_map[item.question_id]
+        if (item.user_answer or "") != new_answer:
+            item.user_answer = new_answer
+            items_to_update.append(item)
+    if items_to_update:
+        PracticeAttemptItem.objects.bulk_update(items_to_update, ["user_answer"])
+    return len(items_to_update)
+
+
+def flush_buffered_answers(attempt_ids: Optional[Iterable[int]] = None, limit: Optional[int] = None) -> int:
+    """把缓冲的作答合并写入 PracticeAttemptItem，返回更新的题目数量。
+
+    attempt_ids 为空时处理任意练习的日志，limit 限制单次读取的日志条数。
+    """
+    return flush_answer_batch(attempt_ids, limit)[1]
+
+
+def flush_answer_batch(attempt_ids: Optional[Iterable[int]] = None, limit: Optional[int] = None) -> Tuple[int, int]:
+    """合并一批日志，返回 (读取的日志条数, 更新的题目数量)；读取条数小于 limit 说明已无积压。"""
+    log_qs = AttemptAnswerLog.objects.order_by("id")
+    if attempt_ids is not None:
+        attempt_ids = list(attempt_ids)
+        if not attempt_ids:
+            return 0, 0
+        log_qs = log_qs.filter(attempt_id__in=attempt_ids)
+    if limit:
+        log_qs = log_qs[:limit]
+
+    with transaction.atomic():
+        candidates = list(log_qs.values_list("id", "attempt_id"))
+        if not candidates:
+            return 0, 0
+        log_ids = [log_id for log_id, _ in candidates]
+        # 与提交、收卷一致按 id 顺序锁定练习：已交卷的练习不再写入，迟到的日志直接丢弃；
+        # 锁定后重新读取日志，其他合并进程已处理并删除的日志不会被重复写入
+        ongoing_ids = list(
+            PracticeAttempt.objects.filter(id__in={attempt_id for _, attempt_id in candidates}, status="ongoing")
+            .select_for_update()
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        logs = AttemptAnswerLog.objects.filter(id__in=log_ids, attempt_id__in=ongoing_ids).order_by("id").values_list(
+            "attempt_id", "question_id", "user_answer",
+        )
+        latest: Dict[Tuple[int, int], str] = {}
+        for attempt_id, question_id, answer in logs:
+            latest[(attempt_id, question_id)] = answer
+
+        items_to_update: List[PracticeAttemptItem] = []
+        if latest:
+            items = PracticeAttemptItem.objects.filter(
+                attempt_id__in={attempt_id for attempt_id, _ in latest},
+            ).only("id", "attempt_id", "question_id", "user_answer")
+            for item in items:
+                key = (item.attempt_id, item.question_id)
+                if key in latest and (item.user_answer or "") != latest[key]:
+                    item.user_answer = latest[key]
+                    items_to_update.append(item)
+        if items_to_update:
+            PracticeAttemptItem.objects.bulk_update(items_to_update, ["user_answer"], batch_size=500)
+        AttemptAnswerLog.objects.filter(id__in=log_ids).delete()
+    return len(log_ids), len(items_to_update)
@@ -5,3 +5,6 @@ class ExamConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exam'
     verbose_name = '模拟练习'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,185 @@
+"""学生考试列表：按时间段窗口筛选、分页，并在同一条查询中带出学生最近一次作答。
+
+只返回学生可见（面向全部学生，或定向到学生所在班级）的未开始、进行中
+以及最近 EXAM_FEED_ENDED_DAYS 天内结束的考试，历史考试不随时间累积进列表。
+结果按学生缓存，考试变更时递增全局版本号，学生开考、交卷或班级成员变动时
+递增该学生的版本号，两者都参与缓存键。
+"""
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from user.models import ClassMembership
+
+from .models import ExamAssignment, ExamAssignmentAudience, PracticeAttempt
+from .serializers import ExamAssignmentSerializer
+
+STUDENT_VISIBLE_ASSIGNMENT_STATUSES = ("published", "closed")
+FEED_PHASES = ("ongoing", "upcoming", "ended")
+FEED_CACHE_PREFIX = "exam:assignment_feed"
+FEED_CACHE_TIMEOUT = 60
+FEED_MAX_PAGE_SIZE = 100
+
+
+def _global_version_key() -> str:
+    return f"{FEED_CACHE_PREFIX}:version"
+
+
+def _user_version_key(user_id: int) -> str:
+    return f"{FEED_CACHE_PREFIX}:user:{user_id}"
+
+
+def _bump(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_assignment_feeds():
+    """考试新增、修改或删除后调用，使所有学生的列表缓存失效。"""
+    # 事务提交后再递增：提交前重建的列表读到的仍是旧数据，却会缓存在新版本号下
+    transaction.on_commit(lambda: _bump(_global_version_key()))
+
+
+def invalidate_student_feeds(user_ids):
+    keys = [_user_version_key(user_id) for user_id in set(user_ids)]
+    transaction.on_commit(lambda: [_bump(key) for key in keys])
+
+
+def student_visibility_q(user) -> Q:
+    """学生可见的考试：面向全部学生，或定向到学生所在的任一班级。
+
+    定向部分为 (学生 -> 班级 -> 考试) 两级索引子查询，开销只与学生所在班级的考试数量相关。
+    """
+    roster_ids = ClassMembership.objects.filter(student=user).values("roster_id")
+    targeted = ExamAssignmentAudience.objects.filter(roster_id__in=roster_ids).values("assignment_id")
+    return Q(audience="all") | Q(audience="rosters", id__in=targeted)
+
+
+def can_view_assignment(user, assignment: ExamAssignment) -> bool:
+    if assignment.audience != "rosters":
+        return True
+    return ExamAssignmentAudience.objects.filter(
+        assignment=assignment,
+        roster__memberships__student=user,
+    ).exists()
+
+
+def set_assignment_rosters(assignment: ExamAssignment, roster_ids):
+    """设置考试的目标班级，roster_ids 为空时面向全部学生。"""
+    roster_ids = sorted(set(roster_ids))
+    audience = "rosters" if roster_ids else "all"
+    with transaction.atomic():
+        if assignment.audience != audience:
+            ExamAssignment.objects.filter(id=assignment.id).update(audience=audience)
+            assignment.audience = audience
+        ExamAssignmentAudience.objects.filter(assignment=assignment).exclude(roster_id__in=roster_ids).delete()
+        ExamAssignmentAudience.objects.bulk_create(
+            [ExamAssignmentAudience(assignment=assignment, roster_id=roster_id) for roster_id in roster_ids],
+            ignore_conflicts=True,
+        )
+    invalidate_assignment_feeds()
+
+
+def _phase_window(phase: Optional[str], now) -> Q:
+    recent = now - timedelta(days=getattr(settings, "EXAM_FEED_ENDED_DAYS", 30))
+    windows = {
+        "upcoming": Q(start_time__gt=now),
+        "ongoing": Q(start_time__lte=now, end_time__gte=now),
+        "ended": Q(end_time__lt=now, end_time__gte=recent),
+    }
+    if phase in windows:
+        return windows[phase]
+    return Q(end_time__gte=recent)
+
+
+def student_assignment_queryset(user, phase: Optional[str] = None, now=None):
+    """学生可见且在时间窗口内的考试，附带 phase_rank 与最近一次作答的 attempt_id/status/mode。"""
+    now = now or timezone.now()
+    latest = PracticeAttempt.objects.filter(user=user, assignment=OuterRef("pk")).order_by("-started_at", "-id")
+    phase_rank = Case(
+        When(start_time__gt=now, then=Value(1)),
+        When(end_time__lt=now, then=Value(2)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return (
+        ExamAssignment.objects.filter(
+            student_visibility_q(user),
+            _phase_window(phase, now),
+            status__in=STUDENT_VISIBLE_ASSIGNMENT_STATUSES,
+        )
+        .select_related("subject", "created_by")
+        .annotate(
+            phase_rank=phase_rank,
+            attempt_id=Subquery(latest.values("id")[:1]),
+            attempt_status=Subquery(latest.values("status")[:1]),
+            attempt_mode=Subquery(latest.values("mode")[:1]),
+        )
+        # 进行中按结束时间、未开始按开始时间升序，已结束按结束时间倒序
+        .order_by(
+            "phase_rank",
+            Case(When(phase_rank=0, then=F("end_time")), When(phase_rank=1, then=F("start_time"))),
+            F("end_time").desc(),
+            "id",
+        )
+    )
+
+
+def _next_boundary_seconds(assignments: List[ExamAssignment], now) -> int:
+    """列表中任一考试切换时间段前缓存必须过期，phase 字段才不会过时。"""
+    timeout = FEED_CACHE_TIMEOUT
+    for assignment in assignments:
+        for moment in (assignment.start_time, assignment.end_time):
+            if moment > now:
+                timeout = min(timeout, int((moment - now).total_seconds()) + 1)
+    return max(1, timeout)
+
+
+def build_student_feed(user, *, phase: Optional[str], page: int, page_size: int, now=None) -> Tuple[List[dict], dict, int]:
+    now = now or timezone.now()
+    assignment_qs = student_assignment_queryset(user, phase, now)
+    total = assignment_qs.count()
+    start = (page - 1) * page_size
+    assignments = list(assignment_qs[start:start + page_size])
+    data = ExamAssignmentSerializer(assignments, many=True).data
+    for payload, assignment in zip(data, assignments):
+        payload["attempt_id"] = assignment.attempt_id
+        payload["attempt_status"] = assignment.attempt_status
+        payload["attempt_mode"] = assignment.attempt_mode
+    pagination = {
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "has_more": start + len(assignments) < total,
+    }
+    return list(data), pagination, _next_boundary_seconds(assignments, now)
+
+
+def get_student_feed(user, *, phase: Optional[str] = None, page: int = 1, page_size: int = 20) -> Tuple[List[dict], dict]:
+    if phase not in FEED_PHASES:
+        phase = None
+    page_size = min(page_size, FEED_MAX_PAGE_SIZE)
+    version_keys = [_global_version_key(), _user_version_key(user.id)]
+    versions: Dict[str, int] = cache.get_many(version_keys)
+    key = ":".join([
+        FEED_CACHE_PREFIX,
+        str(user.id),
+        str(versions.get(version_keys[0], 0)),
+        str(versions.get(version_keys[1], 0)),
+        phase or "all",
+        str(page),
+        str(page_size),
+    ])
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    data, pagination, timeout = build_student_feed(user, phase=phase, page=page, page_size=page_size)
+    cache.set(key, (data, pagination), timeout)
+    return data, pagination
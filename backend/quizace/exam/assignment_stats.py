@@ -0,0 +1,170 @@
+"""考试作答统计：开考、交卷/收卷、批阅时按差值增量更新 ExamAssignmentStats。
+
+统计行随考试创建（见 signals），读取方直接 select_related("stats")，不再对作答表做聚合。
+重判等批量改分的路径直接按作答表重算受影响考试的统计；
+rebuild_assignment_stats 命令用于全量核对与修复。
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ExamAssignment, ExamAssignmentStats, PracticeAttempt
+
+SUBMITTED_STATUSES = ("completed", "expired")
+STATS_FIELDS = ("total_attempts", "submitted_attempts", "pending_reviews", "score_sum", "score_max")
+EMPTY_STATS = {field: 0 for field in STATS_FIELDS}
+
+
+def _apply(assignment_id: int, **changes):
+    updated = ExamAssignmentStats.objects.filter(assignment_id=assignment_id).update(
+        updated_at=timezone.now(), **changes
+    )
+    if not updated:
+        # 统计行缺失（如迁移前创建后又被清理）时按作答表重建，调用方已写入本次变更
+        refresh_assignment_stats([assignment_id])
+
+
+def record_attempt_started(attempt: PracticeAttempt):
+    if attempt.assignment_id:
+        _apply(attempt.assignment_id, total_attempts=F("total_attempts") + 1)
+
+
+def record_attempts_submitted(attempts: Iterable[PracticeAttempt]):
+    """交卷或收卷后调用，attempts 已写入最终状态与得分。"""
+    grouped: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+    for attempt in attempts:
+        if not attempt.assignment_id:
+            continue
+        entry = grouped[attempt.assignment_id]
+        entry[0] += 1
+        entry[1] += 1 if attempt.is_review_required else 0
+        entry[2] += attempt.obtained_score or 0
+        entry[3] = max(entry[3], attempt.obtained_score or 0)
+    for assignment_id, (submitted, pending, score_sum, score_max) in grouped.items():
+        _apply(
+            assignment_id,
+            submitted_attempts=F("submitted_attempts") + submitted,
+            pending_reviews=F("pending_reviews") + pending,
+            score_sum=F("score_sum") + score_sum,
+            score_max=Greatest(F("score_max"), score_max),
+        )
+
+
+def record_attempt_reviewed(attempt: PracticeAttempt, previous_score: int):
+    """批阅完成后调用：待批阅数减一，得分按差值调整。"""
+    if not attempt.assignment_id:
+        return
+    score = attempt.obtained_score or 0
+    if score < previous_score:
+        # 分数下调可能影响最高分，增量无法得知次高分，直接重算该考试
+        refresh_assignment_stats([attempt.assignment_id])
+        return
+    _apply(
+        attempt.assignment_id,
+        pending_reviews=F("pending_reviews") - 1,
+        score_sum=F("score_sum") + (score - previous_score),
+        score_max=Greatest(F("score_max"), score),
+    )
+
+
+def compute_assignment_stats(assignment_ids: Iterable[int]) -> Dict[int, dict]:
+    """按作答表聚合统计，没有作答的考试返回全零。"""
+    assignment_ids = list(assignment_ids)
+    submitted = Q(status__in=SUBMITTED_STATUSES)
+    stats = {assignment_id: dict(EMPTY_STATS) for assignment_id in assignment_ids}
+    rows = (
+        PracticeAttempt.objects.filter(assignment_id__in=assignment_ids)
+        .values("assignment_id")
+        .annotate(
+            total_attempts=Count("id"),
+            submitted_attempts=Count("id", filter=submitted),
+            pending_reviews=Count("id", filter=submitted & Q(is_review_required=True)),
+            score_sum=Sum("obtained_score", filter=submitted),
+            score_max=Max("obtained_score", filter=submitted),
+        )
+        .order_by()
+    )
+    for row in rows:
+        stats[row.pop("assignment_id")] = {field: row[field] or 0 for field in STATS_FIELDS}
+    return stats
+
+
+def refresh_assignment_stats(assignment_ids: Iterable[int]) -> Tuple[int, int]:
+    """重算指定考试的统计并写回有差异的行，返回 (检查数量, 修正数量)。"""
+    assignment_ids = set(assignment_ids)
+    if not assignment_ids:
+        return 0, 0
+    assignment_ids = set(ExamAssignment.objects.filter(id__in=assignment_ids).values_list("id", flat=True))
+    expected = compute_assignment_stats(assignment_ids)
+    current = {
+        row[0]: dict(zip(STATS_FIELDS, row[1:]))
+        for row in ExamAssignmentStats.objects.filter(assignment_id__in=assignment_ids).values_list(
+            "assignment_id", *STATS_FIELDS
+        )
+    }
+    drifted = [
+        ExamAssignmentStats(assignment_id=assignment_id, updated_at=timezone.now(), **values)
+        for assignment_id, values in expected.items()
+        if current.get(assignment_id) != values
+    ]
+    if drifted:
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不接受冲突字段，SQLite/PostgreSQL 必须指定
+        unique_fields = ["assignment"] if connection.features.supports_update_conflicts_with_target else None
+        ExamAssignmentStats.objects.bulk_create(
+            drifted,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=[*STATS_FIELDS, "updated_at"],
+        )
+    return len(assignment_ids), len(drifted)
+
+
+def refresh_stats_for_attempts(attempt_ids: Iterable[int]):
+    """批量改分（重判）后重算涉及的考试。"""
+    attempt_ids = list(attempt_ids)
+    if not attempt_ids:
+        return
+    refresh_assignment_stats(
+        PracticeAttempt.objects.filter(id__in=attempt_ids, assignment__isnull=False)
+        .values_list("assignment_id", flat=True)
+        .distinct()
+    )
+
+
+def rebuild_assignment_stats(assignment_ids: Optional[Iterable[int]] = None, *, batch_size: int = 500) -> Tuple[int, int]:
+    """全量（或指定考试）核对统计，返回 (检查数量, 修正数量)。"""
+    id_qs = ExamAssignment.objects.order_by("id").values_list("id", flat=True)
+    if assignment_ids is not None:
+        id_qs = id_qs.filter(id__in=list(assignment_ids))
+    checked = fixed = 0
+    last_id = 0
+    while True:
+        batch = list(id_qs.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        batch_checked, batch_fixed = refresh_assignment_stats(batch)
+        checked += batch_checked
+        fixed += batch_fixed
+        if len(batch) < batch_size:
+            break
+    return checked, fixed
+
+
+def stats_payload(assignment: ExamAssignment) -> dict:
+    """列表与看板输出的统计字段，assignment 需 select_related("stats")。"""
+    try:
+        stats = assignment.stats
+    except ExamAssignmentStats.DoesNotExist:
+        stats = ExamAssignmentStats(assignment_id=assignment.id)
+    return {
+        "total_attempts": stats.total_attempts,
+        "submitted_attempts": stats.submitted_attempts,
+        "pending_reviews": stats.pending_reviews,
+        "average_score": stats.average_score,
+        "max_score": stats.score_max,
+    }
@@ -0,0 +1,147 @@
+"""按题批阅：教师一次为多份待批阅作答中的同一道主观题打分。
+
+分数按作答分块写入，每块在一个事务内按 id 升序锁定作答行，再批量更新题目得分、
+按作答聚合重算总分，所有主观题都已批阅的作答清除待批阅标记。单份批阅同样先锁作答行
+再写题目，且一次只锁一行，因此两者不会相互死锁。
+"""
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from quizace.pagination import keyset_page
+
+from .activity import rebuild_activity_for_attempts
+from .assignment_stats import refresh_stats_for_attempts
+from .constants import resolve_score
+from .models import PracticeAttempt, PracticeAttemptItem
+from .review_queue import REVIEW_QUEUE_MAX_PAGE_SIZE, pending_review_queryset, record_reviews_completed
+from .teacher_dashboard import invalidate_dashboards_for_attempts
+
+REVIEW_CHUNK_SIZE = 200
+
+
+def pending_question_items(
+    teacher,
+    question_id: int,
+    *,
+    scope=None,
+    cursor: Optional[str] = None,
+    page_size: int = 50,
+) -> Tuple[List[dict], dict]:
+    """列出教师可批阅的作答中该题的待批阅答案，按题目记录 id 升序翻页；游标不正确时抛出 ValueError。"""
+    items, pagination = keyset_page(
+        PracticeAttemptItem.objects.filter(
+            question_id=question_id,
+            reviewed_at__isnull=True,
+            attempt__in=pending_review_queryset(teacher, scope),
+        ).select_related("attempt__user", "question"),
+        ordering=("id",),
+        cursor=cursor,
+        page_size=max(1, min(page_size, REVIEW_QUEUE_MAX_PAGE_SIZE)),
+    )
+    data = [
+        {
+            "id": item.id,
+            "attempt_id": item.attempt_id,
+            "student_id": item.attempt.user_id,
+            "student_name": item.attempt.user.username,
+            "submitted_at": item.attempt.submitted_at,
+            "user_answer": item.user_answer,
+            "awarded_score": item.awarded_score,
+            "max_score": item.expected_score or resolve_score(item.question.question_type, item.question.score),
+        }
+        for item in items
+    ]
+    return data, pagination
+
+
+def _review_chunk(teacher, question_id: int, attempt_ids: List[int], scores: Dict[int, int], now) -> Tuple[int, List[PracticeAttempt]]:
+    with transaction.atomic():
+        attempts = list(
+            PracticeAttempt.objects.select_for_update()
+            .filter(id__in=attempt_ids, is_review_required=True)
+            .order_by("id")
+        )
+        attempt_map = {attempt.id: attempt for attempt in attempts}
+        items = list(
+            PracticeAttemptItem.objects.filter(
+                attempt_id__in=list(attempt_map),
+                question_id=question_id,
+                id__in=list(scores),
+            ).select_related("question")
+        )
+        for item in items:
+            max_score = item.expected_score or resolve_score(item.question.question_type, item.question.score)
+            item.awarded_score = max(0, min(scores[item.id], max_score))
+            item.reviewed_at = now
+        PracticeAttemptItem.objects.bulk_update(items, ["awarded_score", "reviewed_at"])
+
+        totals = (
+            PracticeAttemptItem.objects.filter(attempt_id__in=list(attempt_map))
+            .values("attempt_id")
+            .annotate(
+                obtained=Sum("awarded_score"),
+                unreviewed=Count("id", filter=Q(question__question_type="subjective", reviewed_at__isnull=True)),
+            )
+            .order_by()
+        )
+        changed = []
+        for row in totals:
+            attempt = attempt_map[row["attempt_id"]]
+            obtained = row["obtained"] or 0
+            attempt.obtained_score = max(0, min(obtained, attempt.total_score or obtained))
+            if not row["unreviewed"]:
+                attempt.is_review_required = False
+                attempt.reviewed_by = teacher
+                attempt.reviewed_at = now
+            changed.append(attempt)
+        PracticeAttempt.objects.bulk_update(
+            changed, ["obtained_score", "is_review_required", "reviewed_by", "reviewed_at"]
+        )
+        record_reviews_completed(attempt for attempt in changed if not attempt.is_review_required)
+    return len(items), changed
+
+
+def batch_review_question(
+    teacher,
+    question_id: int,
+    scores: Dict[int, int],
+    *,
+    chunk_size: int = REVIEW_CHUNK_SIZE,
+) -> Dict[str, object]:
+    """scores 为 {题目记录 id: 得分}，只处理教师可批阅且仍待批阅的作答中该题的记录。
+
+    返回更新的题目数、完成批阅的作答数，以及未处理（不存在、无权批阅或已批阅）的题目记录 id。
+    """
+    now = timezone.now()
+    rows = list(
+        PracticeAttemptItem.objects.filter(
+            id__in=list(scores),
+            question_id=question_id,
+            question__question_type="subjective",
+            attempt__in=pending_review_queryset(teacher),
+        ).values_list("id", "attempt_id")
+    )
+    attempt_ids = sorted({attempt_id for _, attempt_id in rows})
+    updated_items = 0
+    changed: List[PracticeAttempt] = []
+    for start in range(0, len(attempt_ids), chunk_size):
+        chunk_updated, chunk_changed = _review_chunk(
+            teacher, question_id, attempt_ids[start:start + chunk_size], scores, now
+        )
+        updated_items += chunk_updated
+        changed.extend(chunk_changed)
+
+    changed_ids = {attempt.id for attempt in changed}
+    if changed:
+        refresh_stats_for_attempts(changed_ids)
+        rebuild_activity_for_attempts(changed_ids)
+        invalidate_dashboards_for_attempts(changed)
+    handled = {item_id for item_id, attempt_id in rows if attempt_id in changed_ids}
+    return {
+        "updated_items": updated_items,
+        "completed_attempts": sum(1 for attempt in changed if not attempt.is_review_required),
+        "skipped_items": sorted(set(scores) - handled),
+    }
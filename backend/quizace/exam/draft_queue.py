@@ -0,0 +1,192 @@
+"""题目草稿识别队列：status 为 processing 的草稿即待处理任务，由工作线程池认领后调用识别器。
+
+认领通过带条件的 UPDATE 完成（未被认领或认领已超时，且已到下次识别时间），多个工作进程同时运行
+也不会重复处理同一草稿；识别器上报进度时续期认领，进程崩溃留下的认领超过 EXAM_OCR_LEASE_SECONDS 后可被重新认领，
+已认领满 EXAM_OCR_MAX_ATTEMPTS 次仍未完成的草稿（多为识别时进程崩溃）不再认领，直接标记为 failed。
+识别异常按 EXAM_OCR_RETRY_BASE_SECONDS 指数退避重试，达到 EXAM_OCR_MAX_ATTEMPTS 次后标记为 failed；
+RecognitionError 表示内容本身无法识别，直接标记为 failed。上传接口只写入草稿，不等待识别。
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import QuestionDraft
+from .ocr import RecognitionError, get_recognizer
+
+logger = logging.getLogger("exam.draft_queue")
+
+QUEUE_STATUS = "processing"
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """第 attempts 次失败后的等待时间：基准时长按 2 的幂增长，不超过 EXAM_OCR_RETRY_MAX_SECONDS。"""
+    base = _setting("EXAM_OCR_RETRY_BASE_SECONDS", 30)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), _setting("EXAM_OCR_RETRY_MAX_SECONDS", 3600)))
+
+
+def _claimable(now):
+    lease_expired_at = now - timedelta(seconds=_setting("EXAM_OCR_LEASE_SECONDS", 300))
+    return QuestionDraft.objects.filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+        Q(locked_at__isnull=True) | Q(locked_at__lt=lease_expired_at),
+        status=QUEUE_STATUS,
+    )
+
+
+def fail_exhausted_drafts(now=None) -> int:
+    """把认领次数已用完、认领又已超时的草稿标记为 failed，返回标记数量。"""
+    now = now or timezone.now()
+    return _claimable(now).filter(attempts__gte=_setting("EXAM_OCR_MAX_ATTEMPTS", 3)).update(
+        status="failed",
+        error_message="多次识别均未完成，已停止重试",
+        progress=0,
+        locked_by="",
+        locked_at=None,
+        updated_at=now,
+    )
+
+
+def claim_drafts(worker_id: str, limit: int) -> List[int]:
+    """认领最多 limit 个可处理的草稿（新上传的优先，其次按到期时间），返回草稿 id。"""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    # 反复导致进程崩溃的草稿不会走到 process_draft 的失败分支，在这里按认领次数终止
+    fail_exhausted_drafts(now)
+    candidate_ids = list(
+        _claimable(now)
+        .order_by(F("next_attempt_at").asc(nulls_first=True), "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    if not candidate_ids:
+        return []
+    # 条件 UPDATE 只会成功认领仍满足条件的行，被其他进程抢先认领的草稿自动跳过
+    _claimable(now).filter(id__in=candidate_ids).update(
+        locked_by=worker_id, locked_at=now, attempts=F("attempts") + 1, progress=0,
+    )
+    return list(
+        QuestionDraft.objects.filter(id__in=candidate_ids, locked_by=worker_id, locked_at=now)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def process_draft(draft_id: int, worker_id: str, recognizer: Callable) -> str:
+    """处理一个已认领的草稿，返回 parsed、retry、failed 或 skipped。"""
+    draft = QuestionDraft.objects.select_related("subject").filter(id=draft_id, locked_by=worker_id).first()
+    if draft is None:
+        return "skipped"
+    # 只在仍由本线程认领且仍待识别时写入，教师中途修改状态或认领超时被接手后不再覆盖
+    owned = QuestionDraft.objects.filter(id=draft_id, locked_by=worker_id, status=QUEUE_STATUS)
+    release = {"locked_by": "", "locked_at": None}
+
+    def report_progress(value: int):
+        # 上报进度同时续期认领，识别耗时超过 EXAM_OCR_LEASE_SECONDS 也不会被其他线程接手
+        owned.update(progress=max(0, min(int(value), 99)), locked_at=timezone.now())
+
+    try:
+        result = recognizer(draft, report_progress)
+    except RecognitionError as exc:
+        owned.update(status="failed", error_message=str(exc), progress=0, updated_at=timezone.now(), **release)
+        return "failed"
+    except Exception as exc:
+        logger.exception("draft %s recognition failed (attempt %s)", draft_id, draft.attempts)
+        now = timezone.now()
+        if draft.attempts >= _setting("EXAM_OCR_MAX_ATTEMPTS", 3):
+            owned.update(status="failed", error_message=f"识别失败：{exc}", progress=0, updated_at=now, **release)
+            return "failed"
+        owned.update(
+            error_message=f"第 {draft.attempts} 次识别失败，稍后重试：{exc}",
+            next_attempt_at=now + retry_delay(draft.attempts),
+            progress=0,
+            **release,
+        )
+        return "retry"
+
+    updated = owned.update(
+        status="parsed",
+        parsed_title=str(result.get("title") or "")[:255],
+        parsed_content=result.get("content") or "",
+        parsed_options=result.get("options") or [],
+        parsed_answer=result.get("answer") or "",
+        parsed_analysis=result.get("analysis") or "",
+        error_message="",
+        progress=100,
+        next_attempt_at=None,
+        updated_at=timezone.now(),
+        **release,
+    )
+    return "parsed" if updated else "skipped"
+
+
+def queue_position(draft: QuestionDraft) -> Optional[int]:
+    """草稿在队列中的位置：0 为正在识别，等待退避重试时为 None。"""
+    if draft.status != QUEUE_STATUS:
+        return None
+    if draft.locked_at is not None:
+        return 0
+    if draft.next_attempt_at is not None and draft.next_attempt_at > timezone.now():
+        return None
+    return QuestionDraft.objects.filter(
+        status=QUEUE_STATUS, locked_at__isnull=True, next_attempt_at__isnull=True, id__lt=draft.id,
+    ).count() + 1
+
+
+class DraftWorkerPool:
+    """固定数量的识别线程，主线程按空闲线程数认领草稿并分派，单个进程内同时识别的草稿不超过 workers。"""
+
+    def __init__(self, workers: Optional[int] = None, recognizer: Optional[Callable] = None):
+        self.workers = max(1, workers or _setting("EXAM_OCR_WORKERS", 2))
+        self.recognizer = recognizer or get_recognizer()
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"[-64:]
+
+    def _process(self, draft_id: int) -> str:
+        try:
+            return process_draft(draft_id, self.worker_id, self.recognizer)
+        except Exception:
+            # 数据库等异常时草稿保持认领状态，认领超时后由其他线程重新处理
+            logger.exception("draft %s processing crashed", draft_id)
+            return "error"
+        finally:
+            connection.close()
+
+    def run(self, *, loop: bool = False, interval: float = 5.0, stop_event: Optional[threading.Event] = None) -> Dict[str, int]:
+        """loop 为假时处理完当前可认领的草稿即返回；返回各处理结果的数量。"""
+        counts: Counter = Counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="draft-ocr") as executor:
+            running = set()
+            while True:
+                finished = {future for future in running if future.done()}
+                counts.update(future.result() for future in finished)
+                running -= finished
+                # 收到停止信号后不再认领新草稿，只等待已认领的处理完
+                stopping = stop_event is not None and stop_event.is_set()
+                if not stopping:
+                    claimed = claim_drafts(self.worker_id, self.workers - len(running))
+                    running.update(executor.submit(self._process, draft_id) for draft_id in claimed)
+                if running:
+                    wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+                    continue
+                if not loop or stopping:
+                    break
+                if stop_event is not None:
+                    stop_event.wait(interval)
+                else:
+                    time.sleep(interval)
+        return dict(counts)
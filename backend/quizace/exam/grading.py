@@ -0,0 +1,518 @@
+"""作答批改：提交、超时收卷与批量收卷共用的评分逻辑。"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from .activity import rebuild_activity_for_attempts, record_activity_completed
+from .answer_buffer import flush_buffered_answers
+from .assignment_feed import invalidate_student_feeds
+from .assignment_stats import record_attempts_submitted, refresh_stats_for_attempts
+from .constants import resolve_score
+from .models import (
+    AttemptPaper,
+    ExamAssignment,
+    PracticeAttempt,
+    PracticeAttemptItem,
+    Question,
+    WrongBookEntry,
+)
+from .papers import get_remaining_seconds
+from .review_queue import record_pending_reviews
+from .signals import assignment_closed
+from .teacher_dashboard import invalidate_dashboards_for_attempt_ids, invalidate_dashboards_for_attempts
+
+logger = logging.getLogger(__name__)
+
+# (题型, 参考答案, 题目分值, 参考答案版本)
+AnswerKey = Tuple[str, str, int, int]
+
+ITEM_LOAD_FIELDS = (
+    "id", "attempt_id", "question_id", "user_answer", "expected_score", "awarded_score", "is_correct", "graded_version",
+)
+ITEM_UPDATE_CHUNK = 1000
+ITEM_RESULT_FIELDS = ["user_answer", "is_correct", "awarded_score", "graded_version"]
+EMPTY_RESULT = {
+    "correct_count": 0,
+    "obtained_score": 0,
+    "total_score": 0,
+    "subjective_score": 0,
+    "has_subjective": False,
+}
+ATTEMPT_RESULT_FIELDS = [
+    "correct_count",
+    "total_score",
+    "obtained_score",
+    "status",
+    "submitted_at",
+    "is_review_required",
+]
+
+
+def load_answer_keys(question_ids: Iterable[int]) -> Dict[int, AnswerKey]:
+    """读取题目的 (题型, 参考答案, 分值, 答案版本)，不加载题干等大字段。"""
+    return {
+        question_id: (question_type, answer or "", score, answer_version)
+        for question_id, question_type, answer, score, answer_version in Question.objects.filter(
+            id__in=set(question_ids),
+        ).values_list("id", "question_type", "answer", "score", "answer_version")
+    }
+
+
+def sync_paper_answers(attempt_ids: Iterable[int], answer_keys: Dict[int, AnswerKey]):
+    """把修改过的参考答案同步到试卷快照，保证展示的答案与批改依据一致。
+
+    题干、选项与解析保持开卷时的内容；只有版本号大于 1 的题目需要检查。
+    """
+    edited = {question_id: key[1] for question_id, key in answer_keys.items() if key[3] > 1}
+    if not edited:
+        return
+    changed = []
+    for paper in AttemptPaper.objects.filter(attempt_id__in=list(attempt_ids)):
+        dirty = False
+        for entry in paper.questions:
+            answer = edited.get(entry["id"])
+            if answer is not None and entry.get("answer") != answer:
+                entry["answer"] = answer
+                dirty = True
+        if dirty:
+            changed.append(paper)
+    AttemptPaper.objects.bulk_update(changed, ["questions"], batch_size=100)
+
+
+def grade_answer_columns(
+    attempt_ids: Sequence[int],
+    question_ids: Sequence[int],
+    user_answers: Sequence[Optional[str]],
+    expected_scores: Sequence[Optional[int]],
+    awarded_scores: Sequence[Optional[int]],
+    answer_keys: Dict[int, AnswerKey],
+):
+    """按列向量化批改任意多份练习的题目。
+
+    客观题答案去空格、转大写后与参考答案比较；主观题保留已有的 awarded_score。
+    返回 (是否客观题, 是否正确, 得分) 三个数组以及每份练习的汇总
+    {attempt_id: {correct_count, obtained_score, total_score, subjective_score, has_subjective}}，
+    汇总中的 obtained_score 只包含客观题得分。
+    """
+    key_ids = list(answer_keys)
+    key_index = {question_id: index for index, question_id in enumerate(key_ids)}
+    key_rows = [answer_keys[question_id] for question_id in key_ids]
+
+    # 作答取值高度重复（选项字母），只对去重后的答案做规整并编码为整数，
+    # 比较在整数数组上进行；编码 0 表示空答案
+    answer_codes = {"": 0}
+
+    def encode(raw):
+        return answer_codes.setdefault((raw or "").strip().upper(), len(answer_codes))
+
+    key_objective = np.array([row[0] == "objective" for row in key_rows], dtype=bool)
+    key_codes = np.array([encode(row[1]) for row in key_rows], dtype=np.int64)
+    key_scores = np.array([resolve_score(row[0], row[2]) for row in key_rows], dtype=np.int64)
+
+    count = len(question_ids)
+    raw_codes = {raw: encode(raw) for raw in set(user_answers)}
+    q_idx = np.fromiter(map(key_index.__getitem__, question_ids), dtype=np.int64, count=count)
+    user_codes = np.fromiter(map(raw_codes.__getitem__, user_answers), dtype=np.int64, count=count)
+    expected = np.array([value or 0 for value in expected_scores], dtype=np.int64)
+    existing = np.array([value or 0 for value in awarded_scores], dtype=np.int64)
+
+    scores = np.where(expected > 0, expected, key_scores[q_idx])
+    objective = key_objective[q_idx]
+    correct = objective & (user_codes != 0) & (user_codes == key_codes[q_idx])
+    awarded = np.where(objective, np.where(correct, scores, 0), existing)
+
+    unique_attempts, a_idx = np.unique(np.array(attempt_ids, dtype=np.int64), return_inverse=True)
+    buckets = len(unique_attempts)
+    correct_counts = np.bincount(a_idx, weights=correct, minlength=buckets)
+    objective_scores = np.bincount(a_idx, weights=np.where(objective, awarded, 0), minlength=buckets)
+    total_scores = np.bincount(a_idx, weights=scores, minlength=buckets)
+    subjective_counts = np.bincount(a_idx, weights=~objective, minlength=buckets)
+    subjective_scores = np.bincount(a_idx, weights=np.where(objective, 0, awarded), minlength=buckets)
+    summary = {
+        attempt_id: {
+            "correct_count": int(correct_counts[index]),
+            "obtained_score": int(objective_scores[index]),
+            "total_score": int(total_scores[index]),
+            "subjective_score": int(subjective_scores[index]),
+            "has_subjective": bool(subjective_counts[index]),
+        }
+        for index, attempt_id in enumerate(unique_attempts.tolist())
+    }
+    return objective, correct, awarded, summary
+
+
+def grade_item_batch(items: Sequence[PracticeAttemptItem], answer_keys: Dict[int, AnswerKey]) -> Dict[int, Dict[str, object]]:
+    """批改模型实例形式的题目，结果写回 item.is_correct / awarded_score / graded_version，返回每份练习的汇总。"""
+    if not items:
+        return {}
+    objective, correct, awarded, summary = grade_answer_columns(
+        [item.attempt_id for item in items],
+        [item.question_id for item in items],
+        [item.user_answer for item in items],
+        [item.expected_score for item in items],
+        [item.awarded_score for item in items],
+        answer_keys,
+    )
+    for item, is_objective, is_correct, score_value in zip(items, objective.tolist(), correct.tolist(), awarded.tolist()):
+        item.graded_version = answer_keys[item.question_id][3]
+        if is_objective:
+            item.is_correct = is_correct
+            item.awarded_score = score_value
+        else:
+            item.is_correct = None
+    return summary
+
+
+def evaluate_attempt_items(
+    attempt: PracticeAttempt,
+    answer_map: Optional[Dict[int, str]] = None,
+    answer_updates: Optional[Dict[int, str]] = None,
+):
+    """批改单份练习。answer_map 整体替换作答，answer_updates 仅覆盖其中的题目。"""
+    items = list(attempt.items.only(*ITEM_LOAD_FIELDS, "order"))
+    for item in items:
+        if answer_map is not None:
+            item.user_answer = answer_map.get(item.question_id, "")
+        elif answer_updates and item.question_id in answer_updates:
+            item.user_answer = answer_updates[item.question_id]
+    answer_keys = load_answer_keys(item.question_id for item in items)
+    result = grade_item_batch(items, answer_keys).get(attempt.id) or EMPTY_RESULT
+    PracticeAttemptItem.objects.bulk_update(items, ITEM_RESULT_FIELDS)
+    sync_paper_answers([attempt.id], answer_keys)
+    return items, result["correct_count"], result["obtained_score"], result["total_score"], result["has_subjective"]
+
+
+def finalize_attempts(attempts: List[PracticeAttempt], *, status: str = "expired", now=None):
+    """批量收卷：合并缓冲作答后一次读取所有题目与参考答案并批改，返回 {attempt_id: items}。
+
+    调用方负责在事务中锁定 attempts。
+    """
+    if not attempts:
+        return {}
+    now = now or timezone.now()
+    attempt_ids = [attempt.id for attempt in attempts]
+    flush_buffered_answers(attempt_ids)
+
+    items = list(
+        PracticeAttemptItem.objects.filter(attempt_id__in=attempt_ids)
+        .only(*ITEM_LOAD_FIELDS)
+        .order_by("attempt_id", "order", "id")
+    )
+    answer_keys = load_answer_keys(item.question_id for item in items)
+    results = grade_item_batch(items, answer_keys)
+    sync_paper_answers(attempt_ids, answer_keys)
+
+    for attempt in attempts:
+        result = results.get(attempt.id) or EMPTY_RESULT
+        attempt.correct_count = result["correct_count"]
+        attempt.total_score = result["total_score"]
+        attempt.obtained_score = result["obtained_score"]
+        attempt.status = status
+        attempt.submitted_at = now
+        if result["has_subjective"]:
+            attempt.is_review_required = True
+
+    # 缓冲作答已合并入库，这里只需回写批改结果
+    write_item_results((item.id, item.is_correct, item.awarded_score, item.graded_version) for item in items)
+    PracticeAttempt.objects.bulk_update(attempts, ATTEMPT_RESULT_FIELDS, batch_size=200)
+    record_attempts_submitted(attempts)
+    record_pending_reviews(attempts)
+    record_activity_completed(attempts)
+    invalidate_dashboards_for_attempts(attempts)
+    invalidate_student_feeds(attempt.user_id for attempt in attempts if attempt.assignment_id)
+    items_by_attempt: Dict[int, List[PracticeAttemptItem]] = defaultdict(list)
+    for item in items:
+        items_by_attempt[item.attempt_id].append(item)
+    return items_by_attempt
+
+
+def ensure_attempt_expiration(attempt: PracticeAttempt):
+    expire_time, remaining = get_remaining_seconds(attempt)
+    if attempt.status == "ongoing" and remaining <= 0:
+        items = finalize_attempts([attempt])[attempt.id]
+        return expire_time, remaining, items
+    return expire_time, remaining, None
+
+
+def _lock_attempts(attempt_qs, *, skip_locked: bool = True):
+    """锁定待收卷的练习；数据库不支持 SKIP LOCKED 时等待提交请求释放行锁。
+
+    查询须带 status="ongoing" 条件：等到锁后读到的是已提交的最新状态，已交卷的练习不会被重复批改。
+    """
+    if skip_locked and connection.features.has_select_for_update_skip_locked:
+        return attempt_qs.select_for_update(skip_locked=True)
+    return attempt_qs.select_for_update()
+
+
+def finalize_expired_attempts(*, batch_size: int = 200, grace_seconds: int = 10, now=None) -> int:
+    """按截止时间索引分批收卷已超时的练习，返回处理的练习数量。
+
+    grace_seconds 给最后时刻的手动提交留出余量，避免与提交请求竞争。
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=grace_seconds)
+    finalized = 0
+    while True:
+        with transaction.atomic():
+            attempt_qs = PracticeAttempt.objects.filter(
+                status="ongoing",
+                deadline_at__lte=cutoff,
+            ).order_by("deadline_at", "id")
+            attempts = list(_lock_attempts(attempt_qs)[:batch_size])
+            finalize_attempts(attempts, now=now)
+        finalized += len(attempts)
+        if len(attempts) < batch_size:
+            return finalized
+
+
+def write_item_results(results: Iterable[Tuple[int, Optional[bool], int, int]]):
+    """回写 (item_id, is_correct, awarded_score, graded_version)。
+
+    批改结果只有少数几种组合，按组合分组后用 id IN 分块更新，
+    比逐行 CASE WHEN 的 bulk_update 少得多的 SQL 与参数。
+    """
+    groups: Dict[Tuple[Optional[bool], int, int], List[int]] = defaultdict(list)
+    for item_id, is_correct, score_value, graded_version in results:
+        groups[(is_correct, score_value, graded_version)].append(item_id)
+    for (is_correct, score_value, graded_version), item_ids in groups.items():
+        for start in range(0, len(item_ids), ITEM_UPDATE_CHUNK):
+            PracticeAttemptItem.objects.filter(id__in=item_ids[start:start + ITEM_UPDATE_CHUNK]).update(
+                is_correct=is_correct,
+                awarded_score=score_value,
+                graded_version=graded_version,
+            )
+
+
+def regrade_attempts(attempt_qs, *, batch_size: int = 200) -> Tuple[int, int]:
+    """按当前参考答案重新批改已提交的练习，返回 (处理数量, 成绩变化数量)。
+
+    只重判客观题，主观题沿用教师已给出的分数。作答按列读取，不实例化题目记录；
+    只回写结果发生变化的题目。
+    """
+    attempt_qs = attempt_qs.exclude(status="ongoing").order_by("id")
+    processed = 0
+    changed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            attempts = list(
+                attempt_qs.filter(id__gt=last_id)
+                .select_for_update()
+                .only("id", "correct_count", "obtained_score", "total_score")[:batch_size]
+            )
+            if not attempts:
+                break
+            last_id = attempts[-1].id
+            rows = list(
+                PracticeAttemptItem.objects.filter(attempt_id__in=[attempt.id for attempt in attempts]).values_list(
+                    *ITEM_LOAD_FIELDS
+                )
+            )
+            summary = {}
+            if rows:
+                (
+                    item_ids, attempt_ids, question_ids, user_answers, expected_scores, awarded_scores, previous,
+                    graded_versions,
+                ) = zip(*rows)
+                answer_keys = load_answer_keys(question_ids)
+                objective, correct, awarded, summary = grade_answer_columns(
+                    attempt_ids,
+                    question_ids,
+                    user_answers,
+                    expected_scores,
+                    awarded_scores,
+                    answer_keys,
+                )
+                sync_paper_answers(set(attempt_ids), answer_keys)
+                versions = np.array([answer_keys[question_id][3] for question_id in question_ids], dtype=np.int64)
+                dirty = (versions != np.array(graded_versions, dtype=np.int64)) | (objective & (
+                    (awarded != np.array([value or 0 for value in awarded_scores], dtype=np.int64))
+                    | (correct != np.array([value is True for value in previous], dtype=bool))
+                    | np.array([value is None for value in previous], dtype=bool)
+                ))
+                write_item_results(
+                    (
+                        item_ids[index],
+                        bool(correct[index]) if objective[index] else None,
+                        int(awarded[index]),
+                        int(versions[index]),
+                    )
+                    for index in np.flatnonzero(dirty).tolist()
+                )
+            updated = []
+            for attempt in attempts:
+                result = summary.get(attempt.id) or EMPTY_RESULT
+                total_score_value = result["total_score"] or attempt.total_score
+                obtained_score = min(result["obtained_score"] + result["subjective_score"], total_score_value)
+                if (attempt.correct_count, attempt.obtained_score, attempt.total_score) != (
+                    result["correct_count"], obtained_score, total_score_value,
+                ):
+                    attempt.correct_count = result["correct_count"]
+                    attempt.obtained_score = obtained_score
+                    attempt.total_score = total_score_value
+                    updated.append(attempt)
+            PracticeAttempt.objects.bulk_update(updated, ["correct_count", "obtained_score", "total_score"], batch_size=200)
+            refresh_stats_for_attempts(attempt.id for attempt in updated)
+            rebuild_activity_for_attempts(attempt.id for attempt in updated)
+            invalidate_dashboards_for_attempt_ids(attempt.id for attempt in updated)
+        processed += len(attempts)
+        changed += len(updated)
+        if len(attempts) < batch_size:
+            break
+    return processed, changed
+
+
+def regrade_question(question_id: int, *, batch_size: int = 500) -> int:
+    """参考答案修改后只重判该题的作答记录，返回成绩发生变化的练习数量。
+
+    通过 (question_id, graded_version) 索引找出按旧版本批改的题目记录，
+    练习总分与正确数按差值增量更新，不重算整份试卷；改判为正确的题目
+    同步扣减错题本中关联该次作答的错误次数。
+    """
+    key = Question.objects.filter(id=question_id).values_list(
+        "question_type", "answer", "score", "answer_version",
+    ).first()
+    if key is None:
+        return 0
+    answer_keys = {question_id: (key[0], key[1] or "", key[2], key[3])}
+    version = key[3]
+    stale_qs = PracticeAttemptItem.objects.filter(
+        question_id=question_id,
+        graded_version__lt=version,
+    ).exclude(attempt__status="ongoing")
+
+    changed_attempts = set()
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            candidates = list(
+                stale_qs.filter(id__gt=last_id).order_by("id").values_list("id", "attempt_id")[:batch_size]
+            )
+            if not candidates:
+                break
+            last_id = candidates[-1][0]
+            # 与收卷、批阅一致先按 id 顺序锁定练习，再读取题目记录
+            list(
+                PracticeAttempt.objects.filter(id__in={attempt_id for _, attempt_id in candidates})
+                .select_for_update()
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+            rows = list(
+                stale_qs.filter(id__in=[item_id for item_id, _ in candidates]).values_list(
+                    "id", "attempt_id", "user_answer", "expected_score", "awarded_score", "is_correct",
+                )
+            )
+            if rows:
+                item_ids, attempt_ids, user_answers, expected_scores, awarded_scores, previous = zip(*rows)
+                sync_paper_answers(set(attempt_ids), answer_keys)
+                objective, correct, awarded, _ = grade_answer_columns(
+                    attempt_ids,
+                    [question_id] * len(rows),
+                    user_answers,
+                    expected_scores,
+                    awarded_scores,
+                    answer_keys,
+                )
+                write_item_results(
+                    (
+                        item_ids[index],
+                        bool(correct[index]) if objective[index] else None,
+                        int(awarded[index]),
+                        version,
+                    )
+                    for index in range(len(rows))
+                )
+                if objective.any():
+                    score_delta = awarded - np.array([value or 0 for value in awarded_scores], dtype=np.int64)
+                    correct_delta = correct.astype(np.int64) - np.array(
+                        [value is True for value in previous], dtype=np.int64,
+                    )
+                    changed = _apply_attempt_deltas(attempt_ids, correct_delta, score_delta)
+                    refresh_stats_for_attempts(changed)
+                    rebuild_activity_for_attempts(changed)
+                    invalidate_dashboards_for_attempt_ids(changed)
+                    changed_attempts.update(changed)
+                    _release_wrong_book_entries([item_ids[index] for index in np.flatnonzero(correct_delta > 0).tolist()])
+        if len(candidates) < batch_size:
+            break
+    return len(changed_attempts)
+
+
+def _apply_attempt_deltas(attempt_ids, correct_delta, score_delta) -> List[int]:
+    """按 (正确数差值, 得分差值) 分组增量更新练习，返回发生变化的练习 id。"""
+    deltas: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    for attempt_id, correct_change, score_change in zip(attempt_ids, correct_delta.tolist(), score_delta.tolist()):
+        if correct_change or score_change:
+            deltas[attempt_id][0] += correct_change
+            deltas[attempt_id][1] += score_change
+    groups: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for attempt_id, (correct_change, score_change) in deltas.items():
+        groups[(correct_change, score_change)].append(attempt_id)
+    for (correct_change, score_change), ids in groups.items():
+        PracticeAttempt.objects.filter(id__in=ids).update(
+            correct_count=F("correct_count") + correct_change,
+            obtained_score=F("obtained_score") + score_change,
+        )
+    return list(deltas)
+
+
+def _release_wrong_book_entries(item_ids: List[int]):
+    """改判为正确的作答不再计入错题次数，次数归零的错题移出错题本。"""
+    if not item_ids:
+        return
+    entry_qs = WrongBookEntry.objects.filter(last_attempt_item_id__in=item_ids)
+    entry_qs.filter(wrong_times__lte=1).delete()
+    entry_qs.update(wrong_times=F("wrong_times") - 1, last_attempt_item=None)
+
+
+def summarize_assignment(assignment: ExamAssignment) -> Dict[str, object]:
+    stats = assignment.attempts.aggregate(
+        total_attempts=Count("id"),
+        completed=Count("id", filter=Q(status="completed")),
+        expired=Count("id", filter=Q(status="expired")),
+        pending_reviews=Count("id", filter=Q(is_review_required=True)),
+        average_score=Avg("obtained_score"),
+        max_score=Max("obtained_score"),
+        min_score=Min("obtained_score"),
+    )
+    stats["assignment_id"] = assignment.id
+    return stats
+
+
+def close_assignment(assignment: ExamAssignment, *, batch_size: int = 200, now=None) -> Dict[str, object]:
+    """考试结束后收卷所有未提交的作答，并将考试状态置为 closed，返回完成情况统计。
+
+    先跳过正被提交请求锁定的作答；仍有未收卷的作答时改为等待锁释放，全部收卷后才关闭考试。
+    """
+    now = now or timezone.now()
+    attempt_qs = assignment.attempts.filter(status="ongoing").order_by("id")
+    skip_locked = True
+    while True:
+        with transaction.atomic():
+            attempts = list(_lock_attempts(attempt_qs, skip_locked=skip_locked)[:batch_size])
+            finalize_attempts(attempts, now=now)
+        if len(attempts) < batch_size:
+            if not attempt_qs.exists():
+                break
+            skip_locked = False
+
+    ExamAssignment.objects.filter(id=assignment.id).exclude(status="closed").update(status="closed", updated_at=now)
+    assignment.status = "closed"
+    stats = summarize_assignment(assignment)
+    logger.info("exam assignment %s closed: %s", assignment.id, stats)
+    assignment_closed.send(sender=ExamAssignment, assignment=assignment, stats=stats)
+    return stats
+
+
+def close_ended_assignments(*, now=None) -> List[Dict[str, object]]:
+    now = now or timezone.now()
+    assignments = ExamAssignment.objects.filter(status="published", end_time__lt=now).order_by("end_time")
+    return [close_assignment(assignment, now=now) for assignment in assignments]
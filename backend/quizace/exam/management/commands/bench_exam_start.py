@@ -0,0 +1,114 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from exam.models import ExamAssignment, PracticeAttempt, Question, Subject
+from exam.papers import prepare_assignment_papers
+from exam.views import ExamAssignmentStartView
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "模拟大量学生同时开考，对比实时组卷与预生成试卷的开考延迟（会写入并清理临时数据）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--starters", type=int, default=500, help="并发开考的学生数")
+        parser.add_argument("--workers", type=int, default=50, help="并发线程数")
+        parser.add_argument("--question-count", type=int, default=20, help="每份试卷题量")
+
+    def handle(self, *args, **options):
+        token = uuid.uuid4().hex[:8]
+        starters = options["starters"]
+        question_count = options["question_count"]
+        teacher, students, subject = self._prepare(token, starters, question_count * 20)
+        try:
+            for label, prewarm in (("live", False), ("prepared", True)):
+                assignment = self._create_assignment(token, label, teacher, subject, question_count)
+                if prewarm:
+                    prepare_assignment_papers(assignment, starters)
+                latencies, failures = self._run(assignment.id, students, options["workers"])
+                self.stdout.write(
+                    f"{label:>9}: n={len(latencies)} failures={failures} "
+                    f"p50={percentile(latencies, 0.50):.1f}ms "
+                    f"p95={percentile(latencies, 0.95):.1f}ms "
+                    f"p99={percentile(latencies, 0.99):.1f}ms"
+                )
+        finally:
+            self._cleanup(teacher, students, subject)
+
+    def _prepare(self, token, starters, bank_size):
+        user_model = get_user_model()
+        password = make_password(None)
+        teacher = user_model.objects.create(
+            username=f"bench_t_{token}", email=f"t_{token}@bench.local", role="teacher", password=password,
+        )
+        user_model.objects.bulk_create([
+            user_model(
+                username=f"bench_s_{token}_{index}",
+                email=f"s_{token}_{index}@bench.local",
+                role="student",
+                password=password,
+            )
+            for index in range(starters)
+        ])
+        students = list(user_model.objects.filter(username__startswith=f"bench_s_{token}_"))
+        subject = Subject.objects.create(name=f"bench_{token}")
+        Question.objects.bulk_create([
+            Question(subject=subject, question_type="objective", content=f"bench {index}", answer="A")
+            for index in range(bank_size)
+        ])
+        return teacher, students, subject
+
+    def _create_assignment(self, token, label, teacher, subject, question_count):
+        now = timezone.now()
+        return ExamAssignment.objects.create(
+            title=f"bench_{token}_{label}",
+            subject=subject,
+            question_type="objective",
+            question_count=question_count,
+            start_time=now - timedelta(minutes=1),
+            end_time=now + timedelta(hours=1),
+            created_by=teacher,
+        )
+
+    def _run(self, assignment_id, students, workers):
+        factory = APIRequestFactory()
+        view = ExamAssignmentStartView.as_view()
+
+        def start(student):
+            request = factory.post(f"/api/exam/assignments/{assignment_id}/start/", {}, format="json")
+            force_authenticate(request, user=student)
+            started = time.perf_counter()
+            try:
+                response = view(request, assignment_id=assignment_id)
+                ok = response.data.get("code") == 200
+            finally:
+                connections.close_all()
+            return (time.perf_counter() - started) * 1000, ok
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(start, students))
+        latencies = [elapsed for elapsed, _ in results]
+        failures = sum(1 for _, ok in results if not ok)
+        return latencies, failures
+
+    def _cleanup(self, teacher, students, subject):
+        PracticeAttempt.objects.filter(subject=subject).delete()
+        ExamAssignment.objects.filter(subject=subject).delete()
+        subject.delete()
+        get_user_model().objects.filter(id__in=[student.id for student in students] + [teacher.id]).delete()
@@ -0,0 +1,137 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from exam.constants import resolve_score
+from exam.grading import regrade_attempts
+from exam.models import ExamAssignment, PracticeAttempt, PracticeAttemptItem, Question, Subject
+
+
+class _Rollback(Exception):
+    pass
+
+
+def grade_attempt_loop(attempt):
+    """原逐份练习、逐题批改的实现，仅作为基准对照。"""
+    items = list(attempt.items.select_related("question"))
+    correct_count = 0
+    obtained_score = 0
+    total_score_value = 0
+    for item in items:
+        question_score = item.expected_score or resolve_score(item.question.question_type, item.question.score)
+        total_score_value += question_score
+        if item.question.question_type == "objective":
+            normalized_answer = (item.user_answer or "").strip().upper()
+            correct_answer = (item.question.answer or "").strip().upper()
+            item.is_correct = bool(normalized_answer) and normalized_answer == correct_answer
+            item.awarded_score = question_score if item.is_correct else 0
+            if item.is_correct:
+                correct_count += 1
+                obtained_score += question_score
+        else:
+            item.is_correct = None
+    PracticeAttemptItem.objects.bulk_update(items, ["user_answer", "is_correct", "awarded_score"])
+    attempt.correct_count = correct_count
+    attempt.obtained_score = obtained_score
+    attempt.total_score = total_score_value
+    attempt.save(update_fields=["correct_count", "obtained_score", "total_score"])
+
+
+class Command(BaseCommand):
+    help = "对比逐份批改与向量化批量批改整场考试的耗时与查询次数（在事务中执行并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--attempts", type=int, default=1000, help="作答份数")
+        parser.add_argument("--items", type=int, default=50, help="每份题量")
+        parser.add_argument("--bank", type=int, default=200, help="题库规模")
+
+    def handle(self, *args, **options):
+        rows = []
+        try:
+            with transaction.atomic():
+                assignment = self._prepare(options["attempts"], options["items"], max(options["items"], options["bank"]))
+                attempt_qs = PracticeAttempt.objects.filter(assignment=assignment)
+                item_qs = PracticeAttemptItem.objects.filter(attempt__assignment=assignment)
+
+                item_qs.update(is_correct=None, awarded_score=0)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    for attempt in attempt_qs.order_by("id"):
+                        grade_attempt_loop(attempt)
+                    elapsed = time.perf_counter() - started
+                rows.append(("loop", len(ctx.captured_queries), elapsed * 1000))
+                expected = list(attempt_qs.order_by("id").values_list("correct_count", "obtained_score", "total_score"))
+
+                item_qs.update(is_correct=None, awarded_score=0)
+                attempt_qs.update(correct_count=0, obtained_score=0)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    regrade_attempts(attempt_qs, batch_size=options["attempts"])
+                    elapsed = time.perf_counter() - started
+                rows.append(("vector", len(ctx.captured_queries), elapsed * 1000))
+                actual = list(attempt_qs.order_by("id").values_list("correct_count", "obtained_score", "total_score"))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        mismatches = sum(1 for left, right in zip(expected, actual) if left != right)
+        self.stdout.write(f"attempts={options['attempts']} items={options['items']} mismatches={mismatches}")
+        self.stdout.write(f"{'path':>8} {'queries':>8} {'ms':>10}")
+        for label, queries, elapsed_ms in rows:
+            self.stdout.write(f"{label:>8} {queries:>8} {elapsed_ms:>10.1f}")
+
+    def _prepare(self, attempt_count, item_count, bank_size):
+        token = uuid.uuid4().hex[:8]
+        rng = random.Random(42)
+        user_model = get_user_model()
+        teacher = user_model.objects.create(username=f"bench_t_{token}", email=f"t_{token}@bench.local", role="teacher")
+        student = user_model.objects.create(username=f"bench_s_{token}", email=f"s_{token}@bench.local", role="student")
+        subject = Subject.objects.create(name=f"bench_{token}")
+        Question.objects.bulk_create([
+            Question(subject=subject, question_type="objective", content=f"bench {index}", answer=rng.choice("ABCD"))
+            for index in range(bank_size)
+        ])
+        question_ids = list(Question.objects.filter(subject=subject).values_list("id", flat=True))
+        now = timezone.now()
+        assignment = ExamAssignment.objects.create(
+            title=f"bench_{token}",
+            subject=subject,
+            question_type="objective",
+            question_count=item_count,
+            start_time=now - timedelta(hours=2),
+            end_time=now - timedelta(hours=1),
+            created_by=teacher,
+        )
+        # 批改不受唯一约束限制，同一学生的多份作答即可代表整场考试
+        PracticeAttempt.objects.bulk_create([
+            PracticeAttempt(
+                user=student,
+                subject=subject,
+                question_type="objective",
+                mode="exam",
+                assignment=assignment,
+                status="completed",
+                total_questions=item_count,
+            )
+            for _ in range(attempt_count)
+        ], batch_size=500)
+        attempt_ids = list(PracticeAttempt.objects.filter(assignment=assignment).values_list("id", flat=True))
+        PracticeAttemptItem.objects.bulk_create([
+            PracticeAttemptItem(
+                attempt_id=attempt_id,
+                question_id=question_id,
+                order=order,
+                expected_score=10,
+                user_answer=rng.choice("ABCD "),
+            )
+            for attempt_id in attempt_ids
+            for order, question_id in enumerate(rng.sample(question_ids, item_count), start=1)
+        ], batch_size=1000)
+        return assignment
@@ -0,0 +1,88 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exam.models import PracticeAttempt, Question, Subject
+from quizace.pagination import cursor_for, keyset_page, parse_ordering
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "比较 OFFSET 分页与游标分页在第 1 页和深页的耗时（在事务中执行并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=25000, help="每个列表的记录数")
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--page", type=int, action="append", dest="pages", help="测量的页码，可多次指定")
+        parser.add_argument("--repeat", type=int, default=20, help="每页重复次数")
+
+    def _cursor_for(self, queryset, ordering, offset):
+        """第 offset 条之前一条的游标，即从第 1 页逐页翻到该页时客户端持有的游标。"""
+        if offset == 0:
+            return None
+        fields = parse_ordering(ordering)
+        order_by = [f"-{name}" if descending else name for name, descending in fields]
+        return cursor_for(queryset.order_by(*order_by)[offset - 1], fields)
+
+    def _measure(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        pages = options["pages"] or [1, 1000]
+        repeat = max(1, options["repeat"])
+        rows = max(options["rows"], max(pages) * page_size)
+        results = []
+        try:
+            with transaction.atomic():
+                token = uuid.uuid4().hex[:8]
+                user_model = get_user_model()
+                teacher = user_model.objects.create(username=f"bench_t_{token}", email=f"t{token}@bench.local", role="teacher")
+                student = user_model.objects.create(username=f"bench_s_{token}", email=f"s{token}@bench.local", role="student")
+                subject = Subject.objects.create(name=f"bench_{token}")
+                Question.objects.bulk_create(
+                    [
+                        Question(subject=subject, question_type="objective", content=f"题目 {index}", answer="A", created_by=teacher)
+                        for index in range(rows)
+                    ],
+                    batch_size=1000,
+                )
+                PracticeAttempt.objects.bulk_create(
+                    [
+                        PracticeAttempt(user=student, subject=subject, question_type="objective", status="completed")
+                        for _ in range(rows)
+                    ],
+                    batch_size=1000,
+                )
+                targets = [
+                    ("history", PracticeAttempt.objects.filter(user=student).exclude(status="ongoing"), ("-started_at", "-id")),
+                    ("questions", Question.objects.filter(created_by=teacher), ("-updated_at", "-id")),
+                ]
+                for label, queryset, ordering in targets:
+                    order_by = [f"-{name}" if descending else name for name, descending in parse_ordering(ordering)]
+                    for page in pages:
+                        offset = (page - 1) * page_size
+                        cursor = self._cursor_for(queryset, ordering, offset)
+                        offset_ms = self._measure(
+                            lambda: list(queryset.order_by(*order_by)[offset:offset + page_size]), repeat,
+                        )
+                        keyset_ms = self._measure(
+                            lambda: keyset_page(queryset, ordering=ordering, cursor=cursor, page_size=page_size), repeat,
+                        )
+                        results.append((label, page, offset_ms, keyset_ms))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{'list':>10} {'page':>6} {'offset_ms':>10} {'keyset_ms':>10}")
+        for label, page, offset_ms, keyset_ms in results:
+            self.stdout.write(f"{label:>10} {page:>6} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
@@ -0,0 +1,91 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from exam.models import PracticeAttempt, PracticeAttemptItem, Question, Subject
+from exam.papers import write_attempt_paper
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "对比逐条插入与批量写入试卷的数据库往返次数与耗时（在事务中执行并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,50,200", help="试卷题量，逗号分隔")
+        parser.add_argument("--repeat", type=int, default=5, help="每种题量重复次数")
+
+    def handle(self, *args, **options):
+        sizes = [int(item) for item in options["sizes"].split(",") if item.strip()]
+        repeat = max(1, options["repeat"])
+        rows = []
+        try:
+            with transaction.atomic():
+                user, subject, question_ids = self._prepare(max(sizes))
+                for size in sizes:
+                    question_scores = [(qid, 10) for qid in question_ids[:size]]
+                    rows.append((size, "legacy", *self._measure(repeat, self._write_legacy, user, subject, question_scores)))
+                    rows.append((size, "bulk", *self._measure(repeat, self._write_bulk, user, subject, question_scores)))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{'size':>6} {'path':>8} {'queries':>8} {'avg_ms':>10}")
+        for size, label, queries, avg_ms in rows:
+            self.stdout.write(f"{size:>6} {label:>8} {queries:>8} {avg_ms:>10.2f}")
+
+    def _prepare(self, count):
+        token = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(username=f"bench_{token}", email=f"{token}@bench.local", role="student")
+        subject = Subject.objects.create(name=f"bench_{token}")
+        Question.objects.bulk_create([
+            Question(subject=subject, question_type="objective", content=f"bench {index}", answer="A")
+            for index in range(count)
+        ])
+        question_ids = list(Question.objects.filter(subject=subject).order_by("id").values_list("id", flat=True))
+        return user, subject, question_ids
+
+    def _measure(self, repeat, func, *args):
+        elapsed = 0.0
+        queries = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                func(*args)
+                elapsed += time.perf_counter() - started
+            queries = len(ctx.captured_queries)
+        return queries, elapsed * 1000 / repeat
+
+    def _write_legacy(self, user, subject, question_scores):
+        with transaction.atomic():
+            attempt = PracticeAttempt.objects.create(
+                user=user,
+                subject=subject,
+                question_type="objective",
+                total_questions=len(question_scores),
+                total_score=sum(score for _, score in question_scores),
+            )
+            for index, (question_id, score_value) in enumerate(question_scores, start=1):
+                PracticeAttemptItem.objects.create(
+                    attempt=attempt,
+                    question_id=question_id,
+                    order=index,
+                    expected_score=score_value,
+                )
+
+    def _write_bulk(self, user, subject, question_scores):
+        write_attempt_paper(
+            user=user,
+            subject=subject,
+            question_type="objective",
+            duration_seconds=1800,
+            mode="practice",
+            assignment=None,
+            question_scores=question_scores,
+        )
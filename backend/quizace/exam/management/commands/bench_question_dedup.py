@@ -0,0 +1,71 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exam.models import Question, Subject
+from exam.question_dedup import cluster_duplicates, find_near_duplicates, rebuild_question_signatures
+
+CHARSET = "已知函数求导数的单调区间极值最大值最小值方程解集合元素概率统计样本平均数方差直线圆椭圆抛物线向量数列等差等比通项公式前项和证明不等式三角形面积周长正弦余弦定理"
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _mutate(text: str, rng: random.Random, edits: int) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        chars[rng.randrange(len(chars))] = rng.choice(CHARSET)
+    return "".join(chars)
+
+
+class Command(BaseCommand):
+    help = "生成题库并测量近似重复查找与聚类耗时（在事务中执行并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=100000, help="题目数量")
+        parser.add_argument("--duplicates", type=int, default=500, help="其中注入的近似重复题数量")
+        parser.add_argument("--lookups", type=int, default=50, help="查重次数")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        total = options["questions"]
+        duplicate_count = min(options["duplicates"], total // 2)
+        result = {}
+        try:
+            with transaction.atomic():
+                subject = Subject.objects.create(name=f"bench_{uuid.uuid4().hex[:8]}")
+                originals = ["".join(rng.choice(CHARSET) for _ in range(rng.randint(40, 120))) for _ in range(total - duplicate_count)]
+                # 近似重复题：改动原题 2~3 个字
+                contents = originals + [_mutate(rng.choice(originals), rng, rng.randint(2, 3)) for _ in range(duplicate_count)]
+                Question.objects.bulk_create(
+                    [Question(subject=subject, question_type="subjective", content=content, answer="略") for content in contents],
+                    batch_size=1000,
+                )
+                started = time.perf_counter()
+                rebuild_question_signatures(subject_id=subject.id)
+                result["index_s"] = time.perf_counter() - started
+
+                probes = [_mutate(rng.choice(originals), rng, 2) for _ in range(options["lookups"])]
+                found = 0
+                started = time.perf_counter()
+                for probe in probes:
+                    found += bool(find_near_duplicates(subject.id, probe))
+                result["lookup_ms"] = (time.perf_counter() - started) * 1000 / max(1, len(probes))
+                result["recall"] = found / max(1, len(probes))
+
+                started = time.perf_counter()
+                clusters = cluster_duplicates(subject_id=subject.id)
+                result["cluster_s"] = time.perf_counter() - started
+                result["clusters"] = len(clusters)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"题目 {total} 道（注入近似重复 {duplicate_count} 道）")
+        self.stdout.write(f"计算签名 {result['index_s']:.1f}s")
+        self.stdout.write(f"单次查重平均 {result['lookup_ms']:.2f}ms，召回率 {result['recall']:.0%}")
+        self.stdout.write(f"聚类 {result['cluster_s']:.1f}s，共 {result['clusters']} 组")
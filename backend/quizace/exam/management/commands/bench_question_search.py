@@ -0,0 +1,73 @@
+import json
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exam.models import Question, Subject
+from exam.question_search import rebuild_question_search, search_questions
+
+# 常见题干用字，随机组合出近似真实分布的题目文本
+CHARSET = "已知函数求导数的单调区间极值最大值最小值方程解集合元素概率统计样本平均数方差直线圆椭圆抛物线向量数列等差等比通项公式前项和证明不等式三角形面积周长正弦余弦定理"
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "生成题目并测量全文检索耗时（在事务中执行并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=100000, help="题目数量")
+        parser.add_argument("--repeat", type=int, default=20, help="每个查询重复次数")
+        parser.add_argument("--query", action="append", dest="queries", help="查询词，可多次指定")
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or ["导数", "单调区间", "等比数列 前项和", "正弦定理 三角形面积"]
+        repeat = max(1, options["repeat"])
+        rng = random.Random(0)
+        rows = []
+        try:
+            with transaction.atomic():
+                token = uuid.uuid4().hex[:8]
+                teacher = get_user_model().objects.create(
+                    username=f"bench_{token}", email=f"{token}@bench.local", role="teacher",
+                )
+                subject = Subject.objects.create(name=f"bench_{token}")
+                options_text = json.dumps({"A": "甲", "B": "乙", "C": "丙", "D": "丁"}, ensure_ascii=False)
+                Question.objects.bulk_create(
+                    [
+                        Question(
+                            subject=subject,
+                            question_type="objective",
+                            content="".join(rng.choice(CHARSET) for _ in range(rng.randint(30, 120))),
+                            analysis="".join(rng.choice(CHARSET) for _ in range(40)),
+                            options=options_text,
+                            answer="A",
+                            created_by=teacher,
+                        )
+                        for _ in range(options["questions"])
+                    ],
+                    batch_size=1000,
+                )
+                started = time.perf_counter()
+                rebuild_question_search(batch_size=1000)
+                self.stdout.write(f"建立索引耗时 {time.perf_counter() - started:.1f}s")
+                for query in queries:
+                    elapsed = 0.0
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        _, _, total = search_questions(teacher, query, page_size=20)
+                        elapsed += time.perf_counter() - started
+                    rows.append((query, total, elapsed * 1000 / repeat))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{'query':>24} {'hits':>8} {'avg_ms':>10}")
+        for query, total, avg_ms in rows:
+            self.stdout.write(f"{query:>24} {total:>8} {avg_ms:>10.2f}")
@@ -0,0 +1,132 @@
+import json
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from exam.constants import resolve_score
+from exam.models import PracticeAttempt, Question, Subject
+from exam.papers import create_attempt_with_questions
+from exam.question_cache import render_questions
+from exam.serializers import (
+    PracticeAttemptItemSerializer,
+    PracticeAttemptSerializer,
+    QuestionSerializer,
+    serialize_attempt_items,
+    serialize_attempts,
+    serialize_questions,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class LegacyItemSerializer(PracticeAttemptItemSerializer):
+    """原 get_question 实现（逐题读取科目、解析选项），仅作为基准对照。"""
+
+    def get_question(self, obj):
+        question = obj.question
+        data = {
+            "id": question.id,
+            "question_type": question.question_type,
+            "content": question.content,
+            "options": question.options_dict,
+            "score": obj.expected_score or resolve_score(question.question_type, question.score),
+            "subject_name": question.subject.name,
+            "media_url": question.media_url or "",
+        }
+        if self.context.get("force_show_solution", False):
+            data["answer"] = question.answer
+            data["analysis"] = question.analysis
+        return data
+
+
+class Command(BaseCommand):
+    help = "对比 DRF 序列化器与快速序列化函数的耗时与查询次数（在事务中执行并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100, help="试卷题量")
+        parser.add_argument("--attempts", type=int, default=200, help="练习列表长度")
+        parser.add_argument("--repeat", type=int, default=20, help="重复次数")
+
+    def handle(self, *args, **options):
+        repeat = max(1, options["repeat"])
+        rows = []
+        try:
+            with transaction.atomic():
+                attempt, attempts, questions = self._prepare(options["items"], options["attempts"])
+                context = {"force_show_solution": True}
+                cases = (
+                    (
+                        "items",
+                        lambda: LegacyItemSerializer(
+                            attempt.items.select_related("question"), many=True, context=context,
+                        ).data,
+                        lambda: serialize_attempt_items(attempt, context=context),
+                    ),
+                    (
+                        "attempts",
+                        lambda: PracticeAttemptSerializer(PracticeAttempt.objects.filter(id__in=attempts), many=True).data,
+                        lambda: serialize_attempts(PracticeAttempt.objects.filter(id__in=attempts)),
+                    ),
+                    (
+                        "questions",
+                        lambda: QuestionSerializer(Question.objects.filter(id__in=questions), many=True).data,
+                        lambda: self._fast_questions(questions),
+                    ),
+                )
+                for label, legacy, fast in cases:
+                    same = json.dumps(legacy(), sort_keys=True, default=str) == json.dumps(fast(), sort_keys=True, default=str)
+                    rows.append((label, "drf", *self._measure(repeat, legacy), same))
+                    rows.append((label, "fast", *self._measure(repeat, fast), same))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(f"{'case':>10} {'path':>6} {'queries':>8} {'avg_ms':>10} {'same':>6}")
+        for label, path, queries, avg_ms, same in rows:
+            self.stdout.write(f"{label:>10} {path:>6} {queries:>8} {avg_ms:>10.2f} {str(same):>6}")
+
+    def _fast_questions(self, question_ids):
+        questions = list(Question.objects.filter(id__in=question_ids))
+        return serialize_questions(questions, render_questions(questions, with_solution=True))
+
+    def _measure(self, repeat, func):
+        elapsed = 0.0
+        queries = 0
+        for _ in range(repeat):
+            # 查询日志有长度上限，计数前清空
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                func()
+                elapsed += time.perf_counter() - started
+            queries = len(ctx.captured_queries)
+        return queries, elapsed * 1000 / repeat
+
+    def _prepare(self, item_count, attempt_count):
+        token = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(username=f"bench_{token}", email=f"{token}@bench.local", role="student")
+        subject = Subject.objects.create(name=f"bench_{token}")
+        options = json.dumps({"A": "甲", "B": "乙", "C": "丙", "D": "丁"}, ensure_ascii=False)
+        Question.objects.bulk_create([
+            Question(subject=subject, question_type="objective", content=f"bench {index}", options=options, answer="A")
+            for index in range(item_count)
+        ])
+        questions = list(Question.objects.filter(subject=subject).order_by("id"))
+        attempts = []
+        for _ in range(max(1, attempt_count)):
+            created, _, _, _ = create_attempt_with_questions(
+                user=user,
+                subject=subject,
+                question_type="objective",
+                size=item_count,
+                duration_seconds=1800,
+                preset_questions=questions,
+            )
+            attempts.append(created.id)
+        return PracticeAttempt.objects.get(id=attempts[0]), attempts, [question.id for question in questions]
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam.grading import close_ended_assignments
+
+
+class Command(BaseCommand):
+    help = "对已过结束时间的考试统一收卷，并将考试状态置为已结束"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="常驻运行，按间隔重复执行")
+        parser.add_argument("--interval", type=int, default=60, help="常驻运行时的间隔秒数")
+
+    def handle(self, *args, **options):
+        while True:
+            for stats in close_ended_assignments():
+                self.stdout.write(
+                    "考试 {assignment_id} 已结束：共 {total_attempts} 份作答，"
+                    "提交 {completed}，超时 {expired}，待批阅 {pending_reviews}，"
+                    "平均分 {average_score}，最高分 {max_score}，最低分 {min_score}".format(**stats)
+                )
+            if not options["loop"]:
+                break
+            time.sleep(max(1, options["interval"]))
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from exam.models import Question
+from exam.question_dedup import cluster_duplicates, rebuild_question_signatures
+
+
+class Command(BaseCommand):
+    help = "按 MinHash/LSH 签名聚类题库中的近似重复题目"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subject", type=int, help="只处理指定科目")
+        parser.add_argument("--threshold", type=float, help="相似度阈值，默认使用 EXAM_DUPLICATE_THRESHOLD")
+        parser.add_argument("--rebuild", action="store_true", help="聚类前重新计算签名")
+        parser.add_argument("--json", action="store_true", help="以 JSON 输出分组")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            processed = rebuild_question_signatures(subject_id=options["subject"])
+            self.stdout.write(f"已重建 {processed} 道题目的签名")
+        clusters = cluster_duplicates(subject_id=options["subject"], threshold=options["threshold"])
+        if options["json"]:
+            self.stdout.write(json.dumps(clusters))
+            return
+        contents = Question.objects.in_bulk([question_id for members in clusters for question_id in members])
+        for index, members in enumerate(clusters, start=1):
+            self.stdout.write(f"[{index}] {len(members)} 道: {members}")
+            for question_id in members:
+                self.stdout.write(f"    {question_id}: {contents[question_id].content[:40]}")
+        self.stdout.write(f"共 {len(clusters)} 组，涉及 {sum(len(members) for members in clusters)} 道题目")
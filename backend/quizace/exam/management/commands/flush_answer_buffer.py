@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam.answer_buffer import flush_answer_batch
+
+
+class Command(BaseCommand):
+    help = "把自动保存缓冲中的作答合并写入练习题目记录"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="单批读取的日志条数")
+        parser.add_argument("--max-batches", type=int, default=20, help="每轮最多合并的批数，考试期间日志持续写入时也按时结束本轮")
+        parser.add_argument("--loop", action="store_true", help="常驻运行，按间隔重复执行")
+        parser.add_argument("--interval", type=int, default=30, help="常驻运行时的间隔秒数")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        while True:
+            read = updated = 0
+            for _ in range(max(1, options["max_batches"])):
+                batch_read, batch_updated = flush_answer_batch(limit=batch_size)
+                read += batch_read
+                updated += batch_updated
+                if batch_read < batch_size:
+                    break
+            if read:
+                self.stdout.write(f"已读取 {read} 条日志，合并 {updated} 条作答")
+            if not options["loop"]:
+                break
+            time.sleep(max(1, options["interval"]))
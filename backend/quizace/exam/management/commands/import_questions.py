@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from exam.question_import import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, ImportFileError, detect_format, import_questions
+
+
+class Command(BaseCommand):
+    help = "从 CSV、XLSX 或 JSON 文件批量导入题目"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="题目文件路径")
+        parser.add_argument("--teacher", required=True, help="录入教师的用户名")
+        parser.add_argument("--subject", help="行内未填写科目时使用的科目 id 或名称")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="文件格式，默认按扩展名判断")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="每块写入的题目数")
+        parser.add_argument("--dry-run", action="store_true", help="只校验不写入")
+
+    def handle(self, *args, **options):
+        teacher = get_user_model().objects.filter(username=options["teacher"], role="teacher").first()
+        if teacher is None:
+            raise CommandError(f"教师 {options['teacher']} 不存在")
+        try:
+            fmt = detect_format(options["path"], options["format"])
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+        with open(options["path"], "rb") as fileobj:
+            report = import_questions(
+                fileobj,
+                teacher=teacher,
+                fmt=fmt,
+                default_subject=options["subject"],
+                chunk_size=max(1, options["chunk_size"]),
+                dry_run=options["dry_run"],
+            )
+        for error in report["errors"]:
+            self.stdout.write(f"第 {error['row']} 行: {'；'.join(error['errors'])}")
+        if report["failed"] > len(report["errors"]):
+            self.stdout.write(f"……另有 {report['failed'] - len(report['errors'])} 行错误未列出")
+        action = "可导入" if options["dry_run"] else "已导入"
+        self.stdout.write(f"共 {report['total']} 行，{action} {report['created']} 道，失败 {report['failed']} 行")
+        if report["aborted"]:
+            raise CommandError(f"导入中止：{report['aborted']}")
@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exam.models import ExamAssignment
+from exam.papers import prepare_assignment_papers
+
+
+class Command(BaseCommand):
+    help = "为即将开始或正在进行的考试预生成试卷，开考时学生直接领取"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lead-minutes", type=int, default=10, help="提前多少分钟开始预生成")
+        parser.add_argument("--papers", type=int, default=None, help="每场考试的预期考生数，默认取全部正常状态的学生数")
+        parser.add_argument("--loop", action="store_true", help="常驻运行，按间隔重复执行")
+        parser.add_argument("--interval", type=int, default=60, help="常驻运行时的间隔秒数")
+
+    def handle(self, *args, **options):
+        while True:
+            self.prewarm(options["lead_minutes"], options["papers"])
+            if not options["loop"]:
+                break
+            time.sleep(max(1, options["interval"]))
+
+    def prewarm(self, lead_minutes: int, expected_papers):
+        now = timezone.now()
+        if expected_papers is None:
+            expected_papers = get_user_model().objects.filter(role="student", status=0).count()
+        assignments = (
+            ExamAssignment.objects.filter(
+                status="published",
+                start_time__lte=now + timedelta(minutes=lead_minutes),
+                end_time__gt=now,
+            )
+            .select_related("subject")
+            .order_by("start_time")
+        )
+        for assignment in assignments:
+            remaining_starters = max(0, expected_papers - assignment.attempts.count())
+            try:
+                created = prepare_assignment_papers(assignment, remaining_starters)
+            except ValueError as exc:
+                self.stderr.write(f"考试 {assignment.id} 预生成失败：{exc}")
+                continue
+            if created:
+                self.stdout.write(f"考试 {assignment.id} 新生成 {created} 份试卷")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from exam.draft_queue import DraftWorkerPool
+
+
+class Command(BaseCommand):
+    help = "识别待处理（processing）的题目草稿，填写解析结果"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, help="同时识别的草稿数，默认使用 EXAM_OCR_WORKERS")
+        parser.add_argument("--loop", action="store_true", help="常驻运行，空闲时按间隔轮询")
+        parser.add_argument("--interval", type=float, default=5, help="轮询间隔秒数")
+
+    def handle(self, *args, **options):
+        pool = DraftWorkerPool(workers=options["workers"])
+        counts = pool.run(loop=options["loop"], interval=max(0.5, options["interval"]))
+        if counts:
+            summary = "，".join(f"{status} {count}" for status, count in sorted(counts.items()))
+            self.stdout.write(f"已处理草稿：{summary}")
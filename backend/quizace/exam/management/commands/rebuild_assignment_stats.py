@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from exam.assignment_stats import rebuild_assignment_stats
+
+
+class Command(BaseCommand):
+    help = "按作答记录重算考试统计，修正增量维护产生的偏差"
+
+    def add_arguments(self, parser):
+        parser.add_argument("assignment_ids", nargs="*", type=int, help="考试 id，不指定时核对全部考试")
+        parser.add_argument("--batch-size", type=int, default=500, help="单批核对的考试数量")
+
+    def handle(self, *args, **options):
+        checked, fixed = rebuild_assignment_stats(
+            options["assignment_ids"] or None,
+            batch_size=max(1, options["batch_size"]),
+        )
+        self.stdout.write(f"已核对 {checked} 场考试，修正 {fixed} 条统计")
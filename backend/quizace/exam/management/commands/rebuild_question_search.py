@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from exam.question_search import index_questions, rebuild_question_search
+
+
+class Command(BaseCommand):
+    help = "重建题库全文检索的倒排表"
+
+    def add_arguments(self, parser):
+        parser.add_argument("question_ids", nargs="*", type=int, help="题目 id，不指定时重建全部题目")
+        parser.add_argument("--batch-size", type=int, default=500, help="单批重建的题目数量")
+
+    def handle(self, *args, **options):
+        if options["question_ids"]:
+            index_questions(options["question_ids"])
+            processed = len(set(options["question_ids"]))
+        else:
+            processed = rebuild_question_search(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(f"已重建 {processed} 道题目的检索词元")
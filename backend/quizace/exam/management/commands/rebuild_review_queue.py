@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from exam.review_queue import rebuild_review_queue
+
+
+class Command(BaseCommand):
+    help = "按作答记录重算待批阅队列的学生分组与汇总，修正增量维护产生的偏差"
+
+    def add_arguments(self, parser):
+        parser.add_argument("assignment_ids", nargs="*", type=int, help="考试 id，不指定时核对全部考试与自由练习")
+        parser.add_argument("--batch-size", type=int, default=500, help="单批核对的考试数量")
+
+    def handle(self, *args, **options):
+        checked, fixed = rebuild_review_queue(
+            options["assignment_ids"] or None,
+            batch_size=max(1, options["batch_size"]),
+        )
+        self.stdout.write(f"已核对 {checked} 个队列，修正 {fixed} 条记录")
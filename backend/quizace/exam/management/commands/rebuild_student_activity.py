@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from exam.activity import rebuild_student_activity
+
+
+class Command(BaseCommand):
+    help = "按作答记录与错题本重建学生每日作答汇总"
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_ids", nargs="*", type=int, help="学生 id，不指定时重建全部学生")
+        parser.add_argument("--batch-size", type=int, default=200, help="单批重建的学生数量")
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"] or list(
+            get_user_model().objects.filter(role="student").order_by("id").values_list("id", flat=True)
+        )
+        batch_size = max(1, options["batch_size"])
+        rows = 0
+        for start in range(0, len(user_ids), batch_size):
+            rows += rebuild_student_activity(user_ids[start:start + batch_size])
+        self.stdout.write(f"已重建 {len(user_ids)} 名学生的每日汇总，共 {rows} 行")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exam.grading import regrade_attempts
+from exam.models import PracticeAttempt
+
+
+class Command(BaseCommand):
+    help = "按当前参考答案批量重判已提交练习的客观题"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--assignment", type=int, help="仅重判指定考试的作答")
+        parser.add_argument("--subject", type=int, help="仅重判指定科目的练习")
+        parser.add_argument("--batch-size", type=int, default=200, help="单批处理的练习数量")
+
+    def handle(self, *args, **options):
+        if not options["assignment"] and not options["subject"]:
+            raise CommandError("请指定 --assignment 或 --subject")
+        attempt_qs = PracticeAttempt.objects.all()
+        if options["assignment"]:
+            attempt_qs = attempt_qs.filter(assignment_id=options["assignment"])
+        if options["subject"]:
+            attempt_qs = attempt_qs.filter(subject_id=options["subject"])
+        processed, changed = regrade_attempts(attempt_qs, batch_size=max(1, options["batch_size"]))
+        self.stdout.write(f"已重判 {processed} 份练习，其中 {changed} 份成绩发生变化")
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exam.grading import regrade_question
+from exam.models import Question
+
+
+class Command(BaseCommand):
+    help = "重判按旧版参考答案批改的作答记录；教师修改参考答案后由本命令在后台完成重判"
+
+    def add_arguments(self, parser):
+        parser.add_argument("question_ids", nargs="*", type=int, help="题目 id，不指定时检查所有修改过答案的题目")
+        parser.add_argument("--batch-size", type=int, default=500, help="单批处理的作答记录数量")
+        parser.add_argument("--loop", action="store_true", help="常驻运行，按间隔检查新修改答案的题目")
+        parser.add_argument("--interval", type=int, default=30, help="常驻运行时的间隔秒数")
+
+    def handle(self, *args, **options):
+        since = None
+        while True:
+            started_at = timezone.now()
+            if options["question_ids"]:
+                question_ids = options["question_ids"]
+            else:
+                question_qs = Question.objects.filter(answer_version__gt=1)
+                if since is not None:
+                    # 常驻运行时首轮检查全部，之后只检查上一轮开始后修改过的题目
+                    question_qs = question_qs.filter(updated_at__gte=since)
+                question_ids = list(question_qs.order_by("id").values_list("id", flat=True))
+            total = 0
+            for question_id in question_ids:
+                changed = regrade_question(question_id, batch_size=max(1, options["batch_size"]))
+                if changed:
+                    self.stdout.write(f"题目 {question_id}：{changed} 份练习成绩已更新")
+                total += changed
+            if not options["loop"] or since is None or question_ids:
+                self.stdout.write(f"共检查 {len(question_ids)} 道题目，{total} 份练习成绩已更新")
+            if not options["loop"]:
+                break
+            since = started_at
+            time.sleep(max(1, options["interval"]))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from exam.grading import finalize_expired_attempts
+
+
+class Command(BaseCommand):
+    help = "按截止时间批量收卷已超时的练习与考试"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200, help="单批收卷的练习数量")
+        parser.add_argument("--grace", type=int, default=10, help="超过截止时间多少秒后收卷")
+        parser.add_argument("--loop", action="store_true", help="常驻运行，按间隔重复执行")
+        parser.add_argument("--interval", type=int, default=15, help="常驻运行时的间隔秒数")
+
+    def handle(self, *args, **options):
+        while True:
+            finalized = finalize_expired_attempts(
+                batch_size=max(1, options["batch_size"]),
+                grace_seconds=max(0, options["grace"]),
+            )
+            if finalized:
+                self.stdout.write(f"已收卷 {finalized} 份超时练习")
+            if not options["loop"]:
+                break
+            time.sleep(max(1, options["interval"]))
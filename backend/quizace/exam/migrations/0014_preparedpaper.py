@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0013_alter_examassignment_question_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreparedPaper',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_scores', models.JSONField(default=list, verbose_name='题目及分值')),
+                ('questions', models.JSONField(default=list, verbose_name='题目数据')),
+                ('is_shared', models.BooleanField(default=False, verbose_name='共享试卷')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='领取时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='生成时间')),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prepared_papers', to='exam.examassignment', verbose_name='关联考试')),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_papers', to=settings.AUTH_USER_MODEL, verbose_name='领取学生')),
+            ],
+            options={
+                'verbose_name': '预生成试卷',
+                'verbose_name_plural': '预生成试卷',
+                'db_table': 'exam_prepared_paper',
+                'indexes': [models.Index(fields=['assignment', 'is_shared', 'claimed_at'], name='exam_prepared_paper_claim')],
+            },
+        ),
+    ]
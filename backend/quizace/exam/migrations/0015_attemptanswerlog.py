@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0014_preparedpaper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptAnswerLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('user_answer', models.TextField(blank=True, verbose_name='学生答案')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='写入时间')),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_logs', to='exam.practiceattempt', verbose_name='练习记录')),
+                ('question', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='exam.question', verbose_name='题目')),
+            ],
+            options={
+                'verbose_name': '作答日志',
+                'verbose_name_plural': '作答日志',
+                'db_table': 'exam_attempt_answer_log',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0015_attemptanswerlog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practiceattempt',
+            name='answer_revision',
+            field=models.PositiveIntegerField(default=0, verbose_name='作答版本号'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:14
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def fill_deadline_at(apps, schema_editor):
+    PracticeAttempt = apps.get_model("exam", "PracticeAttempt")
+    batch = []
+    for attempt in PracticeAttempt.objects.filter(deadline_at__isnull=True).only("id", "started_at", "duration_seconds").iterator():
+        attempt.deadline_at = attempt.started_at + timedelta(seconds=attempt.duration_seconds)
+        batch.append(attempt)
+        if len(batch) >= 500:
+            PracticeAttempt.objects.bulk_update(batch, ["deadline_at"])
+            batch = []
+    if batch:
+        PracticeAttempt.objects.bulk_update(batch, ["deadline_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0016_practiceattempt_answer_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practiceattempt',
+            name='deadline_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='截止时间'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceattempt',
+            index=models.Index(fields=['status', 'deadline_at'], name='exam_attempt_deadline'),
+        ),
+        migrations.RunPython(fill_deadline_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0017_practiceattempt_deadline_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practiceattemptitem',
+            name='graded_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='批改所用答案版本'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='answer_version',
+            field=models.PositiveIntegerField(default=1, verbose_name='参考答案版本'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceattemptitem',
+            index=models.Index(fields=['question', 'graded_version'], name='exam_item_question_version'),
+        ),
+    ]
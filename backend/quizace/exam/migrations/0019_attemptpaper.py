@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0018_question_answer_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptPaper',
+            fields=[
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='paper', serialize=False, to='exam.practiceattempt', verbose_name='练习记录')),
+                ('questions', models.JSONField(default=list, verbose_name='题目快照')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '试卷快照',
+                'verbose_name_plural': '试卷快照',
+                'db_table': 'exam_attempt_paper',
+            },
+        ),
+    ]
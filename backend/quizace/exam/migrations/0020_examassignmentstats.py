@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:33
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+import django.db.models.deletion
+
+
+def fill_assignment_stats(apps, schema_editor):
+    ExamAssignment = apps.get_model("exam", "ExamAssignment")
+    ExamAssignmentStats = apps.get_model("exam", "ExamAssignmentStats")
+    PracticeAttempt = apps.get_model("exam", "PracticeAttempt")
+    submitted = Q(status__in=["completed", "expired"])
+    rows = {
+        row["assignment_id"]: row
+        for row in PracticeAttempt.objects.filter(assignment__isnull=False)
+        .values("assignment_id")
+        .annotate(
+            total=Count("id"),
+            submitted=Count("id", filter=submitted),
+            pending=Count("id", filter=submitted & Q(is_review_required=True)),
+            score_sum=Sum("obtained_score", filter=submitted),
+            score_max=Max("obtained_score", filter=submitted),
+        )
+    }
+    batch = []
+    for assignment_id in ExamAssignment.objects.values_list("id", flat=True).iterator():
+        row = rows.get(assignment_id) or {}
+        batch.append(ExamAssignmentStats(
+            assignment_id=assignment_id,
+            total_attempts=row.get("total") or 0,
+            submitted_attempts=row.get("submitted") or 0,
+            pending_reviews=row.get("pending") or 0,
+            score_sum=row.get("score_sum") or 0,
+            score_max=row.get("score_max") or 0,
+        ))
+        if len(batch) >= 500:
+            ExamAssignmentStats.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ExamAssignmentStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0019_attemptpaper'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAssignmentStats',
+            fields=[
+                ('assignment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='exam.examassignment', verbose_name='关联考试')),
+                ('total_attempts', models.PositiveIntegerField(default=0, verbose_name='作答人次')),
+                ('submitted_attempts', models.PositiveIntegerField(default=0, verbose_name='已交卷人次')),
+                ('pending_reviews', models.PositiveIntegerField(default=0, verbose_name='待批阅人次')),
+                ('score_sum', models.PositiveBigIntegerField(default=0, verbose_name='已交卷得分合计')),
+                ('score_max', models.PositiveIntegerField(default=0, verbose_name='最高分')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '考试统计',
+                'verbose_name_plural': '考试统计',
+                'db_table': 'exam_assignment_stats',
+            },
+        ),
+        migrations.RunPython(fill_assignment_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0020_examassignmentstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examassignment',
+            index=models.Index(fields=['status', 'end_time'], name='exam_assignment_status_end'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceattempt',
+            index=models.Index(fields=['user', 'assignment', 'started_at'], name='exam_attempt_user_assignment'),
+        ),
+    ]
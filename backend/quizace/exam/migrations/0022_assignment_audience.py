@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0007_classroster'),
+        ('exam', '0021_assignment_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAssignmentAudience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': '考试对象',
+                'verbose_name_plural': '考试对象',
+                'db_table': 'exam_assignment_audience',
+            },
+        ),
+        migrations.AddField(
+            model_name='examassignment',
+            name='audience',
+            field=models.CharField(choices=[('all', '全部学生'), ('rosters', '指定班级')], default='all', max_length=16, verbose_name='考试对象'),
+        ),
+        migrations.AddIndex(
+            model_name='examassignment',
+            index=models.Index(fields=['audience', 'status', 'end_time'], name='exam_assignment_visible'),
+        ),
+        migrations.AddField(
+            model_name='examassignmentaudience',
+            name='assignment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audiences', to='exam.examassignment', verbose_name='考试'),
+        ),
+        migrations.AddField(
+            model_name='examassignmentaudience',
+            name='roster',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignment_audiences', to='user.classroster', verbose_name='班级'),
+        ),
+        migrations.AddField(
+            model_name='examassignment',
+            name='rosters',
+            field=models.ManyToManyField(blank=True, related_name='assignments', through='exam.ExamAssignmentAudience', to='user.classroster', verbose_name='目标班级'),
+        ),
+        migrations.AddIndex(
+            model_name='examassignmentaudience',
+            index=models.Index(fields=['roster', 'assignment'], name='exam_audience_roster'),
+        ),
+        migrations.AddConstraint(
+            model_name='examassignmentaudience',
+            constraint=models.UniqueConstraint(fields=('assignment', 'roster'), name='exam_audience_assignment_roster'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:38
+
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_daily_activity(apps, schema_editor):
+    PracticeAttempt = apps.get_model("exam", "PracticeAttempt")
+    WrongBookEntry = apps.get_model("exam", "WrongBookEntry")
+    StudentDailyActivity = apps.get_model("exam", "StudentDailyActivity")
+    rows = defaultdict(dict)
+    for item in (
+        PracticeAttempt.objects.annotate(day=TruncDate("started_at"))
+        .values("user_id", "day").annotate(started=Count("id")).order_by()
+    ):
+        rows[(item["user_id"], item["day"])]["attempts_started"] = item["started"]
+    for item in (
+        PracticeAttempt.objects.filter(submitted_at__isnull=False).exclude(status="ongoing")
+        .annotate(day=TruncDate("submitted_at"))
+        .values("user_id", "day")
+        .annotate(completed=Count("id"), obtained=Sum("obtained_score"), total=Sum("total_score"))
+        .order_by()
+    ):
+        entry = rows[(item["user_id"], item["day"])]
+        entry["attempts_completed"] = item["completed"]
+        entry["obtained_score"] = item["obtained"] or 0
+        entry["total_score"] = item["total"] or 0
+    for item in (
+        WrongBookEntry.objects.annotate(day=TruncDate("created_at"))
+        .values("user_id", "day").annotate(added=Count("id")).order_by()
+    ):
+        rows[(item["user_id"], item["day"])]["wrong_book_added"] = item["added"]
+    StudentDailyActivity.objects.bulk_create(
+        [StudentDailyActivity(user_id=user_id, day=day, **values) for (user_id, day), values in rows.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0022_assignment_audience'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentDailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('attempts_started', models.PositiveIntegerField(default=0, verbose_name='开始作答数')),
+                ('attempts_completed', models.PositiveIntegerField(default=0, verbose_name='完成作答数')),
+                ('obtained_score', models.PositiveIntegerField(default=0, verbose_name='得分合计')),
+                ('total_score', models.PositiveIntegerField(default=0, verbose_name='满分合计')),
+                ('wrong_book_added', models.PositiveIntegerField(default=0, verbose_name='新增错题数')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activities', to=settings.AUTH_USER_MODEL, verbose_name='学生')),
+            ],
+            options={
+                'verbose_name': '学生每日作答汇总',
+                'verbose_name_plural': '学生每日作答汇总',
+                'db_table': 'exam_student_daily_activity',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='studentdailyactivity',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='exam_daily_activity_user_day'),
+        ),
+        migrations.RunPython(fill_daily_activity, migrations.RunPython.noop),
+    ]
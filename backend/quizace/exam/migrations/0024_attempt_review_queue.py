@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def fill_review_teacher(apps, schema_editor):
+    PracticeAttempt = apps.get_model("exam", "PracticeAttempt")
+    ExamAssignment = apps.get_model("exam", "ExamAssignment")
+    PracticeAttempt.objects.filter(assignment__isnull=False).update(
+        review_teacher=Subquery(ExamAssignment.objects.filter(id=OuterRef("assignment_id")).values("created_by_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0023_studentdailyactivity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practiceattempt',
+            name='review_teacher',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='review_queue', to=settings.AUTH_USER_MODEL, verbose_name='负责批阅教师'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceattempt',
+            index=models.Index(fields=['is_review_required', 'review_teacher', 'submitted_at', 'id'], name='exam_attempt_review_queue'),
+        ),
+        migrations.RunPython(fill_review_teacher, migrations.RunPython.noop),
+    ]
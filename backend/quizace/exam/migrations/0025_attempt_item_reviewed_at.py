@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0024_attempt_review_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practiceattemptitem',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='批阅时间'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_search_tokens(apps, schema_editor):
+    from exam.question_search import question_token_weights
+
+    Question = apps.get_model("exam", "Question")
+    QuestionSearchToken = apps.get_model("exam", "QuestionSearchToken")
+    rows = []
+    for question_id, owner_id, content, options, analysis in Question.objects.values_list(
+        "id", "created_by_id", "content", "options", "analysis"
+    ).iterator():
+        rows.extend(
+            QuestionSearchToken(question_id=question_id, owner_id=owner_id, token=token, weight=weight)
+            for token, weight in question_token_weights(content, options, analysis).items()
+        )
+        if len(rows) >= 5000:
+            QuestionSearchToken.objects.bulk_create(rows, batch_size=1000)
+            rows = []
+    QuestionSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0025_attempt_item_reviewed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, verbose_name='词元')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='权重')),
+                ('owner', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='录入教师')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='exam.question', verbose_name='题目')),
+            ],
+            options={
+                'verbose_name': '题目检索词元',
+                'verbose_name_plural': '题目检索词元',
+                'db_table': 'exam_question_search_token',
+                'indexes': [models.Index(fields=['owner', 'token', 'question'], name='exam_search_owner_token')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questionsearchtoken',
+            constraint=models.UniqueConstraint(fields=('question', 'token'), name='exam_search_question_token'),
+        ),
+        migrations.RunPython(fill_search_tokens, migrations.RunPython.noop),
+    ]
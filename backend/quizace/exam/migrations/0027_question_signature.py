@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_signatures(apps, schema_editor):
+    from exam.question_dedup import band_buckets, compute_signature
+
+    Question = apps.get_model("exam", "Question")
+    QuestionSignature = apps.get_model("exam", "QuestionSignature")
+    QuestionSignatureBand = apps.get_model("exam", "QuestionSignatureBand")
+    signatures, bands = [], []
+    for question_id, subject_id, content, options in Question.objects.values_list(
+        "id", "subject_id", "content", "options"
+    ).iterator():
+        signature = compute_signature(content, options)
+        if signature is None:
+            continue
+        signatures.append(QuestionSignature(question_id=question_id, subject_id=subject_id, minhash=signature.astype("<u4").tobytes()))
+        bands.extend(
+            QuestionSignatureBand(question_id=question_id, subject_id=subject_id, bucket=bucket)
+            for bucket in band_buckets(signature)
+        )
+        if len(signatures) >= 1000:
+            QuestionSignature.objects.bulk_create(signatures)
+            QuestionSignatureBand.objects.bulk_create(bands, batch_size=2000)
+            signatures, bands = [], []
+    QuestionSignature.objects.bulk_create(signatures)
+    QuestionSignatureBand.objects.bulk_create(bands, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0026_question_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSignature',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='exam.question', verbose_name='题目')),
+                ('minhash', models.BinaryField(verbose_name='MinHash 签名')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('subject', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exam.subject', verbose_name='科目')),
+            ],
+            options={
+                'verbose_name': '题目签名',
+                'verbose_name_plural': '题目签名',
+                'db_table': 'exam_question_signature',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionSignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(verbose_name='桶号')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='exam.question', verbose_name='题目')),
+                ('subject', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exam.subject', verbose_name='科目')),
+            ],
+            options={
+                'verbose_name': '题目签名分桶',
+                'verbose_name_plural': '题目签名分桶',
+                'db_table': 'exam_question_signature_band',
+                'indexes': [models.Index(fields=['subject', 'bucket'], name='exam_signature_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_signatures, migrations.RunPython.noop),
+    ]
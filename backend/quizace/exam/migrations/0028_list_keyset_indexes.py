@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0027_question_signature'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='practiceattempt',
+            index=models.Index(fields=['user', 'started_at', 'id'], name='exam_attempt_user_started'),
+        ),
+        migrations.AddIndex(
+            model_name='practiceattempt',
+            index=models.Index(fields=['assignment', 'started_at', 'id'], name='exam_attempt_assign_started'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['created_by', 'updated_at', 'id'], name='exam_question_owner_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='questiondraft',
+            index=models.Index(fields=['teacher', 'updated_at', 'id'], name='exam_draft_teacher_updated'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0028_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questiondraft',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='识别尝试次数'),
+        ),
+        migrations.AddField(
+            model_name='questiondraft',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='认领时间'),
+        ),
+        migrations.AddField(
+            model_name='questiondraft',
+            name='locked_by',
+            field=models.CharField(blank=True, max_length=64, verbose_name='认领的工作线程'),
+        ),
+        migrations.AddField(
+            model_name='questiondraft',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='下次识别时间'),
+        ),
+        migrations.AddField(
+            model_name='questiondraft',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='识别进度(%)'),
+        ),
+        migrations.AddIndex(
+            model_name='questiondraft',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='exam_draft_queue'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+import django.db.models.deletion
+
+
+def fill_review_queue(apps, schema_editor):
+    ExamAssignment = apps.get_model("exam", "ExamAssignment")
+    PracticeAttempt = apps.get_model("exam", "PracticeAttempt")
+    PendingReviewGroup = apps.get_model("exam", "PendingReviewGroup")
+    ReviewQueueStats = apps.get_model("exam", "ReviewQueueStats")
+
+    def queue_key(assignment_id):
+        return f"assignment:{assignment_id}" if assignment_id else "practice"
+
+    rows = (
+        PracticeAttempt.objects.filter(
+            is_review_required=True,
+            status__in=["completed", "expired"],
+            submitted_at__isnull=False,
+        )
+        .values("assignment_id", "review_teacher_id", "user_id")
+        .annotate(
+            pending_count=Count("id"),
+            oldest_submitted_at=Min("submitted_at"),
+            latest_submitted_at=Max("submitted_at"),
+        )
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator():
+        batch.append(PendingReviewGroup(queue=queue_key(row["assignment_id"]), **row))
+        if len(batch) >= 500:
+            PendingReviewGroup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PendingReviewGroup.objects.bulk_create(batch)
+
+    totals = {
+        row.pop("queue"): row
+        for row in PendingReviewGroup.objects.values("queue")
+        .annotate(
+            pending_total=Sum("pending_count"),
+            student_total=Count("id"),
+            oldest_submitted_at=Min("oldest_submitted_at"),
+            latest_submitted_at=Max("latest_submitted_at"),
+        )
+        .order_by()
+    }
+    batch = [ReviewQueueStats(queue="practice", **totals.get("practice", {}))]
+    for assignment_id, teacher_id in ExamAssignment.objects.values_list("id", "created_by_id").iterator():
+        key = queue_key(assignment_id)
+        batch.append(ReviewQueueStats(
+            queue=key, assignment_id=assignment_id, review_teacher_id=teacher_id, **totals.get(key, {})
+        ))
+        if len(batch) >= 500:
+            ReviewQueueStats.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        ReviewQueueStats.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('exam', '0029_question_draft_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewQueueStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(max_length=32, unique=True, verbose_name='队列')),
+                ('pending_total', models.PositiveIntegerField(default=0, verbose_name='待批阅作答数')),
+                ('student_total', models.PositiveIntegerField(default=0, verbose_name='待批阅学生数')),
+                ('oldest_submitted_at', models.DateTimeField(blank=True, null=True, verbose_name='最早提交时间')),
+                ('latest_submitted_at', models.DateTimeField(blank=True, null=True, verbose_name='最近提交时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('assignment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='review_queue_stats', to='exam.examassignment', verbose_name='关联考试')),
+                ('review_teacher', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='review_queue_stats', to=settings.AUTH_USER_MODEL, verbose_name='负责批阅教师')),
+            ],
+            options={
+                'verbose_name': '待批阅队列统计',
+                'verbose_name_plural': '待批阅队列统计',
+                'db_table': 'exam_review_queue_stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='PendingReviewGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(max_length=32, verbose_name='队列')),
+                ('pending_count', models.PositiveIntegerField(default=0, verbose_name='待批阅作答数')),
+                ('oldest_submitted_at', models.DateTimeField(verbose_name='最早提交时间')),
+                ('latest_submitted_at', models.DateTimeField(verbose_name='最近提交时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('assignment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pending_review_groups', to='exam.examassignment', verbose_name='关联考试')),
+                ('review_teacher', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pending_review_groups', to=settings.AUTH_USER_MODEL, verbose_name='负责批阅教师')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_review_groups_as_student', to=settings.AUTH_USER_MODEL, verbose_name='学生')),
+            ],
+            options={
+                'verbose_name': '学生待批阅汇总',
+                'verbose_name_plural': '学生待批阅汇总',
+                'db_table': 'exam_pending_review_group',
+                'indexes': [models.Index(fields=['queue', 'latest_submitted_at', 'id'], name='exam_review_group_queue'), models.Index(fields=['review_teacher', 'latest_submitted_at', 'id'], name='exam_review_group_teacher'), models.Index(fields=['queue', 'oldest_submitted_at'], name='exam_review_group_oldest')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pendingreviewgroup',
+            constraint=models.UniqueConstraint(fields=('queue', 'user'), name='exam_review_group_queue_user'),
+        ),
+        migrations.RunPython(fill_review_queue, migrations.RunPython.noop),
+    ]
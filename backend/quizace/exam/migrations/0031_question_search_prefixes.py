@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:10
+
+from django.db import migrations
+
+
+def refill_search_tokens(apps, schema_editor):
+    from exam.question_search import question_token_weights
+
+    Question = apps.get_model("exam", "Question")
+    QuestionSearchToken = apps.get_model("exam", "QuestionSearchToken")
+    # 词元加入了字母数字词的前缀，按新规则重建全部题目的词元
+    QuestionSearchToken.objects.all().delete()
+    rows = []
+    for question_id, owner_id, content, options, analysis in Question.objects.values_list(
+        "id", "created_by_id", "content", "options", "analysis"
+    ).iterator():
+        rows.extend(
+            QuestionSearchToken(question_id=question_id, owner_id=owner_id, token=token, weight=weight)
+            for token, weight in question_token_weights(content, options, analysis).items()
+        )
+        if len(rows) >= 5000:
+            QuestionSearchToken.objects.bulk_create(rows, batch_size=1000)
+            rows = []
+    QuestionSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam', '0030_review_queue_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(refill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -62,6 +62,7 @@ class Question(models.Model):
     score = models.PositiveIntegerField(default=5, verbose_name="分值")
     media_url = models.CharField(max_length=255, blank=True, null=True, verbose_name="题干图片地址")
     metadata = models.JSONField(default=dict, blank=True, verbose_name="扩展信息")
+    answer_version = models.PositiveIntegerField(default=1, verbose_name="参考答案版本")
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -77,6 +78,9 @@ class Question(models.Model):
         db_table = "exam_question"
         verbose_name = "题目"
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=["created_by", "updated_at", "id"], name="exam_question_owner_updated"),
+        ]
 
     def __str__(self) -> str:
         return f"[{self.get_question_type_display()}]{self.content[:20]}"
@@ -91,6 +95,71 @@ class Question(models.Model):
             return None
 
 
+class QuestionSearchToken(models.Model):
+    """题库全文检索的倒排表：一道题的一个 n-gram 词元及其权重（见 question_search）。"""
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="search_tokens", verbose_name="题目")
+    # 冗余题目的录入教师，检索按 (教师, 词元) 索引查找
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="+",
+        verbose_name="录入教师",
+    )
+    token = models.CharField(max_length=32, verbose_name="词元")
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name="权重")
+
+    class Meta:
+        db_table = "exam_question_search_token"
+        verbose_name = "题目检索词元"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["question", "token"], name="exam_search_question_token"),
+        ]
+        indexes = [
+            models.Index(fields=["owner", "token", "question"], name="exam_search_owner_token"),
+        ]
+
+
+class QuestionSignature(models.Model):
+    """题目的 MinHash 签名，用于近似重复检测（见 question_dedup）。"""
+
+    question = models.OneToOneField(
+        Question,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="signature",
+        verbose_name="题目",
+    )
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, db_index=False, related_name="+", verbose_name="科目")
+    minhash = models.BinaryField(verbose_name="MinHash 签名")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = "exam_question_signature"
+        verbose_name = "题目签名"
+        verbose_name_plural = verbose_name
+
+
+class QuestionSignatureBand(models.Model):
+    """签名的 LSH 分段桶号，同一科目中桶号相同的题目互为近似重复候选。"""
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name="signature_bands", verbose_name="题目")
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, db_index=False, related_name="+", verbose_name="科目")
+    bucket = models.BigIntegerField(verbose_name="桶号")
+
+    class Meta:
+        db_table = "exam_question_signature_band"
+        verbose_name = "题目签名分桶"
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=["subject", "bucket"], name="exam_signature_bucket"),
+        ]
+
+
 class QuestionDraft(models.Model):
     """教师上传题目的草稿，支持 OCR 与手动录入。"""
 
@@ -119,6 +188,12 @@ class QuestionDraft(models.Model):
     parsed_answer = models.TextField(blank=True, verbose_name="解析答案")
     parsed_analysis = models.TextField(blank=True, verbose_name="解析说明")
     error_message = models.TextField(blank=True, verbose_name="解析错误信息")
+    # 识别队列：status 为 processing 的草稿由 process_question_drafts 的工作线程认领处理
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="识别进度(%)")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="识别尝试次数")
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name="下次识别时间")
+    locked_by = models.CharField(max_length=64, blank=True, verbose_name="认领的工作线程")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="认领时间")
     question = models.OneToOneField(
         Question,
         on_delete=models.SET_NULL,
@@ -135,6 +210,10 @@ class QuestionDraft(models.Model):
         verbose_name = "题目草稿"
         verbose_name_plural = verbose_name
         ordering = ("-updated_at", "-id")
+        indexes = [
+            models.Index(fields=["teacher", "updated_at", "id"], name="exam_draft_teacher_updated"),
+            models.Index(fields=["status", "next_attempt_at"], name="exam_draft_queue"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.teacher} - {self.get_status_display()}"
@@ -155,6 +234,11 @@ class ExamAssignment(models.Model):
         ("closed", "已结束"),
     )
 
+    AUDIENCE_CHOICES = (
+        ("all", "全部学生"),
+        ("rosters", "指定班级"),
+    )
+
     title = models.CharField(max_length=128, verbose_name="考试标题")
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name="assignments", verbose_name="科目")
     question_type = models.CharField(max_length=16, choices=ATTEMPT_TYPE_CHOICES, verbose_name="题型")
@@ -166,6 +250,14 @@ class ExamAssignment(models.Model):
     description = models.TextField(blank=True, verbose_name="说明")
     question_ids = models.JSONField(default=list, blank=True, verbose_name="固定题目列表")
     per_question_score = models.PositiveIntegerField(default=10, verbose_name="单题分值")
+    audience = models.CharField(max_length=16, choices=AUDIENCE_CHOICES, default="all", verbose_name="考试对象")
+    rosters = models.ManyToManyField(
+        "user.ClassRoster",
+        through="ExamAssignmentAudience",
+        related_name="assignments",
+        blank=True,
+        verbose_name="目标班级",
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -180,6 +272,10 @@ class ExamAssignment(models.Model):
         verbose_name = "考试任务"
         verbose_name_plural = verbose_name
         ordering = ("-start_time", "-id")
+        indexes = [
+            models.Index(fields=["status", "end_time"], name="exam_assignment_status_end"),
+            models.Index(fields=["audience", "status", "end_time"], name="exam_assignment_visible"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -195,6 +291,97 @@ class ExamAssignment(models.Model):
         return "ongoing"
 
 
+class ExamAssignmentAudience(models.Model):
+    """定向考试与目标班级的关联"""
+
+    assignment = models.ForeignKey(ExamAssignment, on_delete=models.CASCADE, related_name="audiences", verbose_name="考试")
+    roster = models.ForeignKey(
+        "user.ClassRoster",
+        on_delete=models.CASCADE,
+        related_name="assignment_audiences",
+        verbose_name="班级",
+    )
+
+    class Meta:
+        db_table = "exam_assignment_audience"
+        verbose_name = "考试对象"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["assignment", "roster"], name="exam_audience_assignment_roster"),
+        ]
+        indexes = [
+            # 班级 -> 考试：学生可见考试通过 (学生 -> 班级 -> 考试) 两级索引查找
+            models.Index(fields=["roster", "assignment"], name="exam_audience_roster"),
+        ]
+
+
+class ExamAssignmentStats(models.Model):
+    """考试作答统计，在开考、交卷、过期收卷与批阅时增量维护。"""
+
+    assignment = models.OneToOneField(
+        ExamAssignment,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="关联考试",
+    )
+    total_attempts = models.PositiveIntegerField(default=0, verbose_name="作答人次")
+    submitted_attempts = models.PositiveIntegerField(default=0, verbose_name="已交卷人次")
+    pending_reviews = models.PositiveIntegerField(default=0, verbose_name="待批阅人次")
+    score_sum = models.PositiveBigIntegerField(default=0, verbose_name="已交卷得分合计")
+    score_max = models.PositiveIntegerField(default=0, verbose_name="最高分")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = "exam_assignment_stats"
+        verbose_name = "考试统计"
+        verbose_name_plural = verbose_name
+
+    def __str__(self) -> str:
+        return f"{self.assignment_id} stats"
+
+    @property
+    def average_score(self) -> float:
+        if not self.submitted_attempts:
+            return 0.0
+        return round(self.score_sum / self.submitted_attempts, 2)
+
+
+class PreparedPaper(models.Model):
+    """考试开始前预先生成的试卷，开考时学生直接领取。"""
+
+    assignment = models.ForeignKey(
+        ExamAssignment,
+        on_delete=models.CASCADE,
+        related_name="prepared_papers",
+        verbose_name="关联考试",
+    )
+    question_scores = models.JSONField(default=list, verbose_name="题目及分值")
+    questions = models.JSONField(default=list, verbose_name="题目数据")
+    is_shared = models.BooleanField(default=False, verbose_name="共享试卷")
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="claimed_papers",
+        verbose_name="领取学生",
+    )
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name="领取时间")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="生成时间")
+
+    class Meta:
+        db_table = "exam_prepared_paper"
+        verbose_name = "预生成试卷"
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=["assignment", "is_shared", "claimed_at"], name="exam_prepared_paper_claim"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.assignment} - Paper {self.id}"
+
+
 class PracticeAttempt(models.Model):
     """学生一次模拟练习/考试记录"""
 
@@ -225,6 +412,7 @@ class PracticeAttempt(models.Model):
     status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="ongoing", verbose_name="状态")
     is_review_required = models.BooleanField(default=False, verbose_name="待教师批阅")
     started_at = models.DateTimeField(auto_now_add=True, verbose_name="开始时间")
+    deadline_at = models.DateTimeField(null=True, blank=True, verbose_name="截止时间")
     submitted_at = models.DateTimeField(null=True, blank=True, verbose_name="提交时间")
     mode = models.CharField(max_length=16, choices=MODE_CHOICES, default="practice", verbose_name="来源类型")
     assignment = models.ForeignKey(
@@ -245,11 +433,31 @@ class PracticeAttempt(models.Model):
         verbose_name="批阅教师",
     )
     reviewed_at = models.DateTimeField(null=True, blank=True, verbose_name="批阅时间")
+    # 考试作答由发布教师批阅，冗余存储以便按教师索引待批阅队列；自由练习为空，任一教师可批阅
+    review_teacher = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="review_queue",
+        verbose_name="负责批阅教师",
+    )
+    answer_revision = models.PositiveIntegerField(default=0, verbose_name="作答版本号")
 
     class Meta:
         db_table = "exam_practice_attempt"
         verbose_name = "练习记录"
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=["status", "deadline_at"], name="exam_attempt_deadline"),
+            models.Index(fields=["user", "assignment", "started_at"], name="exam_attempt_user_assignment"),
+            models.Index(fields=["user", "started_at", "id"], name="exam_attempt_user_started"),
+            models.Index(fields=["assignment", "started_at", "id"], name="exam_attempt_assign_started"),
+            models.Index(
+                fields=["is_review_required", "review_teacher", "submitted_at", "id"],
+                name="exam_attempt_review_queue",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} {self.subject} {self.question_type} {self.mode}"
@@ -270,17 +478,73 @@ class PracticeAttemptItem(models.Model):
     is_correct = models.BooleanField(null=True, blank=True, verbose_name="是否正确")
     awarded_score = models.PositiveIntegerField(default=0, verbose_name="得分")
     expected_score = models.PositiveIntegerField(default=0, verbose_name="题目分值")
+    graded_version = models.PositiveIntegerField(default=0, verbose_name="批改所用答案版本")
+    reviewed_at = models.DateTimeField(null=True, blank=True, verbose_name="批阅时间")
 
     class Meta:
         db_table = "exam_practice_attempt_item"
         verbose_name = "练习题目记录"
         verbose_name_plural = verbose_name
         ordering = ("order", "id")
+        indexes = [
+            models.Index(fields=["question", "graded_version"], name="exam_item_question_version"),
+        ]
 
     def __str__(self) -> str:
         return f"Attempt {self.attempt_id} - Q{self.order}"
 
 
+class AttemptPaper(models.Model):
+    """练习创建时固化的试卷快照：题干、选项、分值与参考答案，按题目顺序存放。"""
+
+    attempt = models.OneToOneField(
+        PracticeAttempt,
+        primary_key=True,
+        related_name="paper",
+        on_delete=models.CASCADE,
+        verbose_name="练习记录",
+    )
+    questions = models.JSONField(default=list, verbose_name="题目快照")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+
+    class Meta:
+        db_table = "exam_attempt_paper"
+        verbose_name = "试卷快照"
+        verbose_name_plural = verbose_name
+
+    def __str__(self) -> str:
+        return f"Attempt {self.attempt_id} paper"
+
+
+class AttemptAnswerLog(models.Model):
+    """自动保存的作答日志，只追加写入，定期合并到 PracticeAttemptItem。"""
+
+    id = models.BigAutoField(primary_key=True)
+    attempt = models.ForeignKey(
+        PracticeAttempt,
+        related_name="answer_logs",
+        on_delete=models.CASCADE,
+        verbose_name="练习记录",
+    )
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+        verbose_name="题目",
+    )
+    user_answer = models.TextField(blank=True, verbose_name="学生答案")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="写入时间")
+
+    class Meta:
+        db_table = "exam_attempt_answer_log"
+        verbose_name = "作答日志"
+        verbose_name_plural = verbose_name
+
+    def __str__(self) -> str:
+        return f"Attempt {self.attempt_id} - Question {self.question_id}"
+
+
 class WrongBookEntry(models.Model):
     """学生错题本中的题目记录。"""
 
@@ -322,3 +586,114 @@ class WrongBookEntry(models.Model):
 
     def __str__(self) -> str:
         return f"{self.user} - {self.question}"
+
+
+class StudentDailyActivity(models.Model):
+    """学生每日作答汇总，在开考、交卷、收卷与批阅时增量维护，供学生看板按日期区间读取。"""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_activities",
+        verbose_name="学生",
+    )
+    day = models.DateField(verbose_name="日期")
+    attempts_started = models.PositiveIntegerField(default=0, verbose_name="开始作答数")
+    attempts_completed = models.PositiveIntegerField(default=0, verbose_name="完成作答数")
+    obtained_score = models.PositiveIntegerField(default=0, verbose_name="得分合计")
+    total_score = models.PositiveIntegerField(default=0, verbose_name="满分合计")
+    wrong_book_added = models.PositiveIntegerField(default=0, verbose_name="新增错题数")
+
+    class Meta:
+        db_table = "exam_student_daily_activity"
+        verbose_name = "学生每日作答汇总"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["user", "day"], name="exam_daily_activity_user_day"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} {self.day}"
+
+
+class ReviewQueueStats(models.Model):
+    """待批阅队列汇总（每场考试一条，自由练习共用一条），交卷、收卷与批阅时增量维护。"""
+
+    queue = models.CharField(max_length=32, unique=True, verbose_name="队列")
+    review_teacher = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="review_queue_stats",
+        verbose_name="负责批阅教师",
+    )
+    assignment = models.OneToOneField(
+        ExamAssignment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="review_queue_stats",
+        verbose_name="关联考试",
+    )
+    pending_total = models.PositiveIntegerField(default=0, verbose_name="待批阅作答数")
+    student_total = models.PositiveIntegerField(default=0, verbose_name="待批阅学生数")
+    oldest_submitted_at = models.DateTimeField(null=True, blank=True, verbose_name="最早提交时间")
+    latest_submitted_at = models.DateTimeField(null=True, blank=True, verbose_name="最近提交时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = "exam_review_queue_stats"
+        verbose_name = "待批阅队列统计"
+        verbose_name_plural = verbose_name
+
+    def __str__(self) -> str:
+        return f"{self.queue} stats"
+
+
+class PendingReviewGroup(models.Model):
+    """某学生在某个待批阅队列中的汇总，教师阅卷列表按最近提交倒序翻页读取。"""
+
+    queue = models.CharField(max_length=32, verbose_name="队列")
+    review_teacher = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="pending_review_groups",
+        verbose_name="负责批阅教师",
+    )
+    assignment = models.ForeignKey(
+        ExamAssignment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="pending_review_groups",
+        verbose_name="关联考试",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pending_review_groups_as_student",
+        verbose_name="学生",
+    )
+    pending_count = models.PositiveIntegerField(default=0, verbose_name="待批阅作答数")
+    oldest_submitted_at = models.DateTimeField(verbose_name="最早提交时间")
+    latest_submitted_at = models.DateTimeField(verbose_name="最近提交时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = "exam_pending_review_group"
+        verbose_name = "学生待批阅汇总"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["queue", "user"], name="exam_review_group_queue_user"),
+        ]
+        indexes = [
+            models.Index(fields=["queue", "latest_submitted_at", "id"], name="exam_review_group_queue"),
+            models.Index(fields=["review_teacher", "latest_submitted_at", "id"], name="exam_review_group_teacher"),
+            models.Index(fields=["queue", "oldest_submitted_at"], name="exam_review_group_oldest"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.queue} {self.user_id}"
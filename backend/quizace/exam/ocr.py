@@ -0,0 +1,122 @@
+"""题目草稿的识别引擎。
+
+识别器是可调用对象 recognizer(draft, report_progress) -> dict，返回 title、content、options、
+answer、analysis（均可缺省），通过 EXAM_OCR_RECOGNIZER 配置导入路径。report_progress(0-100)
+用于更新草稿的识别进度。识别结果无效（如文件不是题目）时抛出 RecognitionError，不再重试；
+其他异常（网络、引擎临时故障等）由队列按退避策略重试。
+"""
+import io
+import re
+from typing import Callable, Dict, List
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
+
+from .models import QuestionDraft
+
+DEFAULT_RECOGNIZER = "exam.ocr.text_recognizer"
+MEDIA_FETCH_TIMEOUT = 10
+
+_OPTION_RE = re.compile(r"^([A-H])\s*[\.．、:：)）]\s*(.+)$")
+_ANSWER_RE = re.compile(r"^(?:参考答案|答案)\s*[:：]\s*(.*)$")
+_ANALYSIS_RE = re.compile(r"^(?:解析|分析)\s*[:：]\s*(.*)$")
+_TEXT_SUFFIXES = (".txt", ".md")
+
+
+class RecognitionError(Exception):
+    """文件内容无法识别为题目，重试也不会成功。"""
+
+
+def get_recognizer() -> Callable:
+    return import_string(getattr(settings, "EXAM_OCR_RECOGNIZER", DEFAULT_RECOGNIZER))
+
+
+def load_draft_media(draft: QuestionDraft) -> bytes:
+    """读取草稿的题干文件：上传文件、本站媒体地址或外部地址。"""
+    if draft.media:
+        with draft.media.open("rb") as fileobj:
+            return fileobj.read()
+    media_url = draft.media_url or ""
+    if media_url.startswith(settings.MEDIA_URL):
+        with default_storage.open(media_url[len(settings.MEDIA_URL):], "rb") as fileobj:
+            return fileobj.read()
+    if media_url.startswith(("http://", "https://")):
+        with urlopen(media_url, timeout=MEDIA_FETCH_TIMEOUT) as response:
+            return response.read()
+    raise RecognitionError("草稿没有可识别的题干文件")
+
+
+def _media_name(draft: QuestionDraft) -> str:
+    return (draft.media.name if draft.media else draft.media_url or "").lower()
+
+
+def parse_question_text(text: str) -> Dict[str, object]:
+    """按行切分识别出的文字：“A. …”为选项，“答案：”“解析：”开头的行及其后续行为答案与解析，其余为题干。"""
+    content: List[str] = []
+    options: List[dict] = []
+    answer: List[str] = []
+    analysis: List[str] = []
+    section = content
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        matched = _ANSWER_RE.match(line)
+        if matched:
+            section = answer
+            line = matched.group(1)
+        else:
+            matched = _ANALYSIS_RE.match(line)
+            if matched:
+                section = analysis
+                line = matched.group(1)
+            elif section is content:
+                option = _OPTION_RE.match(line)
+                if option:
+                    options.append({"label": option.group(1), "text": option.group(2).strip()})
+                    continue
+        if line:
+            section.append(line)
+    if not content:
+        raise RecognitionError("未识别到题干")
+    return {
+        "title": content[0][:255],
+        "content": "\n".join(content),
+        "options": options,
+        "answer": "\n".join(answer),
+        "analysis": "\n".join(analysis),
+    }
+
+
+def text_recognizer(draft: QuestionDraft, report_progress: Callable[[int], None]) -> Dict[str, object]:
+    """本地识别器：题干文件为 UTF-8 文本时直接按行解析，用于开发环境与纯文本题目。"""
+    if not _media_name(draft).endswith(_TEXT_SUFFIXES):
+        raise RecognitionError("本地识别器只支持 txt/md 文本文件，图片请配置 OCR 引擎")
+    data = load_draft_media(draft)
+    report_progress(50)
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise RecognitionError("文本文件须为 UTF-8 编码")
+    return parse_question_text(text)
+
+
+def tesseract_recognizer(draft: QuestionDraft, report_progress: Callable[[int], None]) -> Dict[str, object]:
+    """Tesseract 识别器，需要安装 pytesseract、Pillow 与 tesseract 中文语言包；文本文件直接解析。"""
+    if _media_name(draft).endswith(_TEXT_SUFFIXES):
+        return text_recognizer(draft, report_progress)
+    try:
+        import pytesseract
+        from PIL import Image, UnidentifiedImageError
+    except ImportError as exc:
+        raise RecognitionError("服务器未安装 OCR 引擎（pytesseract、Pillow）") from exc
+    data = load_draft_media(draft)
+    report_progress(20)
+    try:
+        image = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        raise RecognitionError("题干文件不是可识别的图片")
+    text = pytesseract.image_to_string(image, lang=getattr(settings, "EXAM_OCR_LANG", "chi_sim+eng"))
+    report_progress(80)
+    return parse_question_text(text)
@@ -0,0 +1,293 @@
+"""试卷生成：抽题、批量写入作答记录以及考试开考前的预生成试卷池。"""
+from datetime import timedelta
+from random import sample
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .activity import record_activity_started
+from .assignment_stats import record_attempt_started
+from .constants import resolve_score
+from .models import (
+    AttemptPaper,
+    ExamAssignment,
+    PracticeAttempt,
+    PracticeAttemptItem,
+    PreparedPaper,
+    Question,
+    Subject,
+)
+from .question_cache import render_questions
+from .question_pool import get_ready_question_ids, sample_ready_questions
+from .teacher_dashboard import invalidate_teacher_dashboards
+
+SHARED_PAPER_CACHE_PREFIX = "exam:shared_paper"
+PAPER_CLAIM_RETRIES = 5
+# 试卷快照中仅在允许查看解析时返回的字段
+SOLUTION_FIELDS = ("answer", "analysis")
+
+
+def get_expire_time(attempt: PracticeAttempt):
+    return attempt.started_at + timedelta(seconds=attempt.duration_seconds)
+
+
+def get_remaining_seconds(attempt: PracticeAttempt):
+    expire_time = get_expire_time(attempt)
+    remaining = int((expire_time - timezone.now()).total_seconds())
+    return expire_time, max(0, remaining)
+
+
+def build_questions(subject: Subject, question_type: str, size: int) -> Tuple[List[Question], int]:
+    selected = sample_ready_questions(subject.id, question_type, size)
+    if not selected:
+        raise ValueError("该科目暂无该类型题目")
+    return selected, len(selected)
+
+
+def score_questions(questions: List[Question], score_overrides: Optional[Dict[int, int]] = None):
+    score_overrides = score_overrides or {}
+    question_scores = []
+    for question in questions:
+        score_value = score_overrides.get(question.id)
+        if score_value is None:
+            score_value = resolve_score(question.question_type, question.score)
+        question_scores.append((question, score_value))
+    return question_scores
+
+
+def build_snapshot_entries(question_scores: List[Tuple[Question, int]]) -> List[dict]:
+    """按题目顺序构建试卷快照：渲染缓存中的题目数据（含答案与解析）加上本卷分值与题号。"""
+    payloads = render_questions([question for question, _ in question_scores], with_solution=True)
+    return [
+        dict(payloads[question.id], score=score_value, order=index)
+        for index, (question, score_value) in enumerate(question_scores, start=1)
+    ]
+
+
+def strip_solutions(entries: List[dict]) -> List[dict]:
+    return [
+        {key: value for key, value in entry.items() if key not in SOLUTION_FIELDS}
+        for entry in entries
+    ]
+
+
+def load_paper_snapshot(attempt_id: int) -> Optional[List[dict]]:
+    """读取练习的试卷快照，旧数据没有快照时返回 None。"""
+    return AttemptPaper.objects.filter(attempt_id=attempt_id).values_list("questions", flat=True).first()
+
+
+def write_attempt_paper(
+    *,
+    user,
+    subject: Subject,
+    question_type: str,
+    duration_seconds: int,
+    mode: str,
+    assignment: Optional[ExamAssignment],
+    question_scores: List[Tuple[int, int]],
+    paper_snapshot: Optional[List[dict]] = None,
+) -> PracticeAttempt:
+    """在一个事务内写入练习记录、全部题目及试卷快照，题目使用 bulk_create 批量插入。
+
+    开考人次与每日作答汇总在事务提交后更新，偶有遗漏时由 rebuild_assignment_stats、
+    rebuild_student_activity 命令修复。
+    """
+    with transaction.atomic():
+        attempt = PracticeAttempt.objects.create(
+            user=user,
+            subject=subject,
+            question_type=question_type,
+            duration_seconds=duration_seconds,
+            deadline_at=timezone.now() + timedelta(seconds=duration_seconds),
+            total_questions=len(question_scores),
+            total_score=sum(score_value for _, score_value in question_scores),
+            mode=mode,
+            assignment=assignment,
+            review_teacher_id=assignment.created_by_id if assignment is not None else None,
+        )
+        PracticeAttemptItem.objects.bulk_create([
+            PracticeAttemptItem(
+                attempt=attempt,
+                question_id=question_id,
+                order=index,
+                expected_score=score_value,
+            )
+            for index, (question_id, score_value) in enumerate(question_scores, start=1)
+        ])
+        if paper_snapshot:
+            AttemptPaper.objects.create(attempt=attempt, questions=paper_snapshot)
+        # 考试统计行被同一场考试的所有开考请求共享，提交后再在独立的短事务中计数，
+        # 不让并发开考在整个写卷过程中排队等待这一行的锁
+        transaction.on_commit(lambda: _record_started(attempt))
+    if assignment is not None:
+        invalidate_teacher_dashboards([assignment.created_by_id])
+    return attempt
+
+
+def _record_started(attempt: PracticeAttempt):
+    with transaction.atomic():
+        record_attempt_started(attempt)
+        record_activity_started(attempt)
+
+
+def create_attempt_with_questions(
+    *,
+    user,
+    subject: Subject,
+    question_type: str,
+    size: int,
+    duration_seconds: int,
+    mode: str = "practice",
+    assignment: Optional[ExamAssignment] = None,
+    preset_questions: Optional[List[Question]] = None,
+    score_overrides: Optional[Dict[int, int]] = None,
+):
+    if preset_questions is None:
+        if question_type == "mixed":
+            raise ValueError("综合试卷必须提供固定题目")
+        questions, _ = build_questions(subject, question_type, size)
+    else:
+        questions = list(preset_questions)
+
+    question_scores = score_questions(questions, score_overrides)
+    paper_snapshot = build_snapshot_entries(question_scores)
+
+    attempt = write_attempt_paper(
+        user=user,
+        subject=subject,
+        question_type=question_type,
+        duration_seconds=duration_seconds,
+        mode=mode,
+        assignment=assignment,
+        question_scores=[(question.id, score_value) for question, score_value in question_scores],
+        paper_snapshot=paper_snapshot,
+    )
+
+    expires_at, remaining = get_remaining_seconds(attempt)
+    return attempt, strip_solutions(paper_snapshot), expires_at, remaining
+
+
+def resolve_assignment_questions(assignment: ExamAssignment):
+    """校验考试的固定题目列表，返回按顺序排列的题目与分值覆盖表。"""
+    if not assignment.question_ids:
+        return None, None
+    question_map = Question.objects.in_bulk(assignment.question_ids)
+    missing_ids = [qid for qid in assignment.question_ids if qid not in question_map]
+    if missing_ids:
+        raise ValueError("试卷内存在已被删除的题目，暂无法生成")
+    ordered_questions = [question_map[qid] for qid in assignment.question_ids]
+    invalid_subject = next((q for q in ordered_questions if q.subject_id != assignment.subject_id), None)
+    if invalid_subject:
+        raise ValueError("试卷中的题目与科目不匹配")
+    score_overrides = {question.id: assignment.per_question_score for question in ordered_questions}
+    return ordered_questions, score_overrides
+
+
+def _shared_paper_key(assignment_id: int) -> str:
+    return f"{SHARED_PAPER_CACHE_PREFIX}:{assignment_id}"
+
+
+def _build_prepared_paper(assignment: ExamAssignment, question_scores, *, is_shared: bool) -> PreparedPaper:
+    return PreparedPaper(
+        assignment=assignment,
+        question_scores=[[question.id, score_value] for question, score_value in question_scores],
+        questions=build_snapshot_entries(question_scores),
+        is_shared=is_shared,
+    )
+
+
+def prepare_assignment_papers(assignment: ExamAssignment, paper_count: int) -> int:
+    """为考试预生成试卷。
+
+    固定题目的考试只生成一份共享试卷；随机抽题的考试补足 paper_count 份未领取的试卷。
+    返回本次新生成的试卷数量。
+    """
+    if assignment.question_ids:
+        if PreparedPaper.objects.filter(assignment=assignment, is_shared=True).exists():
+            return 0
+        questions, score_overrides = resolve_assignment_questions(assignment)
+        paper = _build_prepared_paper(assignment, score_questions(questions, score_overrides), is_shared=True)
+        paper.save()
+        return 1
+
+    if assignment.question_type not in {"objective", "subjective"}:
+        raise ValueError("综合试卷必须提供固定题目")
+    available = PreparedPaper.objects.filter(
+        assignment=assignment,
+        is_shared=False,
+        claimed_at__isnull=True,
+    ).count()
+    missing = paper_count - available
+    if missing <= 0:
+        return 0
+
+    pool_ids = get_ready_question_ids(assignment.subject_id, assignment.question_type)
+    if not pool_ids:
+        raise ValueError("该科目暂无该类型题目")
+    size = min(assignment.question_count, len(pool_ids))
+    samples = [sample(pool_ids, size) for _ in range(missing)]
+    needed_ids = set().union(*samples)
+    question_map = Question.objects.filter(status="ready").in_bulk(needed_ids)
+
+    papers = []
+    for chosen_ids in samples:
+        questions = [question_map[qid] for qid in chosen_ids if qid in question_map]
+        if questions:
+            papers.append(_build_prepared_paper(assignment, score_questions(questions), is_shared=False))
+    PreparedPaper.objects.bulk_create(papers, batch_size=100)
+    return len(papers)
+
+
+def claim_prepared_paper(assignment: ExamAssignment, user) -> Optional[Tuple[list, list]]:
+    """领取一份预生成试卷，返回 (题目及分值, 试卷快照)；没有可用试卷时返回 None。
+
+    随机抽题的试卷在调用方的事务中加锁领取，并发开考的学生会跳过彼此锁定的行；
+    多次领取都被抢先时返回 None，由调用方实时组卷。
+    """
+    if assignment.question_ids:
+        key = _shared_paper_key(assignment.id)
+        shared = cache.get(key)
+        if shared is None:
+            paper = (
+                PreparedPaper.objects.filter(assignment=assignment, is_shared=True)
+                .order_by("-id")
+                .first()
+            )
+            if paper is None:
+                return None
+            shared = (paper.question_scores, paper.questions)
+            timeout = int((assignment.end_time - timezone.now()).total_seconds())
+            cache.set(key, shared, max(60, timeout))
+        return shared
+
+    paper_qs = PreparedPaper.objects.filter(
+        assignment=assignment,
+        is_shared=False,
+        claimed_at__isnull=True,
+    ).order_by("id")
+    for _ in range(PAPER_CLAIM_RETRIES):
+        paper = _next_unclaimed_paper(paper_qs)
+        if paper is None:
+            return None
+        # 条件更新：只有仍未被领取时才算领取成功，被其他学生抢先领取时换下一份
+        claimed = PreparedPaper.objects.filter(id=paper.id, claimed_at__isnull=True).update(
+            claimed_by=user,
+            claimed_at=timezone.now(),
+        )
+        if claimed:
+            return paper.question_scores, paper.questions
+    return None
+
+
+def _next_unclaimed_paper(paper_qs) -> Optional[PreparedPaper]:
+    """锁定第一份未领取的试卷；不支持 SKIP LOCKED 时等待其他学生的领取事务结束。"""
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    return paper_qs.select_for_update(skip_locked=skip_locked).first()
+
+
+def discard_prepared_papers(assignment: ExamAssignment):
+    """预生成试卷失效（例如题目已被删除）时清空，之后开考回退到实时组卷。"""
+    PreparedPaper.objects.filter(assignment=assignment, claimed_at__isnull=True).delete()
+    cache.delete(_shared_paper_key(assignment.id))
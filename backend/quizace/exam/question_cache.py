@@ -0,0 +1,142 @@
+"""题目渲染缓存：按 (题目 id, 更新时间, 是否含答案) 缓存构建好的题目数据。
+
+题目数据包含解析后的选项，避免每次响应都对 options 做 json.loads；
+科目名称单独按科目缓存，与题目键在同一次 get_many 中读取。
+题目保存后更新时间变化，旧键自然失效，信号负责清理旧键；
+绕过 save() 的批量更新需要调用 invalidate_question_payloads。
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from django.core.cache import cache
+
+from .constants import resolve_score
+from .models import Question, Subject
+
+QUESTION_PAYLOAD_CACHE_PREFIX = "exam:question_payload"
+SUBJECT_NAME_CACHE_PREFIX = "exam:subject_name"
+QUESTION_PAYLOAD_TIMEOUT = 24 * 3600
+QUESTION_RENDER_FIELDS = (
+    "id",
+    "subject_id",
+    "question_type",
+    "content",
+    "options",
+    "answer",
+    "analysis",
+    "score",
+    "media_url",
+    "updated_at",
+)
+
+# (题目 id, 更新时间, 科目 id)
+QuestionStamp = Tuple[int, object, int]
+
+
+def _variant(with_solution: bool) -> str:
+    return "full" if with_solution else "public"
+
+
+def _payload_key(question_id: int, updated_at, with_solution: bool) -> str:
+    stamp = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    return f"{QUESTION_PAYLOAD_CACHE_PREFIX}:{question_id}:{stamp}:{_variant(with_solution)}"
+
+
+def _subject_key(subject_id: int) -> str:
+    return f"{SUBJECT_NAME_CACHE_PREFIX}:{subject_id}"
+
+
+def build_question_payload(question: Question, with_solution: bool) -> dict:
+    """不含科目名称的题目数据，score 为题目默认分值。"""
+    payload = {
+        "id": question.id,
+        "question_type": question.question_type,
+        "content": question.content,
+        "options": question.options_dict,
+        "score": resolve_score(question.question_type, question.score),
+        "media_url": question.media_url or "",
+    }
+    if with_solution:
+        payload["answer"] = question.answer
+        payload["analysis"] = question.analysis
+    return payload
+
+
+def _render(stamps: Sequence[QuestionStamp], with_solution: bool, loaded: Dict[int, Question]) -> Dict[int, dict]:
+    if not stamps:
+        return {}
+    question_keys = {question_id: _payload_key(question_id, updated_at, with_solution) for question_id, updated_at, _ in stamps}
+    subject_keys = {subject_id: _subject_key(subject_id) for _, _, subject_id in stamps}
+    cached = cache.get_many(list(question_keys.values()) + list(subject_keys.values()))
+
+    missing_questions = [question_id for question_id, key in question_keys.items() if key not in cached]
+    to_load = [question_id for question_id in missing_questions if question_id not in loaded]
+    if to_load:
+        loaded = dict(loaded)
+        loaded.update(Question.objects.only(*QUESTION_RENDER_FIELDS).in_bulk(to_load))
+    fresh = {}
+    for question_id in missing_questions:
+        question = loaded.get(question_id)
+        if question is not None:
+            fresh[question_keys[question_id]] = build_question_payload(question, with_solution)
+
+    missing_subjects = [subject_id for subject_id, key in subject_keys.items() if key not in cached]
+    if missing_subjects:
+        for subject_id, name in Subject.objects.filter(id__in=missing_subjects).values_list("id", "name"):
+            fresh[subject_keys[subject_id]] = name
+
+    if fresh:
+        cache.set_many(fresh, QUESTION_PAYLOAD_TIMEOUT)
+        cached.update(fresh)
+
+    payloads = {}
+    for question_id, _, subject_id in stamps:
+        payload = cached.get(question_keys[question_id])
+        if payload is None:
+            continue
+        payload = dict(payload)
+        payload["subject_name"] = cached.get(subject_keys[subject_id], "")
+        payloads[question_id] = payload
+    return payloads
+
+
+def render_questions(questions: Sequence[Question], *, with_solution: bool = False) -> Dict[int, dict]:
+    """已加载的题目：未命中缓存时直接用内存中的实例构建。返回 {question_id: 题目数据}。"""
+    stamps = [(question.id, question.updated_at, question.subject_id) for question in questions]
+    return _render(stamps, with_solution, {question.id: question for question in questions})
+
+
+def render_question_ids(question_ids: Iterable[int], *, with_solution: bool = False) -> Dict[int, dict]:
+    """仅知道题目 id：先读取更新时间，未命中缓存的题目再读取完整字段。"""
+    stamps = list(
+        Question.objects.filter(id__in=set(question_ids)).values_list("id", "updated_at", "subject_id")
+    )
+    return _render(stamps, with_solution, {})
+
+
+def get_subject_names(subject_ids: Iterable[int]) -> Dict[int, str]:
+    """批量读取科目名称，未命中缓存的科目用一次查询补齐。"""
+    keys = {subject_id: _subject_key(subject_id) for subject_id in set(subject_ids) if subject_id is not None}
+    if not keys:
+        return {}
+    cached = cache.get_many(list(keys.values()))
+    names = {subject_id: cached[key] for subject_id, key in keys.items() if key in cached}
+    missing = [subject_id for subject_id in keys if subject_id not in names]
+    if missing:
+        fresh = dict(Subject.objects.filter(id__in=missing).values_list("id", "name"))
+        cache.set_many({keys[subject_id]: name for subject_id, name in fresh.items()}, QUESTION_PAYLOAD_TIMEOUT)
+        names.update(fresh)
+    return names
+
+
+def invalidate_question_payloads(stamps: Iterable[Tuple[int, object]]):
+    """删除 (题目 id, 更新时间) 对应的两种缓存数据。"""
+    keys: List[str] = []
+    for question_id, updated_at in stamps:
+        keys.append(_payload_key(question_id, updated_at, True))
+        keys.append(_payload_key(question_id, updated_at, False))
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_subject_name(subject_id: int):
+    cache.delete(_subject_key(subject_id))
@@ -0,0 +1,237 @@
+"""近似重复题目检测：题干与选项按字符 3-gram 切分后计算 MinHash 签名，再用 LSH 分桶。
+
+签名 64 个分量分成 16 段、每段 4 个，每段哈希成一个桶号写入 QuestionSignatureBand，
+(subject, bucket) 有索引。查重时只取同科目中至少有一段桶号相同的候选题，
+再按签名估算 Jaccard 相似度过滤，耗时与候选数量相关而不是与题库规模相关。
+默认阈值 0.7 的题目成为候选的概率约 98.8%（0.8 时约 99.9%），0.3 时约 12%。
+"""
+import hashlib
+import json
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Question, QuestionSignature, QuestionSignatureBand
+
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3
+DUPLICATE_FIELDS = ("content", "options", "subject", "subject_id")
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_HASH_A = _rng.randint(1, _PRIME, NUM_PERM).astype(np.int64)
+_HASH_B = _rng.randint(0, _PRIME, NUM_PERM).astype(np.int64)
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def duplicate_threshold() -> float:
+    return getattr(settings, "EXAM_DUPLICATE_THRESHOLD", 0.7)
+
+
+def _options_values(options) -> List[str]:
+    if not options:
+        return []
+    if isinstance(options, str):
+        try:
+            options = json.loads(options)
+        except ValueError:
+            return [options]
+    if isinstance(options, dict):
+        return [str(value) for value in options.values()]
+    if isinstance(options, list):
+        return [str(value) for value in options]
+    return [str(options)]
+
+
+def shingles(content: Optional[str], options=None) -> set:
+    """去掉空白与标点后按字符 3-gram 切分，选项文本一并参与比较。"""
+    text = unicodedata.normalize("NFKC", " ".join([content or "", *_options_values(options)])).lower()
+    compact = "".join(_WORD_RE.findall(text))
+    if len(compact) <= SHINGLE_SIZE:
+        return {compact} if compact else set()
+    return {compact[index:index + SHINGLE_SIZE] for index in range(len(compact) - SHINGLE_SIZE + 1)}
+
+
+def compute_signature(content: Optional[str], options=None) -> Optional[np.ndarray]:
+    items = shingles(content, options)
+    if not items:
+        return None
+    values = np.fromiter((zlib.crc32(item.encode()) % _PRIME for item in items), dtype=np.int64, count=len(items))
+    # values 与系数都小于 2^31，乘积不会溢出 int64
+    return ((np.outer(values, _HASH_A) + _HASH_B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].astype("<u4").tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def _load_signature(raw) -> np.ndarray:
+    return np.frombuffer(bytes(raw), dtype="<u4")
+
+
+def similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """相同分量的比例，即 Jaccard 相似度的估计值。"""
+    return float(np.count_nonzero(left == right)) / NUM_PERM
+
+
+def index_question_signatures(question_ids: Iterable[int]):
+    """重新计算指定题目的签名与分桶，题目已删除时只清理。"""
+    question_ids = list(set(question_ids))
+    if not question_ids:
+        return
+    signatures = []
+    bands = []
+    for question_id, subject_id, content, options in Question.objects.filter(id__in=question_ids).values_list(
+        "id", "subject_id", "content", "options"
+    ):
+        signature = compute_signature(content, options)
+        if signature is None:
+            continue
+        signatures.append(QuestionSignature(question_id=question_id, subject_id=subject_id, minhash=signature.astype("<u4").tobytes()))
+        bands.extend(
+            QuestionSignatureBand(question_id=question_id, subject_id=subject_id, bucket=bucket)
+            for bucket in band_buckets(signature)
+        )
+    with transaction.atomic():
+        QuestionSignatureBand.objects.filter(question_id__in=question_ids).delete()
+        QuestionSignature.objects.filter(question_id__in=question_ids).delete()
+        QuestionSignature.objects.bulk_create(signatures, batch_size=1000)
+        QuestionSignatureBand.objects.bulk_create(bands, batch_size=2000)
+
+
+def rebuild_question_signatures(*, subject_id: Optional[int] = None, batch_size: int = 1000) -> int:
+    """按 id 分批重建签名，返回处理的题目数量。"""
+    id_qs = Question.objects.order_by("id").values_list("id", flat=True)
+    if subject_id is not None:
+        id_qs = id_qs.filter(subject_id=subject_id)
+    processed = 0
+    last_id = 0
+    while True:
+        batch = list(id_qs.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        index_question_signatures(batch)
+        processed += len(batch)
+        last_id = batch[-1]
+    return processed
+
+
+def find_near_duplicates(
+    subject_id: int,
+    content: Optional[str],
+    options=None,
+    *,
+    exclude_ids: Iterable[int] = (),
+    threshold: Optional[float] = None,
+    limit: int = 10,
+) -> List[Tuple[int, float]]:
+    """同科目中与给定题干/选项近似的题目，返回按相似度降序的 [(题目 id, 相似度)]。"""
+    signature = compute_signature(content, options)
+    if signature is None:
+        return []
+    threshold = duplicate_threshold() if threshold is None else threshold
+    candidate_ids = QuestionSignatureBand.objects.filter(
+        subject_id=subject_id, bucket__in=band_buckets(signature),
+    ).values("question_id")
+    matches = []
+    for question_id, raw in (
+        QuestionSignature.objects.filter(question_id__in=candidate_ids)
+        .exclude(question_id__in=list(exclude_ids))
+        .values_list("question_id", "minhash")
+    ):
+        score = similarity(signature, _load_signature(raw))
+        if score >= threshold:
+            matches.append((question_id, score))
+    matches.sort(key=lambda pair: (-pair[1], pair[0]))
+    return matches[:limit]
+
+
+def duplicate_payload(matches: List[Tuple[int, float]], viewer_id: int) -> List[dict]:
+    """接口返回的相似题目列表。
+
+    候选题只按科目筛选，其他教师的题目可能尚未公开，因此只返回编号和相似度，
+    题干与状态仅对 viewer_id 本人创建的题目返回。
+    """
+    questions = Question.objects.in_bulk([question_id for question_id, _ in matches])
+    payload = []
+    for question_id, score in matches:
+        question = questions.get(question_id)
+        if question is None:
+            continue
+        item = {"id": question_id, "similarity": round(score, 3), "own": question.created_by_id == viewer_id}
+        if item["own"]:
+            item["content"] = question.content[:100]
+            item["status"] = question.status
+        payload.append(item)
+    return payload
+
+
+def cluster_duplicates(
+    *,
+    subject_id: Optional[int] = None,
+    threshold: Optional[float] = None,
+    bucket_batch: int = 2000,
+) -> List[List[int]]:
+    """对已有题库聚类近似重复题，返回每组题目 id（组内升序，组间按首个 id 排序）。
+
+    只展开成员数大于 1 的桶，桶内两两比较签名，相似度达到阈值的题目用并查集合并。
+    """
+    threshold = duplicate_threshold() if threshold is None else threshold
+    band_qs = QuestionSignatureBand.objects.all()
+    if subject_id is not None:
+        band_qs = band_qs.filter(subject_id=subject_id)
+    shared = list(
+        band_qs.values("subject_id", "bucket").annotate(members=Count("id")).filter(members__gt=1)
+        .order_by().values_list("subject_id", "bucket")
+    )
+
+    parent: Dict[int, int] = {}
+
+    def find(node: int) -> int:
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    signatures: Dict[int, np.ndarray] = {}
+    checked = set()
+    for start in range(0, len(shared), bucket_batch):
+        groups: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        chunk = shared[start:start + bucket_batch]
+        for subject, bucket, question_id in QuestionSignatureBand.objects.filter(
+            subject_id__in={subject for subject, _ in chunk}, bucket__in={bucket for _, bucket in chunk},
+        ).values_list("subject_id", "bucket", "question_id"):
+            groups[(subject, bucket)].append(question_id)
+        missing = {question_id for members in groups.values() for question_id in members} - signatures.keys()
+        signatures.update(
+            (question_id, _load_signature(raw))
+            for question_id, raw in QuestionSignature.objects.filter(question_id__in=missing).values_list("question_id", "minhash")
+        )
+        for members in groups.values():
+            members = sorted(set(members))
+            for index, left in enumerate(members):
+                for right in members[index + 1:]:
+                    if (left, right) in checked:
+                        continue
+                    checked.add((left, right))
+                    if similarity(signatures[left], signatures[right]) >= threshold:
+                        parent[find(right)] = find(left)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for node in list(parent):
+        clusters[find(node)].append(node)
+    return sorted((sorted(members) for members in clusters.values() if len(members) > 1), key=lambda members: members[0])
@@ -0,0 +1,337 @@
+"""题目批量导入：CSV、XLSX 或 JSON 文件逐行流式读取，按块校验并 bulk_create 写入。
+
+文件不整体载入内存（XLSX 以只读模式逐行读取，JSON 数组逐个元素解码），每块在自身的短事务中写入，
+不会因大文件长时间持有事务。逐行校验沿用 QuestionCreateSerializer 的规则，科目在整个导入过程中
+每个取值只解析一次。bulk_create 不触发 post_save，写入后由本模块补做检索词元、查重签名、
+题目池与教师看板的更新。错误按行号报告，最多保留 IMPORT_MAX_ERRORS 条。
+"""
+import csv
+import io
+import json
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+
+from .models import Question, Subject
+from .question_dedup import index_question_signatures
+from .question_pool import invalidate_question_pools
+from .question_search import index_questions
+from .serializers import QuestionImportSerializer
+from .teacher_dashboard import invalidate_teacher_dashboards
+
+IMPORT_FORMATS = ("csv", "xlsx", "json")
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_ERRORS = 200
+JSON_READ_SIZE = 64 * 1024
+# 单个 JSON 元素（或 JSON Lines 的一行）的字符数上限，超过时不再继续读入，按文件损坏处理
+JSON_MAX_ELEMENT_SIZE = 1024 * 1024
+
+# 表头别名，统一为 QuestionCreateSerializer 的字段名
+COLUMN_ALIASES = {
+    "科目": "subject",
+    "课程": "subject",
+    "course": "subject",
+    "subject_id": "subject",
+    "subject_name": "subject",
+    "题型": "question_type",
+    "type": "question_type",
+    "题干": "content",
+    "选项": "options",
+    "答案": "answer",
+    "参考答案": "answer",
+    "解析": "analysis",
+    "分值": "score",
+    "状态": "status",
+    "图片地址": "media_url",
+}
+TYPE_ALIASES = {"客观题": "objective", "主观题": "subjective"}
+IMPORT_FIELDS = {"subject", "question_type", "content", "options", "answer", "analysis", "score", "status", "media_url", "metadata"}
+_OPTION_COLUMN_RE = re.compile(r"^(?:option_?|选项)?([a-h])$", re.IGNORECASE)
+
+
+class ImportFileError(ValueError):
+    """文件无法读取（格式不支持、结构损坏等），不是单行错误。"""
+
+
+def detect_format(filename: str, explicit: Optional[str] = None) -> str:
+    fmt = (explicit or filename.rsplit(".", 1)[-1]).lower()
+    if fmt in {"jsonl", "ndjson"}:
+        fmt = "json"
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFileError("仅支持 CSV、XLSX 或 JSON 文件")
+    return fmt
+
+
+def _iter_csv(fileobj) -> Iterator[Tuple[int, dict]]:
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV 文件须为 UTF-8 编码")
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(fileobj) -> Iterator[Tuple[int, dict]]:
+    # pandas.read_excel 会把整张表读入内存，这里直接用 openpyxl 的只读模式逐行读取
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError("无法读取 XLSX 文件") from exc
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        columns = [str(cell).strip() if cell is not None else "" for cell in header]
+        for row_number, values in enumerate(rows, start=2):
+            if values is None or all(value is None for value in values):
+                continue
+            yield row_number, dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def _iter_json(fileobj) -> Iterator[Tuple[int, object]]:
+    """JSON 数组逐个元素解码；否则按 JSON Lines（每行一个对象）读取。"""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig")
+    try:
+        buffer = text.read(JSON_READ_SIZE)
+        stripped = buffer.lstrip()
+        while not stripped and buffer:
+            buffer = text.read(JSON_READ_SIZE)
+            stripped = buffer.lstrip()
+        if not stripped.startswith("["):
+            line_number = 0
+            pending = buffer
+            while True:
+                lines = pending.split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    line_number += 1
+                    if line.strip():
+                        yield line_number, _loads_line(line)
+                chunk = text.read(JSON_READ_SIZE)
+                if not chunk:
+                    break
+                pending += chunk
+                if len(pending) > JSON_MAX_ELEMENT_SIZE and "\n" not in pending:
+                    raise ImportFileError(f"第 {line_number + 1} 行过长，单行不能超过 {JSON_MAX_ELEMENT_SIZE // 1024} KB")
+            if pending.strip():
+                yield line_number + 1, _loads_line(pending)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = stripped[1:]
+        index = 0
+        eof = False
+        while True:
+            buffer = buffer.lstrip()
+            if buffer.startswith(","):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFileError(f"JSON 格式不正确（第 {index + 1} 个元素附近）")
+                if len(buffer) > JSON_MAX_ELEMENT_SIZE:
+                    raise ImportFileError(
+                        f"JSON 格式不正确或第 {index + 1} 个元素过长（单个元素不能超过 {JSON_MAX_ELEMENT_SIZE // 1024} KB）"
+                    )
+                chunk = text.read(JSON_READ_SIZE)
+                eof = not chunk
+                buffer += chunk
+                continue
+            index += 1
+            buffer = buffer[end:]
+            yield index, value
+    except UnicodeDecodeError:
+        raise ImportFileError("JSON 文件须为 UTF-8 编码")
+    finally:
+        text.detach()
+
+
+def _loads_line(line: str):
+    try:
+        return json.loads(line)
+    except ValueError:
+        # 单行损坏只影响该行，原样交由逐行校验报告
+        return line
+
+
+def iter_rows(fileobj, fmt: str) -> Iterator[Tuple[int, object]]:
+    """逐行产出 (行号, 原始数据)；CSV/XLSX 行号含表头行，JSON 为元素序号或行号。"""
+    readers = {"csv": _iter_csv, "xlsx": _iter_xlsx, "json": _iter_json}
+    return readers[fmt](fileobj)
+
+
+def _cell(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def normalize_row(raw) -> Tuple[Optional[object], dict]:
+    """表头别名、选项列与题型别名统一后返回 (科目取值, 题目数据)。"""
+    if not isinstance(raw, dict):
+        raise ValueError("行数据须为 JSON 对象")
+    data: Dict[str, object] = {}
+    option_columns: Dict[str, object] = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        column = str(key).strip()
+        value = _cell(value)
+        if value is None:
+            continue
+        matched = _OPTION_COLUMN_RE.match(column)
+        if matched:
+            option_columns[matched.group(1).upper()] = str(value)
+            continue
+        field = COLUMN_ALIASES.get(column, COLUMN_ALIASES.get(column.lower(), column.lower()))
+        if field in IMPORT_FIELDS:
+            data[field] = value
+    if isinstance(data.get("options"), str):
+        try:
+            data["options"] = json.loads(data["options"])
+        except ValueError:
+            raise ValueError("选项须为 JSON 对象或数组，或按 A、B、C… 分列填写")
+    if option_columns and "options" not in data:
+        data["options"] = dict(sorted(option_columns.items()))
+    if data.get("question_type") in TYPE_ALIASES:
+        data["question_type"] = TYPE_ALIASES[data["question_type"]]
+    for field in ("content", "answer", "analysis"):
+        if field in data and not isinstance(data[field], str):
+            data[field] = str(data[field])
+    return data.pop("subject", None), data
+
+
+class SubjectResolver:
+    """科目 id 或名称到科目 id 的缓存，每个取值只查询一次；名称不存在时按名称创建（与单题录入一致）。"""
+
+    def __init__(self, *, create: bool = True):
+        self.create = create
+        self._cache: Dict[str, object] = {}
+
+    def resolve(self, value) -> Optional[int]:
+        key = str(value).strip()
+        if key not in self._cache:
+            self._cache[key] = self._lookup(key)
+        result = self._cache[key]
+        if isinstance(result, str):
+            raise ValueError(result)
+        return result
+
+    def _lookup(self, key: str):
+        if not key:
+            return "缺少科目信息"
+        if key.isdigit():
+            subject_id = Subject.objects.filter(id=int(key)).values_list("id", flat=True).first()
+            return subject_id if subject_id is not None else "科目不存在"
+        if self.create:
+            return Subject.objects.get_or_create(name=key)[0].id
+        # 试导入不创建科目，新名称视为可用
+        return Subject.objects.filter(name=key).values_list("id", flat=True).first()
+
+
+def _error_messages(errors) -> List[str]:
+    if isinstance(errors, dict):
+        messages = []
+        for field, value in errors.items():
+            prefix = "" if field == "non_field_errors" else f"{field}: "
+            messages.extend(f"{prefix}{message}" for message in _error_messages(value))
+        return messages
+    if isinstance(errors, list):
+        return [str(message) for item in errors for message in _error_messages(item)]
+    return [str(errors)]
+
+
+def _insert_chunk(teacher, questions: List[Question]) -> List[int]:
+    """写入一块题目并补做 post_save 中的索引与缓存更新，返回新题目 id。"""
+    previous_max = Question.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    with transaction.atomic():
+        created = Question.objects.bulk_create(questions)
+    question_ids = [question.pk for question in created if question.pk is not None]
+    if len(question_ids) != len(created):
+        # MySQL 的 bulk_create 不回填自增主键：在写入前最大 id 之后的本人题目中，只取科目、题型与题干
+        # 都与本块一致的题目，避免把同一教师同时录入或导入的其他题目算进来
+        remaining = Counter((question.subject_id, question.question_type, question.content) for question in created)
+        question_ids = []
+        rows = Question.objects.filter(created_by=teacher, id__gt=previous_max).order_by("id").values_list(
+            "id", "subject_id", "question_type", "content",
+        )
+        for question_id, *key in rows:
+            key = tuple(key)
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                question_ids.append(question_id)
+    index_questions(question_ids)
+    index_question_signatures(question_ids)
+    invalidate_question_pools({(question.subject_id, question.question_type) for question in questions})
+    return question_ids
+
+
+def import_questions(
+    fileobj,
+    *,
+    teacher,
+    fmt: str,
+    default_subject=None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> Dict[str, object]:
+    """导入题目文件，返回 {total, created, failed, errors, aborted}。
+
+    default_subject 为行内未填写科目时使用的科目 id 或名称；dry_run 只校验不写入。
+    文件中途损坏时已写入的块保留，aborted 给出原因。
+    """
+    resolver = SubjectResolver(create=not dry_run)
+    report: Dict[str, object] = {"total": 0, "created": 0, "failed": 0, "errors": [], "aborted": None}
+    errors: List[dict] = report["errors"]
+    pending: List[Question] = []
+
+    def fail(row_number, messages):
+        report["failed"] += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"row": row_number, "errors": messages})
+
+    def flush():
+        if pending and not dry_run:
+            _insert_chunk(teacher, pending)
+        report["created"] += len(pending)
+        pending.clear()
+
+    try:
+        for row_number, raw in iter_rows(fileobj, fmt):
+            report["total"] += 1
+            try:
+                subject_value, data = normalize_row(raw)
+                subject_value = subject_value if subject_value is not None else default_subject
+                subject_id = resolver.resolve(subject_value if subject_value is not None else "")
+            except ValueError as exc:
+                fail(row_number, [str(exc)])
+                continue
+            serializer = QuestionImportSerializer(data=data)
+            if not serializer.is_valid():
+                fail(row_number, _error_messages(serializer.errors))
+                continue
+            pending.append(serializer.build_question(subject_id=subject_id, created_by=teacher))
+            if len(pending) >= chunk_size:
+                flush()
+    except ImportFileError as exc:
+        report["aborted"] = str(exc)
+    flush()
+    if report["created"] and not dry_run:
+        invalidate_teacher_dashboards([teacher.id])
+    return report
@@ -0,0 +1,66 @@
+"""可用题目池：按 (科目, 题型) 缓存 ready 状态题目的 id 列表。
+
+组卷时只需从 id 池中随机抽取 k 个 id，再按 id 读取被选中的题目，
+避免每次抽题都把整个科目题库加载到内存。题目保存/删除时通过信号
+使对应的题目池失效，下次抽题时仅用一条 id 查询重建。
+"""
+from random import sample
+from typing import Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+
+from .models import Question
+
+QUESTION_POOL_CACHE_PREFIX = "exam:question_pool"
+# 多进程部署下各进程的本地缓存互不可见，设置过期时间保证池最终一致
+QUESTION_POOL_TIMEOUT = 300
+
+
+def _pool_key(subject_id: int, question_type: str) -> str:
+    return f"{QUESTION_POOL_CACHE_PREFIX}:{subject_id}:{question_type}"
+
+
+def get_ready_question_ids(subject_id: int, question_type: str) -> List[int]:
+    key = _pool_key(subject_id, question_type)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            Question.objects.filter(
+                subject_id=subject_id,
+                question_type=question_type,
+                status="ready",
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        cache.set(key, ids, QUESTION_POOL_TIMEOUT)
+    return ids
+
+
+def invalidate_question_pool(subject_id: Optional[int], question_type: Optional[str]):
+    if subject_id is None or not question_type:
+        return
+    cache.delete(_pool_key(subject_id, question_type))
+
+
+def invalidate_question_pools(keys: Iterable[Tuple[int, str]]):
+    cache.delete_many([_pool_key(subject_id, question_type) for subject_id, question_type in set(keys)])
+
+
+def sample_ready_questions(subject_id: int, question_type: str, size: int, *, select_related=()) -> List[Question]:
+    """从题目池中随机抽取至多 size 道可用题目，只读取被选中的行。"""
+    for _ in range(2):
+        ids = get_ready_question_ids(subject_id, question_type)
+        if not ids:
+            return []
+        selected_ids = ids if len(ids) <= size else sample(ids, size)
+        question_qs = Question.objects.filter(id__in=selected_ids, status="ready")
+        if select_related:
+            question_qs = question_qs.select_related(*select_related)
+        question_map = {question.id: question for question in question_qs}
+        selected = [question_map[qid] for qid in selected_ids if qid in question_map]
+        if len(selected) == len(selected_ids):
+            return selected
+        # 池中存在已被删除或下架的题目（其他进程修改），重建后再抽一次
+        invalidate_question_pool(subject_id, question_type)
+    return selected
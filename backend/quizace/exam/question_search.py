@@ -0,0 +1,210 @@
+"""题库全文检索：题干、选项与解析按 n-gram 切分后写入倒排表 QuestionSearchToken。
+
+中文等无空格文字切成单字与相邻两字，字母数字按整词并附加前缀（统一小写、全角转半角），
+因此 "pyth" 能查到 "Python"，但词中间的片段（如 "thon"）查不到。
+查询词按同样规则切分，要求全部词元命中，按词元权重之和排序；查找走
+(owner, token) 索引，不对题目表做 LIKE '%..%' 扫描。题目保存时由信号重建该题的词元，
+批量导入等绕过 save() 的路径需调用 index_questions，rebuild_question_search 命令用于全量重建。
+"""
+import json
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils.html import escape
+
+from .models import Question, QuestionSearchToken
+
+SEARCH_FIELDS = ("content", "options", "analysis")
+# 题干命中比选项、解析更相关
+FIELD_WEIGHTS = {"content": 3, "options": 1, "analysis": 1}
+TOKEN_MAX_LENGTH = 32
+# 字母数字词按前缀索引的最短长度；前缀命中的权重低于整词命中
+PREFIX_MIN_LENGTH = 2
+PREFIX_WEIGHT = 1
+TOKEN_MAX_WEIGHT = 32767
+SNIPPET_LENGTH = 80
+
+_CJK = "\u3400-\u9fff\uf900-\ufaff"
+_TERM_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def _terms(text: str) -> List[str]:
+    return _TERM_RE.findall(normalize_text(text))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """索引用切分：中文输出单字与相邻两字，字母数字输出整词。"""
+    tokens = []
+    for term in _terms(text):
+        if _CJK_RE.match(term):
+            tokens.extend(term)
+            tokens.extend(term[index:index + 2] for index in range(len(term) - 1))
+        else:
+            tokens.append(term[:TOKEN_MAX_LENGTH])
+    return tokens
+
+
+def word_prefixes(text: Optional[str]) -> List[str]:
+    """字母数字词的前缀词元（不含整词本身），中文不产生前缀。"""
+    prefixes = []
+    for term in _terms(text):
+        if not _CJK_RE.match(term):
+            term = term[:TOKEN_MAX_LENGTH]
+            prefixes.extend(term[:end] for end in range(PREFIX_MIN_LENGTH, len(term)))
+    return prefixes
+
+
+def tokenize_query(text: Optional[str]) -> List[str]:
+    """查询用切分：中文只取相邻两字（单字词取单字），词元去重并保持顺序。"""
+    tokens = []
+    for term in _terms(text):
+        if _CJK_RE.match(term) and len(term) > 1:
+            tokens.extend(term[index:index + 2] for index in range(len(term) - 1))
+        else:
+            tokens.append(term[:TOKEN_MAX_LENGTH])
+    return list(dict.fromkeys(tokens))
+
+
+def _options_text(options: Optional[str]) -> str:
+    if not options:
+        return ""
+    try:
+        parsed = json.loads(options)
+    except (TypeError, ValueError):
+        return options
+    if isinstance(parsed, dict):
+        return " ".join(str(value) for value in parsed.values())
+    if isinstance(parsed, list):
+        return " ".join(str(value) for value in parsed)
+    return str(parsed)
+
+
+def question_token_weights(content: Optional[str], options: Optional[str], analysis: Optional[str]) -> Dict[str, int]:
+    weights: Dict[str, int] = defaultdict(int)
+    for field, text in (("content", content), ("options", _options_text(options)), ("analysis", analysis)):
+        for token in tokenize(text):
+            weights[token] += FIELD_WEIGHTS[field]
+        for token in word_prefixes(text):
+            weights[token] += PREFIX_WEIGHT
+    return {token: min(weight, TOKEN_MAX_WEIGHT) for token, weight in weights.items()}
+
+
+def index_questions(question_ids: Iterable[int]):
+    """重建指定题目的词元，题目已删除时只清理。"""
+    question_ids = list(set(question_ids))
+    if not question_ids:
+        return
+    rows = []
+    for question_id, owner_id, content, options, analysis in Question.objects.filter(id__in=question_ids).values_list(
+        "id", "created_by_id", *SEARCH_FIELDS
+    ):
+        rows.extend(
+            QuestionSearchToken(question_id=question_id, owner_id=owner_id, token=token, weight=weight)
+            for token, weight in question_token_weights(content, options, analysis).items()
+        )
+    with transaction.atomic():
+        QuestionSearchToken.objects.filter(question_id__in=question_ids).delete()
+        QuestionSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+
+def rebuild_question_search(*, batch_size: int = 500) -> int:
+    """按 id 分批重建全部题目的词元，返回处理的题目数量。"""
+    processed = 0
+    last_id = 0
+    while True:
+        batch = list(Question.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not batch:
+            break
+        index_questions(batch)
+        processed += len(batch)
+        last_id = batch[-1]
+    QuestionSearchToken.objects.exclude(question_id__in=Question.objects.values("id")).delete()
+    return processed
+
+
+def search_question_ids(owner, query: str, *, filters: Optional[dict] = None, offset: int = 0, limit: int = 20) -> Tuple[List[Tuple[int, int]], int]:
+    """返回 ([(题目 id, 得分)], 命中总数)；filters 为题目字段条件，如 {"status": "ready"}。"""
+    tokens = tokenize_query(query)
+    if not tokens:
+        return [], 0
+    token_qs = QuestionSearchToken.objects.filter(owner=owner, token__in=tokens)
+    if filters:
+        token_qs = token_qs.filter(**{f"question__{field}": value for field, value in filters.items()})
+    ranked = (
+        token_qs.values("question_id")
+        .annotate(score=Sum("weight"), hits=Count("token"))
+        .filter(hits=len(tokens))
+        .order_by("-score", "-question_id")
+    )
+    total = ranked.count()
+    return [(row["question_id"], row["score"]) for row in ranked[offset:offset + limit]], total
+
+
+def highlight(text: Optional[str], query: str, *, length: int = SNIPPET_LENGTH) -> str:
+    """截取首个命中位置附近的片段，命中词用 <mark> 包裹，其余内容转义。"""
+    text = text or ""
+    normalized = normalize_text(text)
+    if len(normalized) != len(text):
+        # NFKC 改变了长度（如连字），位置无法对应，退化为原文比较
+        normalized = text.lower()
+    spans = []
+    for token in tokenize_query(query):
+        start = normalized.find(token)
+        while start != -1:
+            spans.append([start, start + len(token)])
+            start = normalized.find(token, start + 1)
+    if not spans:
+        return escape(text[:length])
+    # 相邻两字词元相互重叠，合并为连续的命中区间
+    spans.sort()
+    merged = [spans[0]]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    first = merged[0][0]
+    window_start = max(0, min(first - length // 4, len(text) - length))
+    window_end = window_start + length
+    parts = ["…" if window_start else ""]
+    cursor = window_start
+    for start, end in merged:
+        if start < cursor or end > window_end:
+            continue
+        parts.append(escape(text[cursor:start]))
+        parts.append(f"<mark>{escape(text[start:end])}</mark>")
+        cursor = end
+    parts.append(escape(text[cursor:window_end]))
+    if window_end < len(text):
+        parts.append("…")
+    return "".join(parts)
+
+
+def search_questions(owner, query: str, *, filters: Optional[dict] = None, page: int = 1, page_size: int = 20):
+    """返回 (按得分排序的题目列表, {题目 id: (得分, 高亮片段)}, 命中总数)。"""
+    ranked, total = search_question_ids(owner, query, filters=filters, offset=(page - 1) * page_size, limit=page_size)
+    question_map = Question.objects.select_related("subject").in_bulk([question_id for question_id, _ in ranked])
+    questions = [question_map[question_id] for question_id, _ in ranked if question_id in question_map]
+    tokens = tokenize_query(query)
+    matches = {}
+    for question_id, score in ranked:
+        question = question_map.get(question_id)
+        if question is None:
+            continue
+        # 依次在题干、选项、解析中寻找命中片段
+        sources = (question.content, _options_text(question.options), question.analysis or "")
+        source = next(
+            (text for text in sources if any(token in normalize_text(text) for token in tokens)),
+            question.content,
+        )
+        matches[question_id] = (score, highlight(source, query))
+    return questions, matches, total
@@ -0,0 +1,398 @@
+"""教师待批阅队列：按负责教师索引待批阅作答，汇总与按学生分组的列表读取增量维护的统计表。
+
+考试作答的 review_teacher 为发布教师，自由练习为空（任一教师可批阅）。
+每场考试是一个队列，自由练习共用一个队列：ReviewQueueStats 记录队列汇总，
+PendingReviewGroup 记录每个学生在队列中的待批阅数与提交时间范围。
+交卷、收卷时调用 record_pending_reviews，批阅完成时调用 record_reviews_completed，
+读取方不再对作答表做分组聚合；rebuild_review_queue 命令用于全量核对与修复。
+作答列表按 (提交时间, id) 倒序，经 quizace.pagination 用游标翻页，
+取任意一页只扫描索引上的一段，与队列总长度无关。
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from quizace.pagination import keyset_page
+
+from .models import ExamAssignment, PendingReviewGroup, PracticeAttempt, ReviewQueueStats
+
+PENDING_REVIEW_STATUSES = ("completed", "expired")
+PRACTICE_QUEUE = "practice"
+REVIEW_QUEUE_MAX_PAGE_SIZE = 100
+
+
+def parse_scope(assignment_id: Optional[str]) -> Optional[object]:
+    """assignment_id 参数：空为全部，"practice" 为自由练习，否则为考试 id；无法识别时抛出 ValueError。"""
+    if not assignment_id:
+        return None
+    if assignment_id == "practice":
+        return "practice"
+    return int(assignment_id)
+
+
+def pending_review_queryset(teacher, scope=None):
+    """教师可批阅的待批阅作答，scope 取值见 parse_scope。"""
+    if scope == "practice":
+        owner = Q(review_teacher__isnull=True, assignment__isnull=True)
+    elif scope is not None:
+        owner = Q(review_teacher=teacher, assignment_id=scope)
+    else:
+        owner = Q(review_teacher=teacher) | Q(review_teacher__isnull=True, assignment__isnull=True)
+    return PracticeAttempt.objects.filter(
+        owner,
+        is_review_required=True,
+        status__in=PENDING_REVIEW_STATUSES,
+        submitted_at__isnull=False,
+    )
+
+
+def queue_key(assignment_id: Optional[int]) -> str:
+    return f"assignment:{assignment_id}" if assignment_id else PRACTICE_QUEUE
+
+
+def _owner_filter(teacher, scope=None) -> Q:
+    """教师可见的队列统计 / 学生分组，scope 取值见 parse_scope。"""
+    if scope == "practice":
+        return Q(queue=PRACTICE_QUEUE)
+    if scope is not None:
+        return Q(queue=queue_key(scope), review_teacher=teacher)
+    return Q(review_teacher=teacher) | Q(queue=PRACTICE_QUEUE)
+
+
+def queue_summary(teacher, scope=None) -> Dict[str, object]:
+    """读取队列统计行汇总；全部队列时 student_total 按队列累加，同一学生在多个考试中待批阅时分别计数。"""
+    summary = ReviewQueueStats.objects.filter(_owner_filter(teacher, scope), pending_total__gt=0).aggregate(
+        pending_total=Sum("pending_total"),
+        student_total=Sum("student_total"),
+        oldest_submitted_at=Min("oldest_submitted_at"),
+        latest_submitted_at=Max("latest_submitted_at"),
+    )
+    summary["pending_total"] = summary["pending_total"] or 0
+    summary["student_total"] = summary["student_total"] or 0
+    return summary
+
+
+def _page_size(page_size: int) -> int:
+    return max(1, min(page_size, REVIEW_QUEUE_MAX_PAGE_SIZE))
+
+
+def serialize_pending_attempt(attempt: PracticeAttempt) -> Dict[str, object]:
+    return {
+        "id": attempt.id,
+        "student_id": attempt.user_id,
+        "student_name": attempt.user.username,
+        "subject_name": attempt.subject.name,
+        "assignment_id": attempt.assignment_id,
+        "assignment_title": attempt.assignment.title if attempt.assignment else None,
+        "submitted_at": attempt.submitted_at,
+        "status": attempt.status,
+        "mode": attempt.mode,
+        "question_type": attempt.question_type,
+        "total_questions": attempt.total_questions,
+    }
+
+
+def pending_attempt_page(
+    teacher,
+    *,
+    scope=None,
+    student_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 50,
+) -> Tuple[List[PracticeAttempt], dict]:
+    """按提交时间倒序取一页待批阅作答，返回 (作答列表, 翻页信息)；游标不正确时抛出 ValueError。"""
+    attempt_qs = pending_review_queryset(teacher, scope)
+    if student_id is not None:
+        attempt_qs = attempt_qs.filter(user_id=student_id)
+    return keyset_page(
+        attempt_qs.select_related("user", "subject", "assignment"),
+        ordering=("-submitted_at", "-id"),
+        cursor=cursor,
+        page_size=_page_size(page_size),
+    )
+
+
+def pending_student_page(
+    teacher,
+    *,
+    scope=None,
+    cursor: Optional[str] = None,
+    page_size: int = 50,
+) -> Tuple[List[dict], dict]:
+    """按学生分组的待批阅汇总（每个学生在每个队列一行），按最近提交倒序翻页。
+
+    只读取分组统计表，不附带作答列表；某一行的作答通过 pending_attempt_page 按学生与考试翻页获取。
+    游标不正确时抛出 ValueError。
+    """
+    groups, pagination = keyset_page(
+        PendingReviewGroup.objects.filter(_owner_filter(teacher, scope)).select_related("user", "assignment"),
+        ordering=("-latest_submitted_at", "-id"),
+        cursor=cursor,
+        page_size=_page_size(page_size),
+    )
+    data = [
+        {
+            "student_id": group.user_id,
+            "student_name": group.user.username,
+            "assignment_id": group.assignment_id,
+            "assignment_title": group.assignment.title if group.assignment else None,
+            "pending_count": group.pending_count,
+            "latest_submitted_at": group.latest_submitted_at,
+            "oldest_submitted_at": group.oldest_submitted_at,
+        }
+        for group in groups
+    ]
+    return data, pagination
+
+
+def _queue_attempts(queue: str):
+    if queue == PRACTICE_QUEUE:
+        owner = Q(review_teacher__isnull=True, assignment__isnull=True)
+    else:
+        owner = Q(assignment_id=int(queue.split(":", 1)[1]))
+    return PracticeAttempt.objects.filter(
+        owner,
+        is_review_required=True,
+        status__in=PENDING_REVIEW_STATUSES,
+        submitted_at__isnull=False,
+    )
+
+
+def _group_by_queue(attempts: Iterable[PracticeAttempt]) -> Dict[Tuple[str, int], dict]:
+    """按 (队列, 学生) 分组，按键排序，保证并发事务以相同顺序锁定分组行。"""
+    grouped: Dict[Tuple[str, int], dict] = {}
+    for attempt in attempts:
+        key = (queue_key(attempt.assignment_id), attempt.user_id)
+        entry = grouped.setdefault(key, {
+            "assignment_id": attempt.assignment_id,
+            "review_teacher_id": attempt.review_teacher_id,
+            "times": [],
+        })
+        entry["times"].append(attempt.submitted_at)
+    return dict(sorted(grouped.items()))
+
+
+def _add_to_group(queue: str, user_id: int, entry: dict) -> bool:
+    """待批阅数累加到分组行，分组行不存在时创建，返回是否新建。"""
+    times = entry["times"]
+    oldest, latest = min(times), max(times)
+    updated = PendingReviewGroup.objects.filter(queue=queue, user_id=user_id).update(
+        pending_count=F("pending_count") + len(times),
+        oldest_submitted_at=Least("oldest_submitted_at", Value(oldest)),
+        latest_submitted_at=Greatest("latest_submitted_at", Value(latest)),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return False
+    try:
+        with transaction.atomic():
+            PendingReviewGroup.objects.create(
+                queue=queue,
+                user_id=user_id,
+                assignment_id=entry["assignment_id"],
+                review_teacher_id=entry["review_teacher_id"],
+                pending_count=len(times),
+                oldest_submitted_at=oldest,
+                latest_submitted_at=latest,
+            )
+    except IntegrityError:
+        # 并发交卷已创建该分组，改为累加
+        return _add_to_group(queue, user_id, entry)
+    return True
+
+
+def _remove_from_group(queue: str, user_id: int, times: list) -> Tuple[int, int]:
+    """从分组行扣减已批阅的作答，返回 (扣减的作答数, 删除的分组数)。
+
+    调用方已写入作答的批阅状态，提交时间范围收缩时按该学生剩余的待批阅作答重算。
+    """
+    group = PendingReviewGroup.objects.select_for_update().filter(queue=queue, user_id=user_id).first()
+    if group is None:
+        return 0, 0
+    removed = min(len(times), group.pending_count)
+    if group.pending_count <= len(times):
+        group.delete()
+        return removed, 1
+    group.pending_count -= removed
+    if min(times) <= group.oldest_submitted_at or max(times) >= group.latest_submitted_at:
+        bounds = _queue_attempts(queue).filter(user_id=user_id).aggregate(
+            oldest=Min("submitted_at"), latest=Max("submitted_at"),
+        )
+        if bounds["oldest"] is not None:
+            group.oldest_submitted_at = bounds["oldest"]
+            group.latest_submitted_at = bounds["latest"]
+    group.save(update_fields=["pending_count", "oldest_submitted_at", "latest_submitted_at", "updated_at"])
+    return removed, 0
+
+
+def _apply_queue(queue: str, pending_delta: int, student_delta: int, added: list = (), removed: list = ()):
+    stats = ReviewQueueStats.objects.select_for_update().filter(queue=queue).first()
+    if stats is None:
+        # 统计行缺失（如迁移后新建的考试未经信号创建）时按分组表重建，分组已写入本次变更
+        refresh_queue_stats([queue])
+        return
+    stats.pending_total = max(0, stats.pending_total + pending_delta)
+    stats.student_total = max(0, stats.student_total + student_delta)
+    if not stats.pending_total:
+        stats.oldest_submitted_at = stats.latest_submitted_at = None
+    elif removed and (
+        stats.oldest_submitted_at is None
+        or min(removed) <= stats.oldest_submitted_at
+        or max(removed) >= stats.latest_submitted_at
+    ):
+        # 移除了边界上的作答，按分组表的索引取新的边界
+        bounds = PendingReviewGroup.objects.filter(queue=queue).aggregate(
+            oldest=Min("oldest_submitted_at"), latest=Max("latest_submitted_at"),
+        )
+        stats.oldest_submitted_at = bounds["oldest"]
+        stats.latest_submitted_at = bounds["latest"]
+    elif added:
+        stats.oldest_submitted_at = min(filter(None, [stats.oldest_submitted_at, *added]))
+        stats.latest_submitted_at = max(filter(None, [stats.latest_submitted_at, *added]))
+    stats.save(update_fields=[
+        "pending_total", "student_total", "oldest_submitted_at", "latest_submitted_at", "updated_at",
+    ])
+
+
+def record_pending_reviews(attempts: Iterable[PracticeAttempt]):
+    """交卷或收卷后调用，attempts 已写入最终状态；只处理需要教师批阅的作答。"""
+    grouped = _group_by_queue(
+        attempt for attempt in attempts
+        if attempt.is_review_required and attempt.submitted_at and attempt.status in PENDING_REVIEW_STATUSES
+    )
+    if not grouped:
+        return
+    changes: Dict[str, list] = defaultdict(lambda: [0, 0, []])
+    with transaction.atomic():
+        for (queue, user_id), entry in grouped.items():
+            created = _add_to_group(queue, user_id, entry)
+            change = changes[queue]
+            change[0] += len(entry["times"])
+            change[1] += 1 if created else 0
+            change[2].extend(entry["times"])
+        for queue, (pending, students, times) in sorted(changes.items()):
+            _apply_queue(queue, pending, students, added=times)
+
+
+def record_reviews_completed(attempts: Iterable[PracticeAttempt]):
+    """批阅完成后调用，attempts 为本次由待批阅变为已批阅的作答，批阅状态已写入。"""
+    grouped = _group_by_queue(attempt for attempt in attempts if attempt.submitted_at)
+    if not grouped:
+        return
+    changes: Dict[str, list] = defaultdict(lambda: [0, 0, []])
+    with transaction.atomic():
+        for (queue, user_id), entry in grouped.items():
+            removed, deleted = _remove_from_group(queue, user_id, entry["times"])
+            change = changes[queue]
+            change[0] -= removed
+            change[1] -= deleted
+            change[2].extend(entry["times"])
+        for queue, (pending, students, times) in sorted(changes.items()):
+            _apply_queue(queue, pending, students, removed=times)
+
+
+def _queue_owner(queue: str) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """返回队列的 (考试 id, 负责教师 id)，考试已删除时返回 None。"""
+    if queue == PRACTICE_QUEUE:
+        return None, None
+    assignment_id = int(queue.split(":", 1)[1])
+    teacher_id = ExamAssignment.objects.filter(id=assignment_id).values_list("created_by_id", flat=True).first()
+    if teacher_id is None:
+        return None
+    return assignment_id, teacher_id
+
+
+def refresh_queue_stats(queues: Iterable[str]) -> Tuple[int, int]:
+    """按作答表重算队列的学生分组与汇总，写回有差异的行，返回 (检查数量, 修正数量)。"""
+    checked = fixed = 0
+    for queue in sorted(set(queues)):
+        owner = _queue_owner(queue)
+        if owner is None:
+            continue
+        assignment_id, teacher_id = owner
+        with transaction.atomic():
+            stats = ReviewQueueStats.objects.select_for_update().filter(queue=queue).first()
+            expected = {
+                row.pop("user_id"): row
+                for row in _queue_attempts(queue)
+                .values("user_id")
+                .annotate(
+                    pending_count=Count("id"),
+                    oldest_submitted_at=Min("submitted_at"),
+                    latest_submitted_at=Max("submitted_at"),
+                )
+                .order_by()
+            }
+            current = {
+                group.user_id: group
+                for group in PendingReviewGroup.objects.select_for_update().filter(queue=queue)
+            }
+            stale = [group.id for user_id, group in current.items() if user_id not in expected]
+            if stale:
+                PendingReviewGroup.objects.filter(id__in=stale).delete()
+            fixed += len(stale)
+            for user_id, values in sorted(expected.items()):
+                group = current.get(user_id)
+                if group is None:
+                    PendingReviewGroup.objects.create(
+                        queue=queue, user_id=user_id, assignment_id=assignment_id, review_teacher_id=teacher_id, **values
+                    )
+                elif {field: getattr(group, field) for field in values} != values or group.review_teacher_id != teacher_id:
+                    for field, value in values.items():
+                        setattr(group, field, value)
+                    group.review_teacher_id = teacher_id
+                    group.save()
+                else:
+                    continue
+                fixed += 1
+
+            totals = {
+                "pending_total": sum(row["pending_count"] for row in expected.values()),
+                "student_total": len(expected),
+                "oldest_submitted_at": min((row["oldest_submitted_at"] for row in expected.values()), default=None),
+                "latest_submitted_at": max((row["latest_submitted_at"] for row in expected.values()), default=None),
+            }
+            if stats is None:
+                stats = ReviewQueueStats(queue=queue, assignment_id=assignment_id)
+            if stats.pk is None or stats.review_teacher_id != teacher_id or any(
+                getattr(stats, field) != value for field, value in totals.items()
+            ):
+                for field, value in totals.items():
+                    setattr(stats, field, value)
+                stats.review_teacher_id = teacher_id
+                try:
+                    with transaction.atomic():
+                        stats.save()
+                except IntegrityError:
+                    # 并发创建了统计行，以其为准，下次核对时再修正
+                    pass
+                else:
+                    fixed += 1
+        checked += 1
+    return checked, fixed
+
+
+def rebuild_review_queue(assignment_ids: Optional[Iterable[int]] = None, *, batch_size: int = 500) -> Tuple[int, int]:
+    """全量（或指定考试）核对待批阅队列，未指定考试时同时核对自由练习队列，返回 (检查数量, 修正数量)。"""
+    id_qs = ExamAssignment.objects.order_by("id").values_list("id", flat=True)
+    checked = fixed = 0
+    if assignment_ids is None:
+        checked, fixed = refresh_queue_stats([PRACTICE_QUEUE])
+    else:
+        id_qs = id_qs.filter(id__in=list(assignment_ids))
+    last_id = 0
+    while True:
+        batch = list(id_qs.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        batch_checked, batch_fixed = refresh_queue_stats(queue_key(assignment_id) for assignment_id in batch)
+        checked += batch_checked
+        fixed += batch_fixed
+        if len(batch) < batch_size:
+            break
+    return checked, fixed
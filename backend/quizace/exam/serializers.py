@@ -1,5 +1,7 @@
 import json
+from typing import Dict, List
 
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from .constants import resolve_score
@@ -12,6 +14,12 @@ from .models import (
     Subject,
     WrongBookEntry,
 )
+from .papers import SOLUTION_FIELDS, load_paper_snapshot
+from .question_cache import get_subject_names, render_question_ids
+
+ATTEMPT_ITEM_RENDER_FIELDS = (
+    "id", "attempt_id", "order", "question_id", "user_answer", "is_correct", "awarded_score", "expected_score",
+)
 
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -20,8 +28,23 @@ class SubjectSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "description")
 
 
-class QuestionSerializer(serializers.ModelSerializer):
-    subject_name = serializers.CharField(source="subject.name", read_only=True)
+class QuestionPayloadMixin:
+    """context 中提供 question_payloads（渲染缓存数据）时，选项与科目名称直接取自缓存。"""
+
+    def _payload(self, obj):
+        return (self.context.get("question_payloads") or {}).get(obj.id)
+
+    def get_subject_name(self, obj):
+        payload = self._payload(obj)
+        return payload["subject_name"] if payload else obj.subject.name
+
+    def get_options(self, obj):
+        payload = self._payload(obj)
+        return payload["options"] if payload else obj.options_dict
+
+
+class QuestionSerializer(QuestionPayloadMixin, serializers.ModelSerializer):
+    subject_name = serializers.SerializerMethodField()
     options = serializers.SerializerMethodField()
     media_url = serializers.SerializerMethodField()
 
@@ -44,9 +67,6 @@ class QuestionSerializer(serializers.ModelSerializer):
             "metadata",
         )
 
-    def get_options(self, obj):
-        return obj.options_dict
-
     def get_media_url(self, obj):
         return obj.media_url or ""
 
@@ -119,8 +139,26 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class PracticeQuestionSerializer(serializers.ModelSerializer):
-    subject_name = serializers.CharField(source="subject.name", read_only=True)
+class QuestionImportSerializer(QuestionCreateSerializer):
+    """批量导入的逐行校验，规则同 QuestionCreateSerializer；科目由导入流程统一解析，不逐行查询。"""
+
+    class Meta(QuestionCreateSerializer.Meta):
+        fields = tuple(field for field in QuestionCreateSerializer.Meta.fields if field != "subject")
+
+    def validate_options(self, value):
+        return self._normalize_options(value)
+
+    def build_question(self, **extra) -> Question:
+        """按校验结果构造未保存的题目，供 bulk_create 使用。"""
+        validated_data = dict(self.validated_data)
+        options = validated_data.pop("options", None)
+        if options is not None:
+            validated_data["options"] = json.dumps(options, ensure_ascii=False)
+        return Question(**validated_data, **extra)
+
+
+class PracticeQuestionSerializer(QuestionPayloadMixin, serializers.ModelSerializer):
+    subject_name = serializers.SerializerMethodField()
     options = serializers.SerializerMethodField()
     score = serializers.SerializerMethodField()
     media_url = serializers.SerializerMethodField()
@@ -129,9 +167,6 @@ class PracticeQuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ("id", "question_type", "content", "options", "score", "subject_name", "media_url")
 
-    def get_options(self, obj):
-        return obj.options_dict
-
     def get_score(self, obj):
         return resolve_score(obj.question_type, obj.score)
 
@@ -148,22 +183,16 @@ class PracticeAttemptItemSerializer(serializers.ModelSerializer):
         fields = ("id", "order", "question", "user_answer", "is_correct", "awarded_score", "in_wrong_book")
 
     def get_question(self, obj):
-        question = obj.question
         force_show = self.context.get("force_show_solution", False)
         visibility = self.context.get("solution_visibility") or {}
-        data = {
-            "id": question.id,
-            "question_type": question.question_type,
-            "content": question.content,
-            "options": question.options_dict,
-            "score": obj.expected_score or resolve_score(question.question_type, question.score),
-            "subject_name": question.subject.name,
-            "media_url": question.media_url or "",
-        }
-        can_show = force_show or visibility.get(question.question_type)
-        if can_show:
-            data["answer"] = question.answer
-            data["analysis"] = question.analysis
+        payload = (self.context.get("question_payloads") or {}).get(obj.question_id)
+        if payload is None:
+            payload = render_question_ids([obj.question_id], with_solution=True)[obj.question_id]
+        data = {key: value for key, value in payload.items() if key not in SOLUTION_FIELDS}
+        data["score"] = obj.expected_score or payload["score"]
+        if force_show or visibility.get(payload["question_type"]):
+            data["answer"] = payload["answer"]
+            data["analysis"] = payload["analysis"]
         return data
 
     def get_in_wrong_book(self, obj):
@@ -173,6 +202,45 @@ class PracticeAttemptItemSerializer(serializers.ModelSerializer):
         return obj.question_id in question_ids
 
 
+def serialize_attempt_items(attempt: PracticeAttempt, *, items=None, context=None):
+    """输出与 PracticeAttemptItemSerializer 一致的题目列表，只读取作答字段，不关联题目与科目。
+
+    题目数据优先取自试卷快照；没有快照的旧练习从题目渲染缓存批量读取。
+    """
+    context = context or {}
+    if items is None:
+        items = attempt.items.only(*ATTEMPT_ITEM_RENDER_FIELDS)
+    items = list(items)
+    snapshot = load_paper_snapshot(attempt.id)
+    if snapshot:
+        entries = {entry["id"]: entry for entry in snapshot}
+    else:
+        entries = render_question_ids([item.question_id for item in items], with_solution=True)
+
+    force_show = context.get("force_show_solution", False)
+    visibility = context.get("solution_visibility") or {}
+    wrong_question_ids = context.get("wrong_question_ids") or ()
+    results = []
+    for item in items:
+        entry = entries[item.question_id]
+        question = {key: value for key, value in entry.items() if key != "order"}
+        if not snapshot:
+            question["score"] = item.expected_score or entry["score"]
+        if not (force_show or visibility.get(entry["question_type"])):
+            for key in SOLUTION_FIELDS:
+                question.pop(key, None)
+        results.append({
+            "id": item.id,
+            "order": item.order,
+            "question": question,
+            "user_answer": item.user_answer,
+            "is_correct": item.is_correct,
+            "awarded_score": item.awarded_score,
+            "in_wrong_book": item.question_id in wrong_question_ids,
+        })
+    return results
+
+
 class PracticeAttemptSerializer(serializers.ModelSerializer):
     subject_name = serializers.CharField(source="subject.name", read_only=True)
     user_name = serializers.CharField(source="user.username", read_only=True)
@@ -200,6 +268,7 @@ class PracticeAttemptSerializer(serializers.ModelSerializer):
             "user_name",
             "review_comment",
             "reviewed_at",
+            "answer_revision",
         )
 
 
@@ -222,6 +291,7 @@ class ExamAssignmentSerializer(serializers.ModelSerializer):
             "end_time",
             "status",
             "phase",
+            "audience",
             "description",
             "created_by",
             "created_by_name",
@@ -276,6 +346,9 @@ class QuestionDraftSerializer(serializers.ModelSerializer):
             "parsed_answer",
             "parsed_analysis",
             "error_message",
+            "progress",
+            "attempts",
+            "next_attempt_at",
             "question_id",
             "created_at",
             "updated_at",
@@ -283,3 +356,91 @@ class QuestionDraftSerializer(serializers.ModelSerializer):
 
     def get_media_url(self, obj):
         return obj.resolved_media_url
+
+
+# ---- 列表接口的快速序列化：输出与对应的 ModelSerializer 一致 ----
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _format_datetime(value):
+    return _datetime_field.to_representation(value) if value is not None else None
+
+
+def _related_values(instances, field_name: str, model, value_field: str) -> Dict[int, object]:
+    """读取外键对象的单个字段：已 select_related 的直接取值，其余用一次查询补齐。"""
+    descriptor = getattr(type(instances[0]), field_name).field if instances else None
+    values = {}
+    missing = set()
+    for instance in instances:
+        related_id = getattr(instance, f"{field_name}_id")
+        if related_id is None or related_id in values:
+            continue
+        if descriptor.is_cached(instance):
+            values[related_id] = getattr(getattr(instance, field_name), value_field)
+        else:
+            missing.add(related_id)
+    missing.difference_update(values)
+    if missing:
+        values.update(model.objects.filter(id__in=missing).values_list("id", value_field))
+    return values
+
+
+def serialize_attempts(attempts) -> List[dict]:
+    """PracticeAttemptSerializer 的快速版本：科目、学生与考试名称每个响应各解析一次。"""
+    attempts = list(attempts)
+    if not attempts:
+        return []
+    subject_names = get_subject_names(attempt.subject_id for attempt in attempts)
+    user_names = _related_values(attempts, "user", get_user_model(), "username")
+    assignment_titles = _related_values(attempts, "assignment", ExamAssignment, "title")
+    results = []
+    for attempt in attempts:
+        data = {
+            "id": attempt.id,
+            "mode": attempt.mode,
+            "subject": attempt.subject_id,
+            "subject_name": subject_names.get(attempt.subject_id),
+            "question_type": attempt.question_type,
+            "duration_seconds": attempt.duration_seconds,
+            "total_questions": attempt.total_questions,
+            "correct_count": attempt.correct_count,
+            "total_score": attempt.total_score,
+            "obtained_score": attempt.obtained_score,
+            "status": attempt.status,
+            "is_review_required": attempt.is_review_required,
+            "started_at": _format_datetime(attempt.started_at),
+            "submitted_at": _format_datetime(attempt.submitted_at),
+            "assignment": attempt.assignment_id,
+        }
+        if attempt.assignment_id is not None:
+            data["assignment_title"] = assignment_titles.get(attempt.assignment_id)
+        data["user_name"] = user_names.get(attempt.user_id)
+        data["review_comment"] = attempt.review_comment
+        data["reviewed_at"] = _format_datetime(attempt.reviewed_at)
+        data["answer_revision"] = attempt.answer_revision
+        results.append(data)
+    return results
+
+
+def serialize_questions(questions, payloads: Dict[int, dict]) -> List[dict]:
+    """QuestionSerializer 的快速版本，选项与科目名称取自渲染缓存数据（render_questions 的结果）。"""
+    return [
+        {
+            "id": question.id,
+            "subject": question.subject_id,
+            "subject_name": payloads[question.id]["subject_name"],
+            "question_type": question.question_type,
+            "source_mode": question.source_mode,
+            "status": question.status,
+            "content": question.content,
+            "options": payloads[question.id]["options"],
+            "answer": question.answer,
+            "analysis": question.analysis,
+            "score": question.score,
+            "media_url": question.media_url or "",
+            "created_by": question.created_by_id,
+            "metadata": question.metadata,
+        }
+        for question in questions
+    ]
@@ -0,0 +1,105 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from user.signals import roster_members_changed
+
+from .assignment_feed import invalidate_assignment_feeds, invalidate_student_feeds
+from .models import ExamAssignment, ExamAssignmentStats, Question, ReviewQueueStats, Subject
+from .question_cache import invalidate_question_payloads, invalidate_subject_name
+from .question_dedup import DUPLICATE_FIELDS, index_question_signatures
+from .question_pool import invalidate_question_pools
+from .question_search import SEARCH_FIELDS, index_questions
+from .review_queue import queue_key
+from .teacher_dashboard import invalidate_all_teacher_dashboards, invalidate_teacher_dashboards
+
+# 考试结束并完成收卷后发送，参数: assignment, stats
+assignment_closed = Signal()
+
+
+def _pool_state(question: Question):
+    # 只读取已加载的字段，避免 only()/refresh_from_db 产生的延迟字段在 post_init 中再次查询
+    values = question.__dict__
+    return values.get("subject_id"), values.get("question_type"), values.get("status")
+
+
+@receiver(post_init, sender=Question)
+def remember_question_state(sender, instance: Question, **kwargs):
+    instance._pool_state = _pool_state(instance)
+    instance._render_stamp = instance.__dict__.get("updated_at")
+
+
+@receiver(post_save, sender=Question)
+def invalidate_question_payload_on_save(sender, instance: Question, **kwargs):
+    # 指定 update_fields 且不含 updated_at 时更新时间不变，当前键也需清理
+    invalidate_question_payloads([
+        (instance.id, instance._render_stamp),
+        (instance.id, instance.__dict__.get("updated_at")),
+    ])
+    instance._render_stamp = instance.__dict__.get("updated_at")
+
+
+@receiver(post_save, sender=Question)
+def refresh_question_pool_on_save(sender, instance: Question, created=False, **kwargs):
+    previous = getattr(instance, "_pool_state", None)
+    current = _pool_state(instance)
+    if not created and previous == current:
+        return
+    keys = [current[:2]]
+    if previous and not created:
+        keys.append(previous[:2])
+    invalidate_question_pools(keys)
+    instance._pool_state = current
+
+
+@receiver(post_save, sender=Question)
+def index_question_on_save(sender, instance: Question, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & {*SEARCH_FIELDS, "created_by"}:
+        return
+    index_questions([instance.id])
+
+
+@receiver(post_save, sender=Question)
+def index_question_signature_on_save(sender, instance: Question, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(DUPLICATE_FIELDS):
+        return
+    index_question_signatures([instance.id])
+
+
+@receiver(post_delete, sender=Question)
+def refresh_question_pool_on_delete(sender, instance: Question, **kwargs):
+    invalidate_question_pools([(instance.subject_id, instance.question_type)])
+    invalidate_question_payloads([(instance.id, instance.__dict__.get("updated_at"))])
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_teacher_dashboard_on_question_change(sender, instance: Question, **kwargs):
+    invalidate_teacher_dashboards([instance.created_by_id])
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def invalidate_subject_name_on_change(sender, instance: Subject, **kwargs):
+    invalidate_subject_name(instance.id)
+    invalidate_all_teacher_dashboards()
+
+
+@receiver(post_save, sender=ExamAssignment)
+def create_assignment_stats(sender, instance: ExamAssignment, created=False, **kwargs):
+    if created:
+        ExamAssignmentStats.objects.get_or_create(assignment=instance)
+        ReviewQueueStats.objects.get_or_create(
+            queue=queue_key(instance.id),
+            defaults={"assignment": instance, "review_teacher_id": instance.created_by_id},
+        )
+
+
+@receiver(post_save, sender=ExamAssignment)
+@receiver(post_delete, sender=ExamAssignment)
+def invalidate_assignment_feeds_on_change(sender, instance: ExamAssignment, **kwargs):
+    invalidate_assignment_feeds()
+    invalidate_teacher_dashboards([instance.created_by_id])
+
+
+@receiver(roster_members_changed)
+def invalidate_member_feeds(sender, student_ids, **kwargs):
+    invalidate_student_feeds(student_ids)
@@ -0,0 +1,272 @@
+"""教师看板快照：按教师缓存看板数据，由相关事件递增版本号使其失效。
+
+版本号分两级：教师自己的题目、考试及其作答变化时递增该教师的版本号；
+自由练习的待批阅变化影响所有教师，递增全局版本号。快照记录生成时的版本号，
+版本号变化或超过有效期（最长 EXAM_DASHBOARD_FRESH_SECONDS，且不跨过任一考试的开始/结束时刻）
+后视为过期：过期不久的快照先返回旧数据，同时在后台线程重新计算
+（stale-while-revalidate）；超过 EXAM_DASHBOARD_MAX_STALE_SECONDS 时同步重算。
+版本号与后台重算锁都存放在默认缓存中，多进程部署须配置各进程共享的缓存后端（见 settings.CACHES）。
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .assignment_stats import stats_payload
+from .models import ExamAssignment, PracticeAttempt, Question
+from .review_queue import pending_review_queryset, queue_summary
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_PREFIX = "exam:teacher_dashboard"
+# 版本号变化后快照即失效，缓存保留时间只需覆盖最长可返回的旧数据
+DASHBOARD_CACHE_TIMEOUT = 24 * 3600
+DASHBOARD_REFRESH_LOCK_TIMEOUT = 60
+
+
+def _snapshot_key(teacher_id: int) -> str:
+    return f"{DASHBOARD_CACHE_PREFIX}:{teacher_id}"
+
+
+def _global_generation_key() -> str:
+    return f"{DASHBOARD_CACHE_PREFIX}:generation"
+
+
+def _teacher_generation_key(teacher_id: int) -> str:
+    return f"{DASHBOARD_CACHE_PREFIX}:generation:{teacher_id}"
+
+
+def _refresh_lock_key(teacher_id: int) -> str:
+    return f"{DASHBOARD_CACHE_PREFIX}:refreshing:{teacher_id}"
+
+
+def _bump(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_teacher_dashboards(teacher_ids: Iterable[int]):
+    # 事务提交后再递增：提交前重算读到的仍是旧数据，却会记下新版本号
+    keys = [_teacher_generation_key(teacher_id) for teacher_id in set(teacher_ids) if teacher_id is not None]
+    transaction.on_commit(lambda: [_bump(key) for key in keys])
+
+
+def invalidate_all_teacher_dashboards():
+    transaction.on_commit(lambda: _bump(_global_generation_key()))
+
+
+def invalidate_dashboards_for_attempts(attempts: Iterable[PracticeAttempt]):
+    """作答交卷、收卷、批阅或改分后调用：考试作答通知发布教师，待批阅的自由练习通知全部教师。"""
+    assignment_ids = set()
+    practice_review = False
+    for attempt in attempts:
+        if attempt.assignment_id:
+            assignment_ids.add(attempt.assignment_id)
+        elif attempt.is_review_required or attempt.reviewed_at:
+            practice_review = True
+    if assignment_ids:
+        invalidate_teacher_dashboards(
+            ExamAssignment.objects.filter(id__in=assignment_ids).values_list("created_by_id", flat=True).distinct()
+        )
+    if practice_review:
+        invalidate_all_teacher_dashboards()
+
+
+def invalidate_dashboards_for_attempt_ids(attempt_ids: Iterable[int]):
+    """重判改分后调用，只影响考试统计，通知相关考试的发布教师。"""
+    attempt_ids = list(attempt_ids)
+    if attempt_ids:
+        invalidate_teacher_dashboards(
+            PracticeAttempt.objects.filter(id__in=attempt_ids, assignment__isnull=False)
+            .values_list("assignment__created_by_id", flat=True)
+            .distinct()
+        )
+
+
+def _generation(teacher_id: int) -> Tuple[int, int]:
+    keys = [_global_generation_key(), _teacher_generation_key(teacher_id)]
+    values = cache.get_many(keys)
+    return values.get(keys[0], 0), values.get(keys[1], 0)
+
+
+def build_teacher_dashboard(user) -> Tuple[dict, float]:
+    """计算看板数据，返回 (数据, 数据中考试时间段保持不变的截止时间戳)。"""
+    now = timezone.now()
+    question_qs = Question.objects.filter(created_by=user)
+    question_stats = question_qs.aggregate(
+        total=Count("id"),
+        objective=Count("id", filter=Q(question_type="objective")),
+        subjective=Count("id", filter=Q(question_type="subjective")),
+    )
+    subject_rows = (
+        question_qs.values("subject_id", "subject__name")
+        .annotate(
+            total=Count("id"),
+            objective=Count("id", filter=Q(question_type="objective")),
+            subjective=Count("id", filter=Q(question_type="subjective")),
+            last_updated=Max("updated_at"),
+        )
+        .order_by("-last_updated", "subject__name")
+    )
+    question_subjects = [
+        {
+            "subject_id": row["subject_id"],
+            "subject_name": row["subject__name"],
+            "total": row["total"],
+            "objective": row["objective"],
+            "subjective": row["subjective"],
+            "last_updated": row["last_updated"],
+        }
+        for row in subject_rows
+    ]
+
+    assignment_qs = (
+        ExamAssignment.objects.filter(created_by=user)
+        .select_related("subject", "stats")
+        .order_by("start_time")
+    )
+    assignment_list = list(assignment_qs)
+
+    status_counts = {"draft": 0, "published": 0, "closed": 0}
+    phase_counts = {"upcoming": 0, "ongoing": 0, "ended": 0}
+    subject_assignment_map: Dict[int, Dict[str, object]] = {}
+    recent_assignments = []
+
+    for assignment in assignment_list:
+        status_counts[assignment.status] = status_counts.get(assignment.status, 0) + 1
+        phase = assignment.phase
+        if phase in phase_counts:
+            phase_counts[phase] += 1
+        subject_entry = subject_assignment_map.setdefault(
+            assignment.subject_id or 0,
+            {
+                "subject_id": assignment.subject_id,
+                "subject_name": assignment.subject.name if assignment.subject else "未分类",
+                "total": 0,
+                "upcoming": 0,
+                "ongoing": 0,
+                "ended": 0,
+            },
+        )
+        subject_entry["total"] += 1
+        if phase in subject_entry:
+            subject_entry[phase] += 1
+
+    for assignment in assignment_list[:5]:
+        recent_assignments.append({
+            "id": assignment.id,
+            "title": assignment.title,
+            "subject_name": assignment.subject.name if assignment.subject else "",
+            "phase": assignment.phase,
+            "status": assignment.status,
+            "start_time": assignment.start_time,
+            "end_time": assignment.end_time,
+            **stats_payload(assignment),
+        })
+
+    pending_qs = pending_review_queryset(user).select_related("user", "subject", "assignment").order_by("-submitted_at", "-id")
+    pending_total = queue_summary(user)["pending_total"]
+    pending_items = [
+        {
+            "id": attempt.id,
+            "student_name": attempt.user.username,
+            "subject_name": attempt.subject.name,
+            "assignment_id": attempt.assignment_id,
+            "assignment_title": attempt.assignment.title if attempt.assignment else None,
+            "submitted_at": attempt.submitted_at,
+            "mode": attempt.mode,
+            "question_type": attempt.question_type,
+        }
+        for attempt in pending_qs[:5]
+    ]
+
+    payload = {
+        "question_stats": {
+            "total": question_stats.get("total", 0),
+            "objective": question_stats.get("objective", 0),
+            "subjective": question_stats.get("subjective", 0),
+            "subjects": question_subjects,
+        },
+        "assignment_stats": {
+            "total": len(assignment_list),
+            "status": status_counts,
+            "phase": phase_counts,
+            "subjects": sorted(subject_assignment_map.values(), key=lambda item: item["total"], reverse=True),
+            "recent": recent_assignments,
+        },
+        "pending_reviews": {
+            "total": pending_total,
+            "items": pending_items,
+        },
+    }
+
+    boundaries = [
+        moment.timestamp()
+        for assignment in assignment_list
+        for moment in (assignment.start_time, assignment.end_time)
+        if moment > now
+    ]
+    return payload, min(boundaries, default=float("inf"))
+
+
+def _store_snapshot(teacher_id: int, generation: Tuple[int, int], payload: dict, phase_until: float):
+    built_at = time.time()
+    fresh_seconds = getattr(settings, "EXAM_DASHBOARD_FRESH_SECONDS", 300)
+    cache.set(
+        _snapshot_key(teacher_id),
+        {
+            "generation": generation,
+            "built_at": built_at,
+            "fresh_until": min(built_at + fresh_seconds, phase_until),
+            "data": payload,
+        },
+        DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+def refresh_teacher_dashboard(user) -> dict:
+    # 先读取版本号再计算：计算期间发生的事件会让快照立即过期，不会被覆盖丢失
+    generation = _generation(user.id)
+    payload, phase_until = build_teacher_dashboard(user)
+    _store_snapshot(user.id, generation, payload, phase_until)
+    return payload
+
+
+def _refresh_in_background(user):
+    try:
+        refresh_teacher_dashboard(user)
+    except Exception:
+        logger.exception("teacher dashboard refresh failed for %s", user.id)
+    finally:
+        cache.delete(_refresh_lock_key(user.id))
+        connection.close()
+
+
+def _schedule_refresh(user):
+    # 同一教师同时只允许一个后台重算
+    if cache.add(_refresh_lock_key(user.id), 1, DASHBOARD_REFRESH_LOCK_TIMEOUT):
+        threading.Thread(target=_refresh_in_background, args=(user,), daemon=True).start()
+
+
+def get_teacher_dashboard(user) -> dict:
+    snapshot = cache.get(_snapshot_key(user.id))
+    if snapshot is None:
+        return refresh_teacher_dashboard(user)
+    now = time.time()
+    if snapshot["generation"] == _generation(user.id) and now < snapshot["fresh_until"]:
+        return snapshot["data"]
+    if (
+        not getattr(settings, "EXAM_DASHBOARD_ASYNC_REFRESH", True)
+        or now - snapshot["built_at"] > getattr(settings, "EXAM_DASHBOARD_MAX_STALE_SECONDS", 600)
+    ):
+        return refresh_teacher_dashboard(user)
+    _schedule_refresh(user)
+    return snapshot["data"]
@@ -0,0 +1,1000 @@
+import io
+import json
+import random
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from quizace.testing import assert_queries_do_not_grow, assert_query_budget
+from user.models import ClassMembership, ClassRoster, SysUser
+
+from . import (
+    activity,
+    assignment_feed,
+    draft_queue,
+    grading,
+    papers,
+    question_dedup,
+    question_import,
+    question_search,
+    review_queue,
+    teacher_dashboard,
+)
+from .answer_buffer import flush_buffered_answers
+from .constants import resolve_score
+from .ocr import RecognitionError
+from .models import (
+    AttemptAnswerLog,
+    ExamAssignment,
+    ExamAssignmentStats,
+    PracticeAttempt,
+    PendingReviewGroup,
+    PracticeAttemptItem,
+    PreparedPaper,
+    Question,
+    QuestionDraft,
+    ReviewQueueStats,
+    StudentDailyActivity,
+    Subject,
+    WrongBookEntry,
+)
+
+
+class ExamTestCase(TestCase):
+    """题库、教师与学生的公共测试数据。"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = SysUser.objects.create_user("teacher", "pw", email="teacher@example.com", role="teacher")
+        cls.student = SysUser.objects.create_user("student", "pw", email="student@example.com", role="student")
+        cls.subject = Subject.objects.create(name="数学")
+        for index in range(12):
+            Question.objects.create(
+                subject=cls.subject,
+                question_type="objective",
+                content=f"客观题{index}",
+                options=json.dumps({"A": "1", "B": "2"}),
+                answer="A",
+                created_by=cls.teacher,
+            )
+        for index in range(4):
+            Question.objects.create(
+                subject=cls.subject,
+                question_type="subjective",
+                content=f"主观题{index}",
+                answer="略",
+                created_by=cls.teacher,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_client = APIClient()
+        self.teacher_client.force_authenticate(self.teacher)
+        self.student_client = APIClient()
+        self.student_client.force_authenticate(self.student)
+
+    def call(self, client, method, url, data=None, expect=200):
+        # 统计、缓存失效等在事务提交后执行的回调在测试事务中也立即执行
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(client, method)(url, data, format="json")
+        body = response.json()
+        self.assertEqual(body.get("code"), expect, body)
+        return body
+
+    def start_practice(self, size=5, question_type="objective", client=None):
+        body = self.call(client or self.student_client, "post", "/api/exam/practice/attempts/start/", {
+            "subject_id": self.subject.id,
+            "question_type": question_type,
+            "size": size,
+        })
+        return body["data"]["attempt_id"], [question["id"] for question in body["data"]["questions"]]
+
+    def create_assignment(self, **fields):
+        start = timezone.now() - timedelta(minutes=1)
+        data = {
+            "title": "期中考试",
+            "subject_id": self.subject.id,
+            "question_type": "objective",
+            "question_count": 5,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=2)).isoformat(),
+        }
+        data.update(fields)
+        body = self.call(self.teacher_client, "post", "/api/exam/assignments/", data)
+        return ExamAssignment.objects.get(id=body["data"]["id"])
+
+    def start_exam(self, assignment, client=None):
+        body = self.call(client or self.student_client, "post", f"/api/exam/assignments/{assignment.id}/start/", {})
+        return body["data"]["attempt_id"], [question["id"] for question in body["data"]["questions"]]
+
+
+class PreparedPaperTests(ExamTestCase):
+    def test_claim_moves_on_when_paper_is_taken_concurrently(self):
+        assignment = self.create_assignment()
+        self.assertEqual(papers.prepare_assignment_papers(assignment, 2), 2)
+        first, second = PreparedPaper.objects.filter(assignment=assignment).order_by("id")
+        other = SysUser.objects.create_user("student2", "pw", email="student2@example.com", role="student")
+        next_unclaimed = papers._next_unclaimed_paper
+
+        def claimed_meanwhile(paper_qs):
+            # 读取到试卷后、领取前，另一个学生抢先领取了同一份
+            paper = next_unclaimed(paper_qs)
+            if paper is not None and paper.id == first.id:
+                PreparedPaper.objects.filter(id=first.id).update(claimed_by=other, claimed_at=timezone.now())
+            return paper
+
+        with mock.patch.object(papers, "_next_unclaimed_paper", side_effect=claimed_meanwhile):
+            with transaction.atomic():
+                question_scores, _ = papers.claim_prepared_paper(assignment, self.student)
+        self.assertEqual(question_scores, second.question_scores)
+        self.assertEqual(PreparedPaper.objects.get(id=first.id).claimed_by, other)
+        self.assertEqual(PreparedPaper.objects.get(id=second.id).claimed_by, self.student)
+        with transaction.atomic():
+            self.assertIsNone(papers.claim_prepared_paper(assignment, other))
+
+    def test_start_uses_prepared_paper(self):
+        assignment = self.create_assignment()
+        papers.prepare_assignment_papers(assignment, 1)
+        paper = PreparedPaper.objects.get(assignment=assignment)
+        _, question_ids = self.start_exam(assignment)
+        self.assertEqual(question_ids, [question_id for question_id, _ in paper.question_scores])
+        self.assertEqual(PreparedPaper.objects.get(id=paper.id).claimed_by, self.student)
+
+
+class AttemptStatsTests(ExamTestCase):
+    def test_start_counts_after_commit(self):
+        assignment = self.create_assignment()
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.student_client.post(f"/api/exam/assignments/{assignment.id}/start/", {}, format="json")
+        self.assertEqual(response.json()["code"], 200)
+        self.assertEqual(ExamAssignmentStats.objects.get(assignment=assignment).total_attempts, 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(ExamAssignmentStats.objects.get(assignment=assignment).total_attempts, 1)
+        self.assertEqual(
+            StudentDailyActivity.objects.get(user=self.student, day=timezone.localdate()).attempts_started, 1,
+        )
+
+
+class AssignmentFeedTests(ExamTestCase):
+    def feed(self, **params):
+        response = self.student_client.get("/api/exam/assignments/available/", params)
+        return response.json()
+
+    def test_feed_pages_and_reflects_attempts(self):
+        assignments = [self.create_assignment(title=f"考试{index}") for index in range(3)]
+        first = self.feed(page_size=2)
+        self.assertEqual(len(first["data"]), 2)
+        self.assertTrue(first["pagination"]["has_more"])
+        second = self.feed(page_size=2, page=2)
+        self.assertEqual(
+            {item["id"] for item in first["data"] + second["data"]}, {assignment.id for assignment in assignments},
+        )
+        attempt_id, _ = self.start_exam(assignments[0])
+        item = next(item for item in self.feed()["data"] if item["id"] == assignments[0].id)
+        self.assertEqual((item["attempt_id"], item["attempt_status"]), (attempt_id, "ongoing"))
+
+    def test_invalidation_waits_for_commit(self):
+        assignment = self.create_assignment()
+        self.feed()
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                ExamAssignment.objects.filter(id=assignment.id).update(title="已改名")
+                assignment.refresh_from_db()
+                assignment.save()
+                # 提交前版本号不变，不会有请求用未提交的数据在新版本号下重建缓存
+                self.assertNotEqual(self.feed()["data"][0]["title"], "已改名")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.feed()["data"][0]["title"], "已改名")
+
+
+class RosterTargetingTests(ExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.roster = ClassRoster.objects.create(name="一班", teacher=self.teacher)
+        ClassMembership.objects.create(roster=self.roster, student=self.student)
+        self.outsider = SysUser.objects.create_user("student2", "pw", email="student2@example.com", role="student")
+        self.outsider_client = APIClient()
+        self.outsider_client.force_authenticate(self.outsider)
+
+    def feed_ids(self, client):
+        return [item["id"] for item in self.call(client, "get", "/api/exam/assignments/available/")["data"]]
+
+    def test_targeted_assignment_is_visible_to_members_only(self):
+        assignment = self.create_assignment(roster_ids=[self.roster.id])
+        self.assertEqual(assignment.audience, "rosters")
+        self.assertEqual(self.feed_ids(self.student_client), [assignment.id])
+        self.assertEqual(self.feed_ids(self.outsider_client), [])
+        self.call(self.outsider_client, "post", f"/api/exam/assignments/{assignment.id}/start/", {}, 403)
+        self.start_exam(assignment)
+
+        version_key = assignment_feed._user_version_key(self.outsider.id)
+        self.assertIsNone(cache.get(version_key))
+        self.call(self.teacher_client, "post", f"/api/user/classes/{self.roster.id}/members/", {
+            "student_ids": [self.outsider.id],
+        })
+        self.assertEqual(cache.get(version_key), 1)
+        self.assertEqual(self.feed_ids(self.outsider_client), [assignment.id])
+
+    def test_failed_targeting_does_not_leave_public_assignment(self):
+        with mock.patch("exam.views.set_assignment_rosters", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.create_assignment(roster_ids=[self.roster.id])
+        self.assertFalse(ExamAssignment.objects.exists())
+
+
+class SharedCacheTests(ExamTestCase):
+    def test_invalidation_reaches_other_processes(self):
+        # 进程内缓存中的版本号与重算锁对其他工作进程不可见
+        self.assertNotIsInstance(caches["default"], LocMemCache)
+        other_process = caches.create_connection("default")
+        key = teacher_dashboard._teacher_generation_key(self.teacher.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            teacher_dashboard.invalidate_teacher_dashboards([self.teacher.id])
+        self.assertEqual(other_process.get(key), 1)
+        lock_key = teacher_dashboard._refresh_lock_key(self.teacher.id)
+        self.assertTrue(cache.add(lock_key, 1, 60))
+        self.assertFalse(other_process.add(lock_key, 1, 60))
+
+
+@override_settings(EXAM_AUTOSAVE_BUFFERED=True)
+class AnswerBufferTests(ExamTestCase):
+    def autosave(self, attempt_id, question_id, answer):
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/save/", {
+            "answers": [{"question_id": question_id, "user_answer": answer}],
+        })
+
+    def test_flush_writes_latest_answer(self):
+        attempt_id, question_ids = self.start_practice()
+        self.autosave(attempt_id, question_ids[0], "B")
+        self.autosave(attempt_id, question_ids[0], "A")
+        self.assertEqual(flush_buffered_answers(), 1)
+        self.assertEqual(PracticeAttemptItem.objects.get(attempt_id=attempt_id, question_id=question_ids[0]).user_answer, "A")
+        self.assertFalse(AttemptAnswerLog.objects.exists())
+
+    def test_flush_discards_logs_of_submitted_attempts(self):
+        attempt_id, question_ids = self.start_practice()
+        self.autosave(attempt_id, question_ids[0], "A")
+        body = self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {"answers": []})
+        self.assertEqual(body["data"]["attempt"]["correct_count"], 1)
+        # 交卷后才写入的日志（例如交卷前发出、交卷后到达的自动保存）
+        AttemptAnswerLog.objects.create(attempt_id=attempt_id, question_id=question_ids[0], user_answer="B")
+        self.assertEqual(flush_buffered_answers(), 0)
+        item = PracticeAttemptItem.objects.get(attempt_id=attempt_id, question_id=question_ids[0])
+        self.assertEqual((item.user_answer, item.is_correct), ("A", True))
+        self.assertFalse(AttemptAnswerLog.objects.exists())
+
+
+    def test_command_stops_after_bounded_batches(self):
+        attempt_id, question_ids = self.start_practice()
+        for question_id in question_ids[:3]:
+            self.autosave(attempt_id, question_id, "A")
+        out = io.StringIO()
+        call_command("flush_answer_buffer", "--batch-size", "1", "--max-batches", "2", stdout=out)
+        self.assertIn("已读取 2 条日志", out.getvalue())
+        self.assertEqual(AttemptAnswerLog.objects.count(), 1)
+        with mock.patch("exam.management.commands.flush_answer_buffer.flush_answer_batch", return_value=(1, 0)) as flush:
+            call_command("flush_answer_buffer", "--batch-size", "5", stdout=io.StringIO())
+        self.assertEqual(flush.call_count, 1)
+
+
+@override_settings(EXAM_AUTOSAVE_BUFFERED=False)
+class AnswerRevisionTests(ExamTestCase):
+    def save(self, attempt_id, data, expect=200):
+        return self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/save/", data, expect)
+
+    def test_stale_revision_is_rejected(self):
+        attempt_id, question_ids = self.start_practice()
+        self.save(attempt_id, {"revision": 2, "changes": [{"question_id": question_ids[0], "user_answer": "A"}]})
+        body = self.save(attempt_id, {"revision": 1, "changes": [{"question_id": question_ids[0], "user_answer": "B"}]}, 409)
+        self.assertEqual(body["data"]["revision"], 2)
+        self.assertEqual(PracticeAttemptItem.objects.get(attempt_id=attempt_id, question_id=question_ids[0]).user_answer, "A")
+
+    def test_missing_revision_is_rejected(self):
+        attempt_id, question_ids = self.start_practice()
+        for revision in ("", None, "abc", 0):
+            self.save(attempt_id, {"revision": revision, "changes": [{"question_id": question_ids[0], "user_answer": "A"}]}, 400)
+        self.assertEqual(PracticeAttempt.objects.get(id=attempt_id).answer_revision, 0)
+
+
+class GradeAnswerColumnsTests(SimpleTestCase):
+    """向量化批改与逐题批改的结果一致。"""
+
+    ANSWER_KEYS = {
+        1: ("objective", "A", None, 1),
+        2: ("objective", " b ", None, 1),
+        3: ("subjective", "略", None, 1),
+        4: ("objective", "", None, 1),
+        5: ("objective", "ac", 4, 2),
+    }
+
+    @staticmethod
+    def grade_one_by_one(rows, answer_keys):
+        results, summary = [], {}
+        for attempt_id, question_id, user_answer, expected_score, awarded_score in rows:
+            question_type, answer, score, _ = answer_keys[question_id]
+            score = expected_score or resolve_score(question_type, score)
+            objective = question_type == "objective"
+            normalized = (user_answer or "").strip().upper()
+            correct = objective and bool(normalized) and normalized == (answer or "").strip().upper()
+            awarded = (score if correct else 0) if objective else (awarded_score or 0)
+            results.append((objective, correct, awarded))
+            entry = summary.setdefault(attempt_id, {
+                "correct_count": 0, "obtained_score": 0, "total_score": 0, "subjective_score": 0, "has_subjective": False,
+            })
+            entry["correct_count"] += correct
+            entry["total_score"] += score
+            if objective:
+                entry["obtained_score"] += awarded
+            else:
+                entry["subjective_score"] += awarded
+                entry["has_subjective"] = True
+        return results, summary
+
+    def grade_columns(self, rows):
+        objective, correct, awarded, summary = grading.grade_answer_columns(*zip(*rows), self.ANSWER_KEYS)
+        return list(zip(objective.tolist(), correct.tolist(), awarded.tolist())), summary
+
+    def test_normalisation_blanks_and_subjective_scores(self):
+        rows = [
+            (20, 1, " a ", None, None),
+            (10, 2, "B", 0, None),
+            (20, 2, "  ", None, 5),
+            (10, 3, "", None, 7),
+            (10, 4, None, None, None),
+            (20, 5, "AC", 6, None),
+            (10, 1, "B", None, 9),
+        ]
+        results, summary = self.grade_columns(rows)
+        self.assertEqual([correct for _, correct, _ in results], [True, True, False, False, False, True, False])
+        self.assertEqual(results[3], (False, False, 7))
+        self.assertEqual(results[5][2], 6)
+        self.assertEqual(summary[10]["subjective_score"], 7)
+        self.assertTrue(summary[10]["has_subjective"])
+        self.assertFalse(summary[20]["has_subjective"])
+        self.assertEqual((results, summary), self.grade_one_by_one(rows, self.ANSWER_KEYS))
+
+    def test_matches_item_by_item_grading(self):
+        rng = random.Random(7)
+        answers = [None, "", " ", "a", "A ", "b", "B", "c", "AC", " ac", "略"]
+        rows = [
+            (
+                rng.randint(1, 40),
+                rng.choice(list(self.ANSWER_KEYS)),
+                rng.choice(answers),
+                rng.choice([None, 0, 2, 5]),
+                rng.choice([None, 0, 3, 10]),
+            )
+            for _ in range(2000)
+        ]
+        results, summary = self.grade_columns(rows)
+        expected_results, expected_summary = self.grade_one_by_one(rows, self.ANSWER_KEYS)
+        # 只报告前几处差异，避免对整列结果做 diff
+        mismatches = [(row, got, want) for row, got, want in zip(rows, results, expected_results) if got != want]
+        self.assertEqual(mismatches[:5], [])
+        self.assertEqual(summary, expected_summary)
+
+
+class ExpiredAttemptTests(ExamTestCase):
+    def expire(self, attempt_id):
+        past = timezone.now() - timedelta(hours=1)
+        PracticeAttempt.objects.filter(id=attempt_id).update(started_at=past, deadline_at=past)
+
+    def test_lock_falls_back_to_blocking_lock_without_skip_locked(self):
+        attempt_qs = PracticeAttempt.objects.filter(status="ongoing")
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", False):
+            query = grading._lock_attempts(attempt_qs).query
+        self.assertTrue(query.select_for_update)
+        self.assertFalse(query.select_for_update_skip_locked)
+        self.assertFalse(grading._lock_attempts(attempt_qs, skip_locked=False).query.select_for_update_skip_locked)
+
+    def test_sweeper_finalizes_expired_attempts_once(self):
+        assignment = self.create_assignment()
+        attempt_id, question_ids = self.start_exam(assignment)
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/save/", {
+            "answers": [{"question_id": question_ids[0], "user_answer": "A"}],
+        })
+        self.expire(attempt_id)
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", False):
+            self.assertEqual(grading.finalize_expired_attempts(), 1)
+            self.assertEqual(grading.finalize_expired_attempts(), 0)
+        attempt = PracticeAttempt.objects.get(id=attempt_id)
+        self.assertEqual((attempt.status, attempt.correct_count), ("expired", 1))
+        stats = ExamAssignmentStats.objects.get(assignment=assignment)
+        self.assertEqual((stats.total_attempts, stats.submitted_attempts), (1, 1))
+
+    def test_sweeper_skips_attempts_submitted_first(self):
+        assignment = self.create_assignment()
+        attempt_id, _ = self.start_exam(assignment)
+        self.expire(attempt_id)
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {"answers": []})
+        submitted_at = PracticeAttempt.objects.get(id=attempt_id).submitted_at
+        self.assertEqual(grading.finalize_expired_attempts(), 0)
+        self.assertEqual(PracticeAttempt.objects.get(id=attempt_id).submitted_at, submitted_at)
+        self.assertEqual(ExamAssignmentStats.objects.get(assignment=assignment).submitted_attempts, 1)
+
+
+class CloseAssignmentTests(ExamTestCase):
+    def test_close_waits_for_attempts_skipped_as_locked(self):
+        assignment = self.create_assignment()
+        other = SysUser.objects.create_user("student2", "pw", email="student2@example.com", role="student")
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        locked_id, _ = self.start_exam(assignment)
+        self.start_exam(assignment, other_client)
+        ExamAssignment.objects.filter(id=assignment.id).update(end_time=timezone.now() - timedelta(seconds=1))
+        lock_attempts = grading._lock_attempts
+
+        def skip_first(attempt_qs, *, skip_locked=True):
+            # 模拟 SKIP LOCKED 跳过正被提交请求锁定的作答
+            locked_qs = lock_attempts(attempt_qs, skip_locked=skip_locked)
+            return locked_qs.exclude(id=locked_id) if skip_locked else locked_qs
+
+        with mock.patch.object(grading, "_lock_attempts", side_effect=skip_first) as patched:
+            stats = grading.close_assignment(ExamAssignment.objects.get(id=assignment.id))
+        self.assertFalse(patched.call_args_list[-1].kwargs["skip_locked"])
+        self.assertEqual((stats["total_attempts"], stats["expired"]), (2, 2))
+        self.assertFalse(PracticeAttempt.objects.filter(assignment=assignment, status="ongoing").exists())
+        self.assertEqual(ExamAssignment.objects.get(id=assignment.id).status, "closed")
+        self.assertEqual(ExamAssignmentStats.objects.get(assignment=assignment).submitted_attempts, 2)
+
+
+class RegradeTests(ExamTestCase):
+    def test_answer_change_regrades_submitted_items(self):
+        assignment = self.create_assignment()
+        attempt_id, question_ids = self.start_exam(assignment)
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {
+            "answers": [{"question_id": question_id, "user_answer": "B"} for question_id in question_ids],
+        })
+        ongoing_id, _ = self.start_practice()
+        item = PracticeAttemptItem.objects.get(attempt_id=attempt_id, question_id=question_ids[0])
+        WrongBookEntry.objects.create(
+            user=self.student, subject=self.subject, question_id=question_ids[0], last_attempt_item=item,
+        )
+
+        body = self.call(self.teacher_client, "put", f"/api/exam/teacher/questions/{question_ids[0]}/", {"answer": "B"})
+        self.assertTrue(body["data"]["regrade_pending"])
+        self.assertEqual(PracticeAttempt.objects.get(id=attempt_id).correct_count, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("regrade_questions", stdout=io.StringIO())
+        item.refresh_from_db()
+        attempt = PracticeAttempt.objects.get(id=attempt_id)
+        self.assertTrue(item.is_correct)
+        self.assertEqual(item.graded_version, Question.objects.get(id=question_ids[0]).answer_version)
+        self.assertEqual((attempt.correct_count, attempt.obtained_score), (1, item.awarded_score))
+        self.assertEqual(ExamAssignmentStats.objects.get(assignment=assignment).score_sum, item.awarded_score)
+        self.assertFalse(WrongBookEntry.objects.filter(question_id=question_ids[0]).exists())
+        self.assertEqual(PracticeAttempt.objects.get(id=ongoing_id).status, "ongoing")
+
+        self.assertEqual(grading.regrade_question(question_ids[0]), 0)
+        self.assertEqual(PracticeAttempt.objects.get(id=attempt_id).correct_count, 1)
+
+
+class ActivityRollupTests(ExamTestCase):
+    def stored_rows(self):
+        fields = activity.ACTIVITY_FIELDS
+        return {
+            (row["user_id"], row["day"]): {field: row[field] for field in fields}
+            for row in StudentDailyActivity.objects.values("user_id", "day", *fields)
+        }
+
+    def test_incremental_rollup_matches_rebuild_and_dashboard(self):
+        attempt_id, question_ids = self.start_practice(size=4)
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {
+            "answers": [
+                {"question_id": question_id, "user_answer": "A" if index < 3 else "B"}
+                for index, question_id in enumerate(question_ids)
+            ],
+        })
+        wrong_item = PracticeAttemptItem.objects.get(attempt_id=attempt_id, is_correct=False)
+        self.call(self.student_client, "post", "/api/exam/wrong-book/items/", {"attempt_item_id": wrong_item.id})
+        subjective_id, _ = self.start_practice(size=1, question_type="subjective")
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{subjective_id}/submit/", {"answers": []})
+        item = PracticeAttemptItem.objects.get(attempt_id=subjective_id)
+        self.call(self.teacher_client, "post", f"/api/exam/practice/attempts/{subjective_id}/review/", {
+            "items": [{"id": item.id, "awarded_score": item.expected_score}],
+        })
+        self.start_practice(size=2)
+
+        today = timezone.localdate()
+        stored = self.stored_rows()
+        row = stored[(self.student.id, today)]
+        self.assertEqual((row["attempts_started"], row["attempts_completed"], row["wrong_book_added"]), (3, 2, 1))
+        # 批阅改分计入交卷当天
+        self.assertEqual(
+            row["obtained_score"], PracticeAttempt.objects.get(id=attempt_id).obtained_score + item.expected_score,
+        )
+        # 增量累加的结果与全量重建一致
+        self.assertEqual(stored, {key: dict(values) for key, values in activity.compute_student_activity([self.student.id]).items()})
+        activity.rebuild_student_activity([self.student.id])
+        self.assertEqual(self.stored_rows(), stored)
+
+        body = self.call(self.student_client, "get", "/api/exam/dashboard/student/overview/", {"days": 3})
+        practice = body["data"]["practice_stats"]
+        self.assertEqual((practice["total"], practice["completed"], practice["ongoing"]), (3, 2, 1))
+        self.assertEqual(len(practice["trend"]), 3)
+        self.assertEqual(practice["trend"][-1], {
+            "date": today.isoformat(),
+            "count": 2,
+            "started": 3,
+            "obtained_score": row["obtained_score"],
+            "total_score": row["total_score"],
+            "wrong_book_added": 1,
+        })
+
+
+class ReviewQueueTests(ExamTestCase):
+    students_path = "/api/exam/practice/attempts/pending-review/teacher/students/"
+
+    def submit_subjective_practice(self, client=None):
+        attempt_id, _ = self.start_practice(size=1, question_type="subjective", client=client)
+        self.call(client or self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {"answers": []})
+        return attempt_id
+
+    def review(self, attempt_id):
+        item = PracticeAttemptItem.objects.get(attempt_id=attempt_id)
+        self.call(self.teacher_client, "post", f"/api/exam/practice/attempts/{attempt_id}/review/", {
+            "items": [{"id": item.id, "awarded_score": 1}],
+        })
+
+    def groups(self, expect=200, **params):
+        return self.call(self.teacher_client, "get", self.students_path, params, expect)
+
+    def assertQueueConsistent(self):
+        self.assertEqual(review_queue.rebuild_review_queue()[1], 0)
+
+    def test_submit_and_review_maintain_groups(self):
+        first = self.submit_subjective_practice()
+        second = self.submit_subjective_practice()
+        assignment = self.create_assignment(question_type="subjective", question_count=1)
+        exam_id, _ = self.start_exam(assignment)
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{exam_id}/submit/", {"answers": []})
+
+        body = self.groups()
+        self.assertEqual(
+            [(row["assignment_id"], row["pending_count"]) for row in body["data"]],
+            [(assignment.id, 1), (None, 2)],
+        )
+        self.assertNotIn("attempts", body["data"][0])
+        self.assertEqual((body["summary"]["pending_total"], body["summary"]["student_total"]), (3, 2))
+        self.assertEqual(self.groups(assignment_id="practice")["summary"]["pending_total"], 2)
+        self.assertQueueConsistent()
+
+        self.review(second)
+        group = PendingReviewGroup.objects.get(queue="practice")
+        submitted_at = PracticeAttempt.objects.get(id=first).submitted_at
+        self.assertEqual((group.pending_count, group.latest_submitted_at), (1, submitted_at))
+        self.review(exam_id)
+        body = self.groups()
+        self.assertEqual([row["assignment_id"] for row in body["data"]], [None])
+        self.assertEqual(body["summary"]["pending_total"], 1)
+        stats = ReviewQueueStats.objects.get(assignment=assignment)
+        self.assertEqual((stats.pending_total, stats.student_total, stats.latest_submitted_at), (0, 0, None))
+        self.assertQueueConsistent()
+
+    def test_expired_and_batch_reviewed_attempts(self):
+        assignment = self.create_assignment(question_type="subjective", question_count=1)
+        attempt_id, question_ids = self.start_exam(assignment)
+        PracticeAttempt.objects.filter(id=attempt_id).update(deadline_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(grading.finalize_expired_attempts(), 1)
+        self.assertEqual(ReviewQueueStats.objects.get(assignment=assignment).pending_total, 1)
+
+        item = PracticeAttemptItem.objects.get(attempt_id=attempt_id)
+        body = self.call(self.teacher_client, "post", f"/api/exam/practice/review/questions/{question_ids[0]}/", {
+            "items": [{"id": item.id, "awarded_score": 1}],
+        })
+        self.assertEqual(body["data"]["completed_attempts"], 1)
+        self.assertFalse(PendingReviewGroup.objects.exists())
+        self.assertEqual(ReviewQueueStats.objects.get(assignment=assignment).pending_total, 0)
+
+    def test_student_page_uses_cursor(self):
+        for index in range(3):
+            student = SysUser.objects.create_user(f"s{index}", "pw", email=f"s{index}@example.com", role="student")
+            client = APIClient()
+            client.force_authenticate(student)
+            self.submit_subjective_practice(client)
+        seen = []
+        params = {"page_size": 2}
+        while True:
+            body = self.groups(**params)
+            seen.extend(row["student_name"] for row in body["data"])
+            if not body["pagination"]["next_cursor"]:
+                break
+            params["cursor"] = body["pagination"]["next_cursor"]
+        self.assertEqual(seen, ["s2", "s1", "s0"])
+        self.groups(cursor="invalid", expect=400)
+
+    def test_rebuild_repairs_drift(self):
+        self.submit_subjective_practice()
+        PendingReviewGroup.objects.all().delete()
+        ReviewQueueStats.objects.filter(queue="practice").update(pending_total=5)
+        self.assertEqual(review_queue.rebuild_review_queue(), (1, 2))
+        self.assertEqual(PendingReviewGroup.objects.get().pending_count, 1)
+        self.assertEqual(ReviewQueueStats.objects.get(queue="practice").pending_total, 1)
+
+
+class BatchReviewTests(ExamTestCase):
+    def review_question(self, client, question_id, item, score=1):
+        return self.call(client, "post", f"/api/exam/practice/review/questions/{question_id}/", {
+            "items": [{"id": item.id, "awarded_score": score}],
+        })["data"]
+
+    def test_attempt_stays_pending_until_every_question_is_reviewed(self):
+        assignment = self.create_assignment(question_type="subjective", question_count=2)
+        attempt_id, question_ids = self.start_exam(assignment)
+        self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {"answers": []})
+        first, second = (
+            PracticeAttemptItem.objects.get(attempt_id=attempt_id, question_id=question_id) for question_id in question_ids
+        )
+        other = SysUser.objects.create_user("teacher2", "pw", email="teacher2@example.com", role="teacher")
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        self.assertEqual(self.review_question(other_client, question_ids[0], first)["skipped_items"], [first.id])
+
+        result = self.review_question(self.teacher_client, question_ids[0], first, score=100)
+        self.assertEqual((result["updated_items"], result["completed_attempts"]), (1, 0))
+        first.refresh_from_db()
+        self.assertEqual(first.awarded_score, first.expected_score)
+        self.assertTrue(PracticeAttempt.objects.get(id=attempt_id).is_review_required)
+        self.assertEqual(ReviewQueueStats.objects.get(assignment=assignment).pending_total, 1)
+
+        result = self.review_question(self.teacher_client, question_ids[1], second)
+        self.assertEqual(result["completed_attempts"], 1)
+        attempt = PracticeAttempt.objects.get(id=attempt_id)
+        self.assertFalse(attempt.is_review_required)
+        self.assertEqual(attempt.obtained_score, first.expected_score + 1)
+        stats = ExamAssignmentStats.objects.get(assignment=assignment)
+        self.assertEqual((stats.pending_reviews, stats.score_sum), (0, attempt.obtained_score))
+        self.assertEqual(ReviewQueueStats.objects.get(assignment=assignment).pending_total, 0)
+        self.assertEqual(self.review_question(self.teacher_client, question_ids[1], second)["skipped_items"], [second.id])
+
+
+class CursorPaginationTests(ExamTestCase):
+    """列表接口统一返回 data 列表与顶层 pagination，按 quizace.pagination 的游标翻页。"""
+
+    def collect(self, client, path, key=None, **params):
+        rows = []
+        params["page_size"] = 2
+        while True:
+            body = self.call(client, "get", path, params)
+            rows.extend(body["data"][key] if key else body["data"])
+            if not body["pagination"]["has_more"]:
+                return rows, body
+            params["cursor"] = body["pagination"]["next_cursor"]
+
+    def test_history(self):
+        attempt_ids = []
+        for _ in range(3):
+            attempt_id, _ = self.start_practice()
+            self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {"answers": []})
+            attempt_ids.append(attempt_id)
+        rows, body = self.collect(self.student_client, "/api/exam/practice/attempts/history/")
+        self.assertEqual([row["id"] for row in rows], attempt_ids[::-1])
+        self.assertEqual(body["pagination"]["total"], 3)
+
+    def test_wrong_book(self):
+        questions = list(Question.objects.filter(question_type="objective").order_by("id")[:3])
+        for question in questions:
+            WrongBookEntry.objects.create(user=self.student, subject=self.subject, question=question)
+        rows, body = self.collect(self.student_client, "/api/exam/wrong-book/items/", "results")
+        self.assertEqual([row["question"]["id"] for row in rows], [question.id for question in questions[::-1]])
+        self.assertEqual(body["pagination"]["total"], 3)
+        self.assertEqual(body["data"]["subjects"][0]["count"], 3)
+        self.call(self.student_client, "get", "/api/exam/wrong-book/items/", {"cursor": "invalid"}, 400)
+
+    def test_review_queues(self):
+        question_ids = []
+        for _ in range(3):
+            attempt_id, ids = self.start_practice(size=1, question_type="subjective")
+            self.call(self.student_client, "post", f"/api/exam/practice/attempts/{attempt_id}/submit/", {"answers": []})
+            question_ids.extend(ids)
+        rows, _ = self.collect(self.teacher_client, "/api/exam/practice/attempts/pending-review/teacher/")
+        self.assertEqual(len(rows), 3)
+        question_id = question_ids[0]
+        expected = PracticeAttemptItem.objects.filter(question_id=question_id).count()
+        rows, _ = self.collect(self.teacher_client, f"/api/exam/practice/review/questions/{question_id}/")
+        self.assertEqual(len(rows), expected)
+        for path in ("/api/exam/practice/attempts/pending-review/teacher/", f"/api/exam/practice/review/questions/{question_id}/"):
+            self.call(self.teacher_client, "get", path, {"cursor": "123"}, 400)
+
+
+class QuestionImportTests(ExamTestCase):
+    CSV = "科目,题型,题干,A,B,答案\n数学,客观题,导入题一,1,2,A\n数学,客观题,导入题二,1,2,B\n,客观题,缺少科目,1,2,A\n"
+
+    def run_import(self, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            return question_import.import_questions(
+                io.BytesIO(self.CSV.encode("utf-8")), teacher=self.teacher, fmt="csv", **options,
+            )
+
+    def test_import_reports_row_errors(self):
+        report = self.run_import()
+        self.assertEqual((report["total"], report["created"], report["failed"]), (3, 2, 1))
+        self.assertEqual(report["errors"][0]["row"], 4)
+        self.assertEqual(Question.objects.filter(content__startswith="导入题").count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import(dry_run=True)
+        self.assertEqual(report["created"], 2)
+        self.assertFalse(Question.objects.filter(content__startswith="导入题").exists())
+
+    def test_id_recovery_ignores_concurrent_questions(self):
+        bulk_create = Question.objects.bulk_create
+        concurrent = []
+
+        def bulk_create_without_pks(questions, *args, **kwargs):
+            # 模拟 MySQL：不回填主键，且同一教师的另一道题在本块之后写入
+            created = bulk_create(questions, *args, **kwargs)
+            concurrent.append(Question.objects.create(
+                subject=self.subject, question_type="objective", content="同时录入", answer="A", created_by=self.teacher,
+            ))
+            for question in created:
+                question.pk = None
+            return created
+
+        with mock.patch.object(Question.objects, "bulk_create", side_effect=bulk_create_without_pks), \
+                mock.patch.object(question_import, "index_questions") as index_questions:
+            report = self.run_import()
+        self.assertEqual(report["created"], 2)
+        expected_ids = set(Question.objects.filter(content__startswith="导入题").values_list("id", flat=True))
+        self.assertEqual(set(index_questions.call_args.args[0]), expected_ids)
+        self.assertNotIn(concurrent[0].id, index_questions.call_args.args[0])
+
+    @mock.patch.object(question_import, "JSON_MAX_ELEMENT_SIZE", 1024)
+    @mock.patch.object(question_import, "JSON_READ_SIZE", 256)
+    def test_unterminated_json_stops_at_element_limit(self):
+        element = json.dumps({"科目": "数学", "题型": "客观题", "题干": "正常题", "答案": "A"}, ensure_ascii=False)
+        for body in ("[" + element + ', {"题干": "' + "x" * 50000, element + "\n" + "x" * 50000):
+            data = body.encode("utf-8")
+            fileobj = io.BytesIO(data)
+            with self.assertRaises(question_import.ImportFileError):
+                list(question_import.iter_rows(fileobj, "json"))
+            # 超过上限即停止，不会把剩余内容读入内存
+            self.assertLess(fileobj.tell(), len(data))
+
+
+class QuestionSearchTests(ExamTestCase):
+    def add_question(self, content, analysis="", teacher=None):
+        return Question.objects.create(
+            subject=self.subject, question_type="subjective", content=content, analysis=analysis, answer="略",
+            created_by=teacher or self.teacher,
+        )
+
+    def search(self, query):
+        body = self.call(self.teacher_client, "get", "/api/exam/teacher/questions/", {"q": query})
+        return [(item["id"], item["highlight"]) for item in body["data"]]
+
+    def test_tokenize(self):
+        self.assertEqual(
+            question_search.tokenize("二次函数 Ｐython"),
+            ["二", "次", "函", "数", "二次", "次函", "函数", "python"],
+        )
+        self.assertEqual(question_search.word_prefixes("Python 3"), ["py", "pyt", "pyth", "pytho"])
+        self.assertEqual(question_search.tokenize_query("函数 函数 数"), ["函数", "数"])
+
+    def test_all_tokens_must_match_and_content_ranks_first(self):
+        in_analysis = self.add_question("求最值", analysis="利用二次函数的图像")
+        in_content = self.add_question("二次函数的图像与性质")
+        self.add_question("一次函数的图像")
+        self.assertEqual([question_id for question_id, _ in self.search("二次函数")], [in_content.id, in_analysis.id])
+
+    def test_prefix_matches_words(self):
+        question = self.add_question("用 Python 计算阶乘")
+        self.assertEqual([question_id for question_id, _ in self.search("pyth")], [question.id])
+        self.assertEqual(self.search("thon"), [])
+
+    def test_results_scoped_to_owner(self):
+        other = SysUser.objects.create_user("teacher2", "pw", email="teacher2@example.com", role="teacher")
+        self.add_question("三角函数的周期", teacher=other)
+        mine = self.add_question("三角函数的图像")
+        self.assertEqual([question_id for question_id, _ in self.search("三角函数")], [mine.id])
+
+    def test_highlight_merges_overlapping_tokens(self):
+        self.assertEqual(question_search.highlight("求二次函数的最值", "二次函数"), "求<mark>二次函数</mark>的最值")
+        self.assertEqual(
+            question_search.highlight("a<b 时求 Python 函数", "python 函数"),
+            "a&lt;b 时求 <mark>Python</mark> <mark>函数</mark>",
+        )
+
+    def test_save_reindexes_question(self):
+        question = self.add_question("等差数列求和")
+        question.content = "等比数列求和"
+        question.save(update_fields=["content"])
+        self.assertEqual(self.search("等差"), [])
+        self.assertEqual(self.search("等比"), [(question.id, "<mark>等比</mark>数列求和")])
+        question.status = "ready"
+        with mock.patch("exam.signals.index_questions") as index_questions:
+            question.save(update_fields=["status"])
+        index_questions.assert_not_called()
+
+
+class QuestionDedupTests(ExamTestCase):
+    CONTENT = "已知函数 f(x) = x^2 - 4x + 3，求函数在区间 [0, 3] 上的最小值"
+
+    def add_question(self, content, teacher=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Question.objects.create(
+                subject=self.subject, question_type="subjective", content=content, answer="略",
+                created_by=teacher or self.teacher,
+            )
+
+    def test_near_duplicates_found_and_clustered(self):
+        original = self.add_question(self.CONTENT)
+        near = self.add_question(self.CONTENT.replace("最小值", "最小值。"))
+        distinct = self.add_question("一辆汽车以每小时 60 千米的速度行驶 3 小时，求行驶的路程")
+        matches = dict(question_dedup.find_near_duplicates(self.subject.id, self.CONTENT, exclude_ids=[original.id]))
+        self.assertIn(near.id, matches)
+        self.assertNotIn(distinct.id, matches)
+        clusters = question_dedup.cluster_duplicates(subject_id=self.subject.id)
+        self.assertIn(sorted([original.id, near.id]), [sorted(cluster) for cluster in clusters])
+        self.assertFalse(any(distinct.id in cluster for cluster in clusters))
+
+    def test_payload_hides_other_teachers_questions(self):
+        other = SysUser.objects.create_user("teacher2", "pw", email="teacher2@example.com", role="teacher")
+        theirs = self.add_question(self.CONTENT, teacher=other)
+        mine = self.add_question(self.CONTENT + "。")
+        body = self.call(self.teacher_client, "post", "/api/exam/teacher/questions/create/", {
+            "subject": self.subject.name,
+            "question_type": "subjective",
+            "content": self.CONTENT,
+            "answer": "略",
+        }, 201)
+        duplicates = {item["id"]: item for item in body["duplicates"]}
+        self.assertEqual(duplicates[mine.id]["content"], mine.content)
+        self.assertTrue(duplicates[mine.id]["own"])
+        self.assertEqual(set(duplicates[theirs.id]), {"id", "similarity", "own"})
+
+
+class DraftQueueTests(ExamTestCase):
+    def add_draft(self):
+        return QuestionDraft.objects.create(
+            teacher=self.teacher, subject=self.subject, question_type="objective", source_mode="ocr", status="processing",
+        )
+
+    def process(self, draft, recognizer, worker="w1"):
+        self.assertEqual(draft_queue.claim_drafts(worker, 5), [draft.id])
+        return draft_queue.process_draft(draft.id, worker, recognizer)
+
+    @staticmethod
+    def broken(draft, report_progress):
+        raise OSError("timeout")
+
+    def test_claimed_draft_is_not_claimed_twice(self):
+        draft = self.add_draft()
+        self.assertEqual(draft_queue.claim_drafts("w1", 5), [draft.id])
+        self.assertEqual(draft_queue.claim_drafts("w2", 5), [])
+        self.assertEqual(draft_queue.queue_position(QuestionDraft.objects.get(id=draft.id)), 0)
+
+    def test_failure_backs_off_then_succeeds(self):
+        draft = self.add_draft()
+        with self.assertLogs("exam.draft_queue", "ERROR"):
+            self.assertEqual(self.process(draft, self.broken), "retry")
+        draft.refresh_from_db()
+        self.assertEqual((draft.status, draft.locked_by, draft.attempts), ("processing", "", 1))
+        self.assertGreater(draft.next_attempt_at, timezone.now())
+        self.assertEqual(draft_queue.claim_drafts("w1", 5), [])
+
+        QuestionDraft.objects.filter(id=draft.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+        def recognize(draft, report_progress):
+            report_progress(50)
+            return {"content": "1+1=?", "options": ["1", "2"], "answer": "B"}
+
+        self.assertEqual(self.process(draft, recognize), "parsed")
+        draft.refresh_from_db()
+        self.assertEqual((draft.status, draft.progress, draft.parsed_answer, draft.next_attempt_at), ("parsed", 100, "B", None))
+
+    @override_settings(EXAM_OCR_MAX_ATTEMPTS=1)
+    def test_permanent_failures(self):
+        draft = self.add_draft()
+        with self.assertLogs("exam.draft_queue", "ERROR"):
+            self.assertEqual(self.process(draft, self.broken), "failed")
+        other = self.add_draft()
+
+        def unreadable(draft, report_progress):
+            raise RecognitionError("无法识别")
+
+        self.assertEqual(self.process(other, unreadable), "failed")
+        self.assertEqual(QuestionDraft.objects.get(id=other.id).error_message, "无法识别")
+
+    def test_teacher_edit_during_recognition_wins(self):
+        draft = self.add_draft()
+
+        def edited_meanwhile(draft, report_progress):
+            QuestionDraft.objects.filter(id=draft.id).update(status="parsed", parsed_content="教师手动录入")
+            return {"content": "识别结果"}
+
+        self.assertEqual(self.process(draft, edited_meanwhile), "skipped")
+        self.assertEqual(QuestionDraft.objects.get(id=draft.id).parsed_content, "教师手动录入")
+
+    def test_progress_renews_lease(self):
+        draft = self.add_draft()
+        stale = timezone.now() - timedelta(seconds=600)
+
+        def slow(draft, report_progress):
+            # 识别已超过认领时长，上报进度后其他线程仍不能接手
+            QuestionDraft.objects.filter(id=draft.id).update(locked_at=stale)
+            report_progress(60)
+            self.assertEqual(draft_queue.claim_drafts("w2", 5), [])
+            return {"content": "识别结果"}
+
+        self.assertEqual(self.process(draft, slow), "parsed")
+
+    @override_settings(EXAM_OCR_MAX_ATTEMPTS=2)
+    def test_crashed_draft_fails_after_max_attempts(self):
+        draft = self.add_draft()
+        stale = timezone.now() - timedelta(seconds=600)
+        for worker in ("w1", "w2"):
+            # 认领后进程崩溃，认领超时后被重新认领
+            self.assertEqual(draft_queue.claim_drafts(worker, 5), [draft.id])
+            QuestionDraft.objects.filter(id=draft.id).update(locked_at=stale)
+        self.assertEqual(draft_queue.claim_drafts("w3", 5), [])
+        draft.refresh_from_db()
+        self.assertEqual((draft.status, draft.attempts, draft.locked_by), ("failed", 2, ""))
+
+    def test_stopped_pool_claims_nothing(self):
+        draft = self.add_draft()
+        stop_event = threading.Event()
+        stop_event.set()
+        pool = draft_queue.DraftWorkerPool(workers=1, recognizer=self.broken)
+        self.assertEqual(pool.run(loop=True, interval=0.01, stop_event=stop_event), {})
+        self.assertEqual(QuestionDraft.objects.get(id=draft.id).attempts, 0)
+
+
+class QueryBudgetTests(ExamTestCase):
+    """接口的查询次数不超过视图声明的 query_budget，且不随数据量增长。"""
+
+    def add_student_attempts(self, count):
+        for _ in range(count):
+            self.start_practice()
+        assignment = self.create_assignment()
+        self.start_exam(assignment)
+
+    def add_assignments(self, count):
+        for index in range(count):
+            assignment = self.create_assignment(title=f"考试{index}")
+            self.start_exam(assignment)
+
+    def uncached_get(self, client, path):
+        def request():
+            cache.clear()
+            return client.get(path)
+        return request
+
+    def test_ongoing(self):
+        path = "/api/exam/practice/attempts/ongoing/"
+        self.add_student_attempts(1)
+        assert_query_budget(self.student_client, "get", path)
+        assert_queries_do_not_grow(self.uncached_get(self.student_client, path), grow=lambda: self.add_student_attempts(5))
+        response = assert_query_budget(self.student_client, "get", path)
+        self.assertEqual(len(response.json()["data"]), 8)
+
+    def test_assignment_list(self):
+        path = "/api/exam/assignments/"
+        self.add_assignments(1)
+        assert_query_budget(self.teacher_client, "get", path)
+        assert_queries_do_not_grow(self.uncached_get(self.teacher_client, path), grow=lambda: self.add_assignments(5))
+        assert_query_budget(self.teacher_client, "get", path)
+
+    def test_available(self):
+        path = "/api/exam/assignments/available/"
+        self.add_assignments(1)
+        cache.clear()
+        assert_query_budget(self.student_client, "get", path)
+        assert_queries_do_not_grow(self.uncached_get(self.student_client, path), grow=lambda: self.add_assignments(5))
+        cache.clear()
+        response = assert_query_budget(self.student_client, "get", path)
+        self.assertEqual(len(response.json()["data"]), 6)
+
+    def test_exceeding_budget_fails(self):
+        with self.assertRaises(AssertionError):
+            assert_query_budget(self.student_client, "get", "/api/exam/practice/attempts/ongoing/", budget=0)
@@ -16,9 +16,11 @@ from .views import (
     PracticeAttemptTeacherDetailView,
     PracticeAttemptTeacherPendingReviewView,
     PracticeAttemptTeacherStudentPendingView,
+    QuestionBatchReviewView,
     QuestionPracticeView,
     TeacherQuestionSubjectSummaryView,
     TeacherQuestionCreateView,
+    TeacherQuestionImportView,
     QuestionImageUploadView,
     TeacherQuestionDraftDetailView,
     TeacherQuestionDraftListView,
@@ -46,12 +48,14 @@ urlpatterns = [
     path('practice/attempts/<int:attempt_id>/submit/', PracticeAttemptSubmitView.as_view()),
     path('practice/attempts/<int:attempt_id>/teacher/', PracticeAttemptTeacherDetailView.as_view()),
     path('practice/attempts/<int:attempt_id>/review/', PracticeAttemptReviewView.as_view()),
+    path('practice/review/questions/<int:question_id>/', QuestionBatchReviewView.as_view()),
     path('wrong-book/items/', WrongBookEntryListView.as_view()),
     path('wrong-book/items/<int:entry_id>/', WrongBookEntryDetailView.as_view()),
     path('teacher/questions/', TeacherQuestionListView.as_view()),
     path('teacher/questions/<int:question_id>/', TeacherQuestionDetailView.as_view()),
     path('teacher/questions/subjects/', TeacherQuestionSubjectSummaryView.as_view()),
     path('teacher/questions/create/', TeacherQuestionCreateView.as_view()),
+    path('teacher/questions/import/', TeacherQuestionImportView.as_view()),
     path('teacher/questions/image-upload/', QuestionImageUploadView.as_view()),
     path('teacher/questions/drafts/', TeacherQuestionDraftListView.as_view()),
     path('teacher/questions/drafts/<int:draft_id>/', TeacherQuestionDraftDetailView.as_view()),
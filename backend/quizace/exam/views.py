@@ -1,12 +1,8 @@
 import json
-from collections import OrderedDict
-from datetime import timedelta
-from random import sample
-from typing import Dict, List, Optional, Tuple
-
-from django.db import transaction
-from django.db.models import Q, QuerySet, Count, Max
-from django.db.models.functions import TruncDate
+from typing import Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Count, Max
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -15,7 +11,29 @@ from rest_framework.parsers import FormParser, MultiPartParser, JSONParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from quizace.pagination import keyset_page, paginate_request, parse_page_size
+from user.models import ClassRoster
+
+from .activity import (
+    ACTIVITY_TREND_MAX_DAYS,
+    load_activity_trend,
+    record_activity_completed,
+    record_activity_score_change,
+    record_wrong_book_added,
+)
+from .answer_buffer import append_answers, flush_buffered_answers, is_autosave_buffered, write_answers
+from .assignment_feed import (
+    can_view_assignment,
+    get_student_feed,
+    invalidate_student_feeds,
+    set_assignment_rosters,
+    student_assignment_queryset,
+)
+from .assignment_stats import record_attempt_reviewed, record_attempts_submitted, stats_payload
+from .batch_review import batch_review_question, pending_question_items
 from .constants import OBJECTIVE_SCORE_PER_QUESTION, resolve_score
+from .draft_queue import queue_position
+from .grading import ensure_attempt_expiration, evaluate_attempt_items
 from .models import (
     ExamAssignment,
     PracticeAttempt,
@@ -27,19 +45,49 @@ from .models import (
     Subject,
     WrongBookEntry,
 )
+from .papers import (
+    claim_prepared_paper,
+    create_attempt_with_questions,
+    discard_prepared_papers,
+    get_expire_time,
+    get_remaining_seconds,
+    resolve_assignment_questions,
+    strip_solutions,
+    write_attempt_paper,
+)
+from .question_cache import render_questions
+from .question_pool import sample_ready_questions
+from .question_dedup import duplicate_payload, find_near_duplicates
+from .question_import import ImportFileError, detect_format, import_questions
+from .question_search import search_questions
+from .review_queue import (
+    REVIEW_QUEUE_MAX_PAGE_SIZE,
+    parse_scope,
+    pending_attempt_page,
+    pending_student_page,
+    queue_summary,
+    record_pending_reviews,
+    record_reviews_completed,
+    serialize_pending_attempt,
+)
 from .serializers import (
+    ATTEMPT_ITEM_RENDER_FIELDS,
     ExamAssignmentSerializer,
-    PracticeAttemptItemSerializer,
     PracticeAttemptSerializer,
-    PracticeQuestionSerializer,
     QuestionCreateSerializer,
     QuestionDraftSerializer,
     QuestionSerializer,
     SubjectSerializer,
     WrongBookEntrySerializer,
+    serialize_attempt_items,
+    serialize_attempts,
+    serialize_questions,
 )
+from .teacher_dashboard import get_teacher_dashboard, invalidate_dashboards_for_attempts
 
 
+QUESTION_LIST_MAX_PAGE_SIZE = 100
+
 QUESTION_DEFAULT_SIZE = {
     "objective": 10,
     "subjective": 5,
@@ -63,31 +111,24 @@ def resolve_subject_identifier(value):
         except Subject.DoesNotExist as exc:
             raise ValueError("科目不存在") from exc
 
-def get_expire_time(attempt: PracticeAttempt):
-    return attempt.started_at + timedelta(seconds=attempt.duration_seconds)
-
-
-def get_remaining_seconds(attempt: PracticeAttempt):
-    expire_time = get_expire_time(attempt)
-    remaining = int((expire_time - timezone.now()).total_seconds())
-    return expire_time, max(0, remaining)
+def build_answer_map(answers) -> Dict[int, str]:
+    return {
+        int(item.get("question_id")): (item.get("user_answer") or "")
+        for item in answers
+        if item.get("question_id") is not None
+    }
 
 
-def build_questions(subject: Subject, question_type: str, size: int) -> Tuple[List[Question], int]:
-    questions_qs: QuerySet[Question] = Question.objects.filter(
-        subject=subject,
-        question_type=question_type,
-        status="ready",
-    )
-    total = questions_qs.count()
-    if total == 0:
-        raise ValueError("该科目暂无该类型题目")
-    select_count = min(size, total)
-    question_pool = list(questions_qs)
-    if total <= select_count:
-        return question_pool, total
-    selected = sample(question_pool, select_count)
-    return selected, select_count
+def parse_answer_revision(value) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        revision = int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("作答版本号格式不正确") from exc
+    if revision <= 0:
+        raise ValueError("作答版本号格式不正确")
+    return revision
 
 
 def get_user_wrong_question_ids(user, question_ids: List[int]):
@@ -115,66 +156,6 @@ def build_solution_visibility_map(attempt: PracticeAttempt):
     return base
 
 
-def create_attempt_with_questions(
-    *,
-    user,
-    subject: Subject,
-    question_type: str,
-    size: int,
-    duration_seconds: int,
-    mode: str = "practice",
-    assignment: Optional[ExamAssignment] = None,
-    preset_questions: Optional[List[Question]] = None,
-    score_overrides: Optional[Dict[int, int]] = None,
-):
-    score_overrides = score_overrides or {}
-    if preset_questions is None:
-        if question_type == "mixed":
-            raise ValueError("综合试卷必须提供固定题目")
-        questions, _ = build_questions(subject, question_type, size)
-    else:
-        questions = list(preset_questions)
-
-    question_scores = []
-    total_score = 0
-    for question in questions:
-        score_value = score_overrides.get(question.id)
-        if score_value is None:
-            score_value = resolve_score(question.question_type, question.score)
-        question_scores.append((question, score_value))
-        total_score += score_value
-
-    with transaction.atomic():
-        attempt = PracticeAttempt.objects.create(
-            user=user,
-            subject=subject,
-            question_type=question_type,
-            duration_seconds=duration_seconds,
-            total_questions=len(questions),
-            total_score=total_score,
-            mode=mode,
-            assignment=assignment,
-        )
-        for index, (question, score_value) in enumerate(question_scores, start=1):
-            PracticeAttemptItem.objects.create(
-                attempt=attempt,
-                question=question,
-                order=index,
-                expected_score=score_value,
-            )
-
-    serializer = PracticeQuestionSerializer([q for q, _ in question_scores], many=True)
-    question_payload = serializer.data
-    for index, payload in enumerate(question_payload, start=1):
-        payload["order"] = index
-        override_score = score_overrides.get(payload["id"])
-        if override_score is not None:
-            payload["score"] = override_score
-
-    expires_at, remaining = get_remaining_seconds(attempt)
-    return attempt, question_payload, expires_at, remaining
-
-
 def parse_to_aware_datetime(value: Optional[str]):
     if not value:
         return None
@@ -186,72 +167,11 @@ def parse_to_aware_datetime(value: Optional[str]):
     return dt
 
 
-def evaluate_attempt_items(
-    attempt: PracticeAttempt,
-    answer_map: Optional[Dict[int, str]] = None,
-):
-    items = list(attempt.items.select_related("question"))
-    correct_count = 0
-    obtained_score = 0
-    total_score_value = 0
-    has_subjective = False
-
-    for item in items:
-        if answer_map is not None:
-            item.user_answer = answer_map.get(item.question_id, "")
-
-        question_score = item.expected_score or resolve_score(item.question.question_type, item.question.score)
-        total_score_value += question_score
-        if item.question.question_type == "objective":
-            normalized_answer = (item.user_answer or "").strip().upper()
-            correct_answer = (item.question.answer or "").strip().upper()
-            item.is_correct = bool(normalized_answer) and normalized_answer == correct_answer
-            if item.is_correct:
-                correct_count += 1
-                item.awarded_score = question_score
-                obtained_score += question_score
-            else:
-                item.awarded_score = 0
-        else:
-            has_subjective = True
-            item.is_correct = None
-
-    PracticeAttemptItem.objects.bulk_update(items, ["user_answer", "is_correct", "awarded_score"])
-    return items, correct_count, obtained_score, total_score_value, has_subjective
-
-
-def ensure_attempt_expiration(attempt: PracticeAttempt):
-    expire_time, remaining = get_remaining_seconds(attempt)
-    if attempt.status == "ongoing" and remaining <= 0:
-        if attempt.question_type == "objective":
-            items, correct_count, obtained_score, total_score_value = evaluate_attempt_items(attempt)
-            attempt.correct_count = correct_count
-            attempt.total_score = total_score_value
-            attempt.obtained_score = obtained_score
-            fields = [
-                "correct_count",
-                "total_score",
-                "obtained_score",
-                "status",
-                "submitted_at",
-            ]
-        else:
-            items = None
-            attempt.total_score = 0
-            fields = ["total_score", "status", "submitted_at", "is_review_required"]
-        attempt.status = "expired"
-        attempt.submitted_at = timezone.now()
-        if attempt.question_type == "subjective":
-            attempt.is_review_required = True
-        attempt.save(update_fields=fields)
-        return expire_time, remaining, items
-    return expire_time, remaining, None
-
-
 class SubjectListView(APIView):
     """返回所有可选科目。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     def get(self, request):
         subjects = Subject.objects.all().order_by("name")
@@ -267,6 +187,7 @@ class QuestionPracticeView(APIView):
     """按照科目和题型随机返回题目。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def get(self, request):  # type: ignore[override]
         subject_id = request.GET.get("subject_id")
@@ -284,30 +205,14 @@ class QuestionPracticeView(APIView):
         except Subject.DoesNotExist:
             return Response({"code": 404, "info": "科目不存在", "data": []})
 
-        questions: QuerySet[Question] = Question.objects.filter(
-            subject=subject,
-            question_type=question_type,
-            status="ready",
-        )
-
-        if not questions.exists():
+        selected = sample_ready_questions(subject.id, question_type, size)
+        if not selected:
             return Response({"code": 404, "info": "该科目暂无符合条件的题目", "data": []})
 
-        total = questions.count()
-        count = min(size, total)
-
-        if total <= count:
-            selected = list(questions)
-        else:
-            ids = list(questions.values_list("id", flat=True))
-            selected_ids = sample(ids, count)
-            selected = list(questions.filter(id__in=selected_ids))
-
-        serializer = QuestionSerializer(selected, many=True)
         return Response({
             "code": 200,
             "info": "获取题目成功",
-            "data": serializer.data,
+            "data": serialize_questions(selected, render_questions(selected, with_solution=True)),
         })
 
 
@@ -382,6 +287,13 @@ class PracticeAttemptSubmitView(APIView):
         answers = request.data.get("answers", [])
         if not isinstance(answers, list):
             return Response({"code": 400, "info": "答案格式不正确"})
+        changes = request.data.get("changes")
+        if changes is not None and not isinstance(changes, list):
+            return Response({"code": 400, "info": "答案格式不正确"})
+        try:
+            revision = parse_answer_revision(request.data.get("revision"))
+        except ValueError as exc:
+            return Response({"code": 400, "info": str(exc)})
 
         with transaction.atomic():
             try:
@@ -394,36 +306,47 @@ class PracticeAttemptSubmitView(APIView):
 
             if attempt.status in {"completed", "expired"}:
                 serializer = PracticeAttemptSerializer(attempt)
-                items_qs = attempt.items.select_related("question")
-                question_ids = list(items_qs.values_list("question_id", flat=True))
-                wrong_ids = get_user_wrong_question_ids(request.user, question_ids)
-                items = PracticeAttemptItemSerializer(
-                    items_qs,
-                    many=True,
+                items = list(attempt.items.only(*ATTEMPT_ITEM_RENDER_FIELDS))
+                wrong_ids = get_user_wrong_question_ids(request.user, [item.question_id for item in items])
+                item_data = serialize_attempt_items(
+                    attempt,
+                    items=items,
                     context={
-                            "solution_visibility": build_solution_visibility_map(attempt),
+                        "solution_visibility": build_solution_visibility_map(attempt),
                         "wrong_question_ids": wrong_ids,
                     },
                 )
                 return Response({
                     "code": 200,
                     "info": "该练习已提交",
-                    "data": {"attempt": serializer.data, "items": items.data},
+                    "data": {"attempt": serializer.data, "items": item_data},
                 })
 
-            answer_map = {
-                int(item.get("question_id")): (item.get("user_answer") or "")
-                for item in answers
-                if item.get("question_id") is not None
-            }
+            update_fields = ["status", "submitted_at", "total_score", "correct_count", "obtained_score"]
+            answer_map = None
+            answer_updates = None
+            if changes is not None:
+                # 增量提交：版本号过期时忽略这批修改，以已保存的最新作答为准
+                if revision is None or revision > attempt.answer_revision:
+                    answer_updates = build_answer_map(changes)
+                    if revision is not None:
+                        attempt.answer_revision = revision
+                        update_fields.append("answer_revision")
+            else:
+                answer_map = build_answer_map(answers) or None
 
             now = timezone.now()
             expire_time = get_expire_time(attempt)
             is_expired = now > expire_time
 
-            items, correct_count, obtained_score, total_score_value, has_subjective = evaluate_attempt_items(attempt, answer_map)
+            # 先合并缓冲中的自动保存；未携带答案的提交以已保存的作答为准
+            flush_buffered_answers([attempt.id])
+            items, correct_count, obtained_score, total_score_value, has_subjective = evaluate_attempt_items(
+                attempt,
+                answer_map,
+                answer_updates,
+            )
 
-            update_fields = ["status", "submitted_at", "total_score", "correct_count", "obtained_score"]
             attempt.correct_count = correct_count
             attempt.total_score = total_score_value
             attempt.obtained_score = obtained_score
@@ -435,13 +358,19 @@ class PracticeAttemptSubmitView(APIView):
             attempt.status = "expired" if is_expired else "completed"
             attempt.submitted_at = now
             attempt.save(update_fields=update_fields)
+            record_attempts_submitted([attempt])
+            record_pending_reviews([attempt])
+            record_activity_completed([attempt])
+            invalidate_dashboards_for_attempts([attempt])
+        if attempt.assignment_id:
+            invalidate_student_feeds([attempt.user_id])
 
         serializer = PracticeAttemptSerializer(attempt)
         question_ids = [item.question_id for item in items]
         wrong_ids = get_user_wrong_question_ids(request.user, question_ids)
-        item_serializer = PracticeAttemptItemSerializer(
-            items,
-            many=True,
+        item_data = serialize_attempt_items(
+            attempt,
+            items=items,
             context={
                 "solution_visibility": build_solution_visibility_map(attempt),
                 "wrong_question_ids": wrong_ids,
@@ -453,7 +382,7 @@ class PracticeAttemptSubmitView(APIView):
             "info": "练习提交成功" if not is_expired else "练习已超时并自动提交",
             "data": {
                 "attempt": serializer.data,
-                "items": item_serializer.data,
+                "items": item_data,
             },
         })
 
@@ -462,22 +391,25 @@ class PracticeAttemptDetailView(APIView):
     """查看单次练习详情。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = 10
 
     def get(self, request, attempt_id: int):
         try:
-            attempt = PracticeAttempt.objects.get(id=attempt_id, user=request.user)
+            attempt = PracticeAttempt.objects.select_related("subject", "user", "assignment").get(
+                id=attempt_id, user=request.user
+            )
         except PracticeAttempt.DoesNotExist:
             return Response({"code": 404, "info": "练习不存在"})
 
-        expire_time, remaining, _ = ensure_attempt_expiration(attempt)
-        attempt.refresh_from_db()
+        expire_time, remaining = get_remaining_seconds(attempt)
+        if attempt.status == "ongoing":
+            flush_buffered_answers([attempt.id])
         serializer = PracticeAttemptSerializer(attempt)
-        items_qs = attempt.items.select_related("question")
-        question_ids = list(items_qs.values_list("question_id", flat=True))
-        wrong_ids = get_user_wrong_question_ids(request.user, question_ids)
-        item_serializer = PracticeAttemptItemSerializer(
-            items_qs,
-            many=True,
+        items = list(attempt.items.only(*ATTEMPT_ITEM_RENDER_FIELDS))
+        wrong_ids = get_user_wrong_question_ids(request.user, [item.question_id for item in items])
+        item_data = serialize_attempt_items(
+            attempt,
+            items=items,
             context={
                 "solution_visibility": build_solution_visibility_map(attempt),
                 "wrong_question_ids": wrong_ids,
@@ -488,7 +420,7 @@ class PracticeAttemptDetailView(APIView):
             "info": "获取练习详情成功",
             "data": {
                 "attempt": serializer.data,
-                "items": item_serializer.data,
+                "items": item_data,
                 "expires_at": expire_time,
                 "remaining_seconds": remaining,
             },
@@ -499,6 +431,7 @@ class PracticeAttemptHistoryView(APIView):
     """返回学生历史练习记录。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = 6
 
     def get(self, request):
         subject_id = request.GET.get("subject_id")
@@ -506,8 +439,6 @@ class PracticeAttemptHistoryView(APIView):
         status = request.GET.get("status")
         mode = request.GET.get("mode")
         limit_raw = request.GET.get("limit")
-        page_raw = request.GET.get("page")
-        page_size_raw = request.GET.get("page_size") or limit_raw
 
         attempts = PracticeAttempt.objects.filter(user=request.user)
         if subject_id:
@@ -521,34 +452,18 @@ class PracticeAttemptHistoryView(APIView):
         if mode in {"practice", "exam"}:
             attempts = attempts.filter(mode=mode)
 
-        def parse_positive_int(value, default):
-            if value is None:
-                return default
-            try:
-                parsed = int(value)
-            except (TypeError, ValueError):
-                return default
-            return parsed if parsed > 0 else default
-
-        page = parse_positive_int(page_raw, 1)
-        page_size = parse_positive_int(page_size_raw, 10)
-
-        attempts = attempts.order_by("-started_at")
-        total = attempts.count()
-        if page_size:
-            start = (page - 1) * page_size
-            end = start + page_size
-            attempts = attempts[start:end]
-        serializer = PracticeAttemptSerializer(attempts, many=True)
+        page_size = parse_page_size(request.GET.get("page_size") or limit_raw, 10)
+        try:
+            records, pagination = keyset_page(
+                attempts, ordering=("-started_at", "-id"), cursor=request.GET.get("cursor") or None, page_size=page_size,
+            )
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
         return Response({
             "code": 200,
             "info": "获取历史记录成功",
-            "data": {
-                "results": serializer.data,
-                "total": total,
-                "page": page,
-                "page_size": page_size,
-            },
+            "data": serialize_attempts(records),
+            "pagination": {**pagination, "total": attempts.count()},
         })
 
 
@@ -556,17 +471,21 @@ class PracticeAttemptOngoingView(APIView):
     """进行中的练习列表。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def get(self, request):
         mode = request.GET.get("mode")
-        attempts = PracticeAttempt.objects.filter(user=request.user, status="ongoing").order_by("-started_at")
+        # 超时的练习由 sweep_expired_attempts 收卷，这里只按截止时间过滤
+        attempts = (
+            PracticeAttempt.objects.filter(user=request.user, status="ongoing", deadline_at__gt=timezone.now())
+            .select_related("subject", "assignment")
+            .order_by("-started_at")
+        )
         if mode in {"practice", "exam"}:
             attempts = attempts.filter(mode=mode)
         data = []
         for attempt in attempts:
-            expire_time, remaining, _ = ensure_attempt_expiration(attempt)
-            if attempt.status != "ongoing":
-                continue
+            expire_time, remaining = get_remaining_seconds(attempt)
             data.append({
                 "id": attempt.id,
                 "subject_id": attempt.subject_id,
@@ -576,9 +495,9 @@ class PracticeAttemptOngoingView(APIView):
                 "started_at": attempt.started_at,
                 "expires_at": expire_time,
                 "remaining_seconds": remaining,
-                 "mode": attempt.mode,
-                 "assignment_id": attempt.assignment_id,
-                 "assignment_title": attempt.assignment.title if attempt.assignment else None,
+                "mode": attempt.mode,
+                "assignment_id": attempt.assignment_id,
+                "assignment_title": attempt.assignment.title if attempt.assignment else None,
             })
         return Response({
             "code": 200,
@@ -591,6 +510,7 @@ class PracticeAttemptPendingReviewView(APIView):
     """主观题等待教师批阅的练习。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def get(self, request):
         mode = request.GET.get("mode")
@@ -599,7 +519,7 @@ class PracticeAttemptPendingReviewView(APIView):
             question_type__in=["subjective", "mixed"],
             is_review_required=True,
             status__in=["completed", "expired"],
-        ).order_by("-submitted_at")
+        ).select_related("subject", "assignment").order_by("-submitted_at")
 
         if mode in {"practice", "exam"}:
             attempts = attempts.filter(mode=mode)
@@ -630,10 +550,39 @@ class PracticeAttemptSaveAnswersView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, attempt_id: int):
+        if "revision" in request.data:
+            return self.save_changes(request, attempt_id)
+
         answers = request.data.get("answers", [])
         if not isinstance(answers, list):
             return Response({"code": 400, "info": "答案格式不正确"})
 
+        answer_map = build_answer_map(answers)
+
+        if is_autosave_buffered():
+            # 缓冲模式：不加锁、不读取题目，只追加一条作答日志
+            attempt = (
+                PracticeAttempt.objects.filter(id=attempt_id, user=request.user)
+                .only("id", "status", "started_at", "duration_seconds")
+                .first()
+            )
+            if attempt is None:
+                return Response({"code": 404, "info": "练习不存在"})
+            if attempt.status != "ongoing":
+                return Response({"code": 400, "info": "练习已结束"})
+            expire_time, remaining = get_remaining_seconds(attempt)
+            if remaining > 0:
+                if answer_map:
+                    append_answers(attempt, answer_map)
+                return Response({
+                    "code": 200,
+                    "info": "作答已保存",
+                    "data": {
+                        "remaining_seconds": remaining,
+                        "expires_at": expire_time,
+                    },
+                })
+
         with transaction.atomic():
             try:
                 attempt = PracticeAttempt.objects.select_for_update().get(
@@ -647,12 +596,6 @@ class PracticeAttemptSaveAnswersView(APIView):
             if attempt.status != "ongoing":
                 return Response({"code": 400, "info": "练习已结束"})
 
-            answer_map = {
-                int(item.get("question_id")): (item.get("user_answer") or "")
-                for item in answers
-                if item.get("question_id") is not None
-            }
-
             items_to_update = []
             for item in attempt.items.all():
                 if item.question_id in answer_map:
@@ -673,30 +616,85 @@ class PracticeAttemptSaveAnswersView(APIView):
             },
         })
 
+    def save_changes(self, request, attempt_id: int):
+        """增量保存：只提交修改过的题目和递增的版本号，过期版本会被拒绝。"""
+        try:
+            revision = parse_answer_revision(request.data.get("revision"))
+        except ValueError as exc:
+            return Response({"code": 400, "info": str(exc)})
+        if revision is None:
+            return Response({"code": 400, "info": "缺少作答版本号"})
+        changes = request.data.get("changes", [])
+        if not isinstance(changes, list):
+            return Response({"code": 400, "info": "答案格式不正确"})
+        answer_map = build_answer_map(changes)
+
+        attempt = (
+            PracticeAttempt.objects.filter(id=attempt_id, user=request.user)
+            .only("id", "status", "started_at", "duration_seconds", "answer_revision")
+            .first()
+        )
+        if attempt is None:
+            return Response({"code": 404, "info": "练习不存在"})
+        if attempt.status != "ongoing":
+            return Response({"code": 400, "info": "练习已结束"})
+        expire_time, remaining = get_remaining_seconds(attempt)
+        if remaining <= 0:
+            with transaction.atomic():
+                attempt = PracticeAttempt.objects.select_for_update().get(id=attempt.id)
+                ensure_attempt_expiration(attempt)
+            return Response({"code": 400, "info": "练习已结束"})
+
+        with transaction.atomic():
+            # 条件更新保证版本号单调递增，并发或乱序到达的旧版本不会覆盖新作答
+            accepted = PracticeAttempt.objects.filter(
+                id=attempt.id,
+                status="ongoing",
+                answer_revision__lt=revision,
+            ).update(answer_revision=revision)
+            if accepted and answer_map:
+                if is_autosave_buffered():
+                    append_answers(attempt, answer_map)
+                else:
+                    write_answers(attempt.id, answer_map)
+
+        if not accepted:
+            current = PracticeAttempt.objects.filter(id=attempt.id).values("status", "answer_revision").first()
+            if current["status"] != "ongoing":
+                return Response({"code": 400, "info": "练习已结束"})
+            return Response({
+                "code": 409,
+                "info": "作答版本已过期",
+                "data": {
+                    "accepted": False,
+                    "revision": current["answer_revision"],
+                    "remaining_seconds": remaining,
+                    "expires_at": expire_time,
+                },
+            })
+
+        return Response({
+            "code": 200,
+            "info": "作答已保存",
+            "data": {
+                "accepted": True,
+                "revision": revision,
+                "remaining_seconds": remaining,
+                "expires_at": expire_time,
+            },
+        })
+
 
 class WrongBookEntryListView(APIView):
-    """学生错题本：按科目返回或新增错题。"""
+    """学生错题本：按科目返回（游标翻页）或新增错题。"""
 
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 5}
 
     def get(self, request):
         subject_id = request.GET.get("subject_id")
-        page_raw = request.GET.get("page")
-        page_size_raw = request.GET.get("page_size")
-
-        def parse_positive_int(value, default):
-            if value is None:
-                return default
-            try:
-                parsed = int(value)
-            except (TypeError, ValueError):
-                return default
-            return parsed if parsed > 0 else default
-
-        page = parse_positive_int(page_raw, 1)
-        page_size = parse_positive_int(page_size_raw, 10)
 
-        base_qs = WrongBookEntry.objects.filter(user=request.user).select_related("subject", "question")
+        base_qs = WrongBookEntry.objects.filter(user=request.user).select_related("subject", "question", "question__subject")
         subject_summary = list(
             base_qs.values("subject_id", "subject__name")
             .annotate(total=Count("id"))
@@ -706,12 +704,16 @@ class WrongBookEntryListView(APIView):
         entries = base_qs
         if subject_id:
             entries = entries.filter(subject_id=subject_id)
-
-        entries = entries.order_by("-last_wrong_at", "-id")
-        total = entries.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        entries = entries[start:end]
+        try:
+            entries, pagination = paginate_request(
+                request, entries, ordering=("-last_wrong_at", "-id"), default_page_size=10,
+            )
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
+        # 总数取自科目汇总，不再单独 COUNT
+        pagination["total"] = sum(
+            item["total"] for item in subject_summary if not subject_id or str(item["subject_id"]) == subject_id
+        )
 
         serializer = WrongBookEntrySerializer(entries, many=True)
         subjects_payload = [
@@ -729,11 +731,9 @@ class WrongBookEntryListView(APIView):
             "info": "获取错题本成功",
             "data": {
                 "results": serializer.data,
-                "total": total,
-                "page": page,
-                "page_size": page_size,
                 "subjects": subjects_payload,
             },
+            "pagination": pagination,
         })
 
     def post(self, request):
@@ -776,7 +776,9 @@ class WrongBookEntryListView(APIView):
             },
         )
 
-        if not created:
+        if created:
+            record_wrong_book_added(request.user.id)
+        else:
             entry.subject = item.question.subject
             entry.last_attempt = item.attempt
             entry.last_attempt_item = item
@@ -802,6 +804,7 @@ class WrongBookEntryDetailView(APIView):
 
 class TeacherQuestionSubjectSummaryView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def get(self, request):
         if getattr(request.user, "role", "") != "teacher":
@@ -836,6 +839,7 @@ class TeacherQuestionSubjectSummaryView(APIView):
 
 class TeacherQuestionDraftListView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 3}
     parser_classes = (MultiPartParser, FormParser)
 
     def get(self, request):
@@ -843,13 +847,17 @@ class TeacherQuestionDraftListView(APIView):
             return Response({"code": 403, "info": "仅教师可操作"})
         status_value = request.GET.get("status")
         source_mode = request.GET.get("source_mode")
-        drafts = QuestionDraft.objects.filter(teacher=request.user)
+        drafts = QuestionDraft.objects.filter(teacher=request.user).select_related("subject", "teacher", "question")
         if status_value:
             drafts = drafts.filter(status=status_value)
         if source_mode in {item[0] for item in QUESTION_SOURCE_CHOICES}:
             drafts = drafts.filter(source_mode=source_mode)
+        try:
+            drafts, pagination = paginate_request(request, drafts, ordering=("-updated_at", "-id"))
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
         serializer = QuestionDraftSerializer(drafts, many=True)
-        return Response({"code": 200, "info": "获取草稿成功", "data": serializer.data})
+        return Response({"code": 200, "info": "获取草稿成功", "data": serializer.data, "pagination": pagination})
 
     def post(self, request):
         if getattr(request.user, "role", "") != "teacher":
@@ -899,8 +907,9 @@ class TeacherQuestionDraftDetailView(APIView):
         if getattr(request.user, "role", "") != "teacher":
             return Response({"code": 403, "info": "仅教师可操作"})
         draft = self.get_object(request, draft_id)
-        serializer = QuestionDraftSerializer(draft)
-        return Response({"code": 200, "info": "获取草稿成功", "data": serializer.data})
+        data = QuestionDraftSerializer(draft).data
+        data["queue_position"] = queue_position(draft)
+        return Response({"code": 200, "info": "获取草稿成功", "data": data})
 
     def patch(self, request, draft_id: int):
         if getattr(request.user, "role", "") != "teacher":
@@ -938,6 +947,9 @@ class TeacherQuestionDraftDetailView(APIView):
         media_url = request.data.get("media_url")
         if media_url is not None:
             payload["media_url"] = media_url
+        if payload.get("status") == "processing" and draft.status != "processing":
+            # 重新放回识别队列
+            payload.update(progress=0, attempts=0, next_attempt_at=None, locked_by="", locked_at=None)
         for key, value in payload.items():
             setattr(draft, key, value)
         draft.save()
@@ -1027,8 +1039,18 @@ class TeacherQuestionDraftPublishView(APIView):
         draft.subject = subject
         draft.save(update_fields=["status", "question", "subject", "updated_at"])
 
+        # 发布不受影响，只提示同科目中的近似重复题
+        duplicates = duplicate_payload(
+            find_near_duplicates(subject.id, question.content, question.options, exclude_ids=[question.id]),
+            request.user.id,
+        )
         question_serializer = QuestionSerializer(question)
-        return Response({"code": 200, "info": "题目已发布", "data": question_serializer.data})
+        return Response({
+            "code": 200,
+            "info": "题目已发布，题库中存在相似题目" if duplicates else "题目已发布",
+            "data": question_serializer.data,
+            "duplicates": duplicates,
+        })
 
 
 class QuestionImageUploadView(APIView):
@@ -1134,29 +1156,104 @@ class TeacherQuestionCreateView(APIView):
         serializer = QuestionCreateSerializer(data=question_data)
         if serializer.is_valid():
             question = serializer.save(created_by=request.user)
-            return Response({"code": 201, "info": "题目创建成功", "data": QuestionSerializer(question).data})
+            duplicates = duplicate_payload(
+                find_near_duplicates(subject.id, question.content, question.options, exclude_ids=[question.id]),
+                request.user.id,
+            )
+            return Response({
+                "code": 201,
+                "info": "题目创建成功",
+                "data": QuestionSerializer(question).data,
+                "duplicates": duplicates,
+            })
         else:
             return Response({"code": 400, "info": "题目创建失败", "errors": serializer.errors})
 
+class TeacherQuestionImportView(APIView):
+    """批量导入题目文件（CSV、XLSX 或 JSON），返回逐行校验结果；dry_run 为真时只校验不写入。"""
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+
+    def post(self, request):
+        if getattr(request.user, "role", "") != "teacher":
+            return Response({"code": 403, "info": "仅教师可操作"})
+        file_obj = request.FILES.get("file")
+        if not file_obj:
+            return Response({"code": 400, "info": "请上传题目文件"})
+        try:
+            fmt = detect_format(file_obj.name, request.data.get("format") or None)
+        except ImportFileError as exc:
+            return Response({"code": 400, "info": str(exc)})
+        dry_run = str(request.data.get("dry_run", "")).lower() in {"1", "true", "yes"}
+        report = import_questions(
+            file_obj,
+            teacher=request.user,
+            fmt=fmt,
+            default_subject=request.data.get("subject_id") or request.data.get("subject_name") or None,
+            dry_run=dry_run,
+        )
+        if report["aborted"] and not report["created"]:
+            return Response({"code": 400, "info": report["aborted"], "data": report})
+        info = "校验完成" if dry_run else "导入完成"
+        return Response({"code": 200, "info": info, "data": report})
+
+
 class TeacherQuestionListView(APIView):
+    """教师题库列表，按更新时间倒序游标分页；传入 q 时按检索得分排序、按页码分页，结果附带得分与高亮片段。"""
+
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def get(self, request):
         if getattr(request.user, "role", "") != "teacher":
             return Response({"code": 403, "info": "仅教师可操作"})
-        questions = Question.objects.filter(created_by=request.user)
+        filters = {}
         status_value = request.GET.get("status")
         question_type = request.GET.get("question_type")
         subject_id = request.GET.get("subject_id")
         if status_value:
-            questions = questions.filter(status=status_value)
+            filters["status"] = status_value
         if question_type in {"objective", "subjective"}:
-            questions = questions.filter(question_type=question_type)
+            filters["question_type"] = question_type
         if subject_id:
-            questions = questions.filter(subject_id=subject_id)
-        questions = questions.order_by("-updated_at")
-        serializer = QuestionSerializer(questions, many=True)
-        return Response({"code": 200, "info": "获取题目成功", "data": serializer.data})
+            filters["subject_id"] = subject_id
+
+        query = (request.GET.get("q") or "").strip()
+        if not query:
+            question_qs = Question.objects.filter(created_by=request.user, **filters)
+            try:
+                questions, pagination = paginate_request(
+                    request, question_qs, ordering=("-updated_at", "-id"), max_page_size=QUESTION_LIST_MAX_PAGE_SIZE,
+                )
+            except ValueError:
+                return Response({"code": 400, "info": "参数不正确"})
+            data = serialize_questions(questions, render_questions(questions, with_solution=True))
+            return Response({"code": 200, "info": "获取题目成功", "data": data, "pagination": pagination})
+
+        # 检索结果按相关度排序，得分不唯一且随题目修改而变化，仍按页码翻页
+        try:
+            page = max(1, int(request.GET.get("page") or 1))
+        except (TypeError, ValueError):
+            page = 1
+        page_size = parse_page_size(request.GET.get("page_size"), 20, QUESTION_LIST_MAX_PAGE_SIZE)
+        questions, matches, total = search_questions(
+            request.user, query, filters=filters, page=page, page_size=page_size,
+        )
+        data = serialize_questions(questions, render_questions(questions, with_solution=True))
+        for payload in data:
+            payload["search_score"], payload["highlight"] = matches[payload["id"]]
+        return Response({
+            "code": 200,
+            "info": "获取题目成功",
+            "data": data,
+            "pagination": {
+                "page": page,
+                "page_size": page_size,
+                "total": total,
+                "has_more": page * page_size < total,
+            },
+        })
 
 
 class TeacherQuestionDetailView(APIView):
@@ -1180,6 +1277,7 @@ class TeacherQuestionDetailView(APIView):
             return Response({"code": 400, "info": "请提供需要更新的内容"})
 
         update_fields = []
+        answer_changed = False
         if answer_value is not None:
             normalized_answer = str(answer_value).strip()
             if question.question_type == "objective":
@@ -1188,8 +1286,12 @@ class TeacherQuestionDetailView(APIView):
                     return Response({"code": 400, "info": "客观题参考答案不能为空"})
             elif not normalized_answer:
                 return Response({"code": 400, "info": "主观题参考答案不能为空"})
+            answer_changed = normalized_answer != question.answer
             question.answer = normalized_answer
             update_fields.append("answer")
+            if answer_changed:
+                question.answer_version = F("answer_version") + 1
+                update_fields.append("answer_version")
 
         if analysis_value is not None:
             question.analysis = str(analysis_value)
@@ -1200,10 +1302,15 @@ class TeacherQuestionDetailView(APIView):
 
         update_fields.append("updated_at")
         question.save(update_fields=update_fields)
+        if answer_changed:
+            question.refresh_from_db(fields=["answer_version"])
+        data = QuestionSerializer(question).data
+        # 已批改的作答由 regrade_questions 命令按新版本答案增量重判，修改答案不等待重判完成
+        data["regrade_pending"] = answer_changed
         return Response({
             "code": 200,
             "info": "题目信息已更新",
-            "data": QuestionSerializer(question).data,
+            "data": data,
         })
 
     def delete(self, request, question_id: int):
@@ -1215,18 +1322,22 @@ class TeacherQuestionDetailView(APIView):
 
 class ExamAssignmentListCreateView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 3}
 
     def get(self, request):
         if getattr(request.user, "role", "") != "teacher":
             return Response({"code": 403, "info": "仅教师可操作"})
-        assignments = ExamAssignment.objects.filter(created_by=request.user).select_related("subject").order_by("-start_time")
+        assignments = (
+            ExamAssignment.objects.filter(created_by=request.user)
+            .select_related("subject", "created_by", "stats")
+            .prefetch_related("audiences")
+            .order_by("-start_time")
+        )
         serializer = ExamAssignmentSerializer(assignments, many=True)
         data = serializer.data
         for idx, assignment in enumerate(assignments):
-            data[idx]["total_attempts"] = assignment.attempts.count()
-            data[idx]["pending_reviews"] = assignment.attempts.filter(
-                is_review_required=True,
-            ).count()
+            data[idx].update(stats_payload(assignment))
+            data[idx]["roster_ids"] = [audience.roster_id for audience in assignment.audiences.all()]
         return Response({"code": 200, "info": "获取考试任务成功", "data": data})
 
     def post(self, request):
@@ -1310,6 +1421,16 @@ class ExamAssignmentListCreateView(APIView):
         if status_value not in {"draft", "published", "closed"}:
             status_value = "published"
 
+        raw_roster_ids = request.data.get("roster_ids") or []
+        if not isinstance(raw_roster_ids, (list, tuple)):
+            return Response({"code": 400, "info": "班级列表格式不正确"})
+        try:
+            roster_ids = {int(item) for item in raw_roster_ids}
+        except (TypeError, ValueError):
+            return Response({"code": 400, "info": "班级列表格式不正确"})
+        if roster_ids and ClassRoster.objects.filter(id__in=roster_ids, teacher=request.user).count() != len(roster_ids):
+            return Response({"code": 400, "info": "班级列表中包含无效或无权限的班级"})
+
         raw_per_score = request.data.get("per_question_score")
         if raw_per_score in (None, ""):
             per_question_score = 10 if use_custom_questions else resolve_score(question_type, None)
@@ -1319,43 +1440,55 @@ class ExamAssignmentListCreateView(APIView):
             except (TypeError, ValueError):
                 return Response({"code": 400, "info": "分值格式不正确"})
 
-        assignment = ExamAssignment.objects.create(
-            title=title,
-            subject=subject,
-            question_type=question_type,
-            question_count=question_count,
-            duration_seconds=duration_seconds,
-            start_time=start_time,
-            end_time=end_time,
-            status=status_value,
-            description=description,
-            created_by=request.user,
-            question_ids=question_id_list,
-            per_question_score=per_question_score,
-        )
+        # 指定班级的考试创建时即为 rosters，与班级关联在同一事务提交，不会短暂对全部学生可见
+        with transaction.atomic():
+            assignment = ExamAssignment.objects.create(
+                title=title,
+                subject=subject,
+                question_type=question_type,
+                question_count=question_count,
+                duration_seconds=duration_seconds,
+                start_time=start_time,
+                end_time=end_time,
+                status=status_value,
+                description=description,
+                created_by=request.user,
+                question_ids=question_id_list,
+                per_question_score=per_question_score,
+                audience="rosters" if roster_ids else "all",
+            )
+            if roster_ids:
+                set_assignment_rosters(assignment, roster_ids)
 
         serializer = ExamAssignmentSerializer(assignment)
         payload = serializer.data
         payload["total_attempts"] = 0
         payload["pending_reviews"] = 0
+        payload["roster_ids"] = sorted(roster_ids)
         return Response({"code": 200, "info": "考试创建成功", "data": payload})
 
 
 class ExamAssignmentAvailableView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def get(self, request):
-        assignments = ExamAssignment.objects.filter(status="published").select_related("subject", "created_by").order_by("start_time")
-        data = []
-        for assignment in assignments:
-            attempt = assignment.attempts.filter(user=request.user).order_by("-started_at").first()
-            serializer = ExamAssignmentSerializer(assignment)
-            payload = serializer.data
-            payload["attempt_id"] = attempt.id if attempt else None
-            payload["attempt_status"] = attempt.status if attempt else None
-            payload["attempt_mode"] = attempt.mode if attempt else None
-            data.append(payload)
-        return Response({"code": 200, "info": "获取考试列表成功", "data": data})
+        """phase 可选 upcoming/ongoing/ended，默认返回未开始、进行中与近期结束的考试。"""
+
+        def parse_positive_int(value, default):
+            try:
+                parsed = int(value)
+            except (TypeError, ValueError):
+                return default
+            return parsed if parsed > 0 else default
+
+        data, pagination = get_student_feed(
+            request.user,
+            phase=request.GET.get("phase"),
+            page=parse_positive_int(request.GET.get("page"), 1),
+            page_size=parse_positive_int(request.GET.get("page_size"), 20),
+        )
+        return Response({"code": 200, "info": "获取考试列表成功", "data": data, "pagination": pagination})
 
 
 class ExamAssignmentStartView(APIView):
@@ -1364,8 +1497,12 @@ class ExamAssignmentStartView(APIView):
     def post(self, request, assignment_id: int):
         assignment = get_object_or_404(ExamAssignment.objects.select_related("subject"), id=assignment_id)
 
+        if assignment.status == "closed":
+            return Response({"code": 400, "info": "考试已结束"})
         if assignment.status != "published":
             return Response({"code": 400, "info": "考试未发布"})
+        if not can_view_assignment(request.user, assignment):
+            return Response({"code": 403, "info": "你不在该考试的参考班级中"})
 
         now = timezone.now()
         if now < assignment.start_time:
@@ -1391,36 +1528,53 @@ class ExamAssignmentStartView(APIView):
                 })
             return Response({"code": 400, "info": "你已完成该考试"})
 
-        preset_questions = None
-        score_overrides = None
-        if assignment.question_ids:
-            question_qs = Question.objects.filter(id__in=assignment.question_ids)
-            question_map = {question.id: question for question in question_qs}
-            missing_ids = [qid for qid in assignment.question_ids if qid not in question_map]
-            if missing_ids:
-                return Response({"code": 400, "info": "试卷内存在已被删除的题目，暂无法生成"})
-            ordered_questions = [question_map[qid] for qid in assignment.question_ids]
-            invalid_subject = next((q for q in ordered_questions if q.subject_id != assignment.subject_id), None)
-            if invalid_subject:
-                return Response({"code": 400, "info": "试卷中的题目与科目不匹配"})
-            preset_questions = ordered_questions
-            score_overrides = {question.id: assignment.per_question_score for question in ordered_questions}
-
+        attempt = None
         try:
-            attempt, question_payload, expires_at, remaining = create_attempt_with_questions(
-                user=request.user,
-                subject=assignment.subject,
-                question_type=assignment.question_type,
-                size=assignment.question_count,
-                duration_seconds=assignment.duration_seconds,
-                mode="exam",
-                assignment=assignment,
-                preset_questions=preset_questions,
-                score_overrides=score_overrides,
-            )
-        except ValueError as exc:
-            return Response({"code": 404, "info": str(exc)})
+            with transaction.atomic():
+                prepared = claim_prepared_paper(assignment, request.user)
+                if prepared is not None:
+                    question_scores, paper_snapshot = prepared
+                    question_payload = strip_solutions(paper_snapshot)
+                    attempt = write_attempt_paper(
+                        user=request.user,
+                        subject=assignment.subject,
+                        question_type=assignment.question_type,
+                        duration_seconds=assignment.duration_seconds,
+                        mode="exam",
+                        assignment=assignment,
+                        question_scores=question_scores,
+                        # 升级前预生成的试卷不含参考答案，这类作答不写快照
+                        paper_snapshot=paper_snapshot if all("answer" in entry for entry in paper_snapshot) else None,
+                    )
+        except IntegrityError:
+            # 预生成试卷中的题目已被删除，丢弃试卷池后实时组卷
+            discard_prepared_papers(assignment)
+            attempt = None
+
+        if attempt is not None:
+            expires_at, remaining = get_remaining_seconds(attempt)
+        else:
+            try:
+                preset_questions, score_overrides = resolve_assignment_questions(assignment)
+            except ValueError as exc:
+                return Response({"code": 400, "info": str(exc)})
+
+            try:
+                attempt, question_payload, expires_at, remaining = create_attempt_with_questions(
+                    user=request.user,
+                    subject=assignment.subject,
+                    question_type=assignment.question_type,
+                    size=assignment.question_count,
+                    duration_seconds=assignment.duration_seconds,
+                    mode="exam",
+                    assignment=assignment,
+                    preset_questions=preset_questions,
+                    score_overrides=score_overrides,
+                )
+            except ValueError as exc:
+                return Response({"code": 404, "info": str(exc)})
 
+        invalidate_student_feeds([request.user.id])
         assignment_data = ExamAssignmentSerializer(assignment).data
         return Response({
             "code": 200,
@@ -1442,252 +1596,98 @@ class ExamAssignmentStartView(APIView):
 
 class ExamAssignmentSubmissionsView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def get(self, request, assignment_id: int):
         assignment = get_object_or_404(ExamAssignment.objects.select_related("subject", "created_by"), id=assignment_id)
         if assignment.created_by_id != request.user.id:
             return Response({"code": 403, "info": "仅发布者可查看"})
-        attempts = assignment.attempts.select_related("user", "subject").order_by("-started_at")
-        serializer = PracticeAttemptSerializer(attempts, many=True)
+        try:
+            attempts, pagination = paginate_request(
+                request, assignment.attempts.select_related("user"), ordering=("-started_at", "-id"),
+            )
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
         return Response({
             "code": 200,
             "info": "获取考试作答成功",
             "data": {
                 "assignment": ExamAssignmentSerializer(assignment).data,
-                "attempts": serializer.data,
+                "attempts": serialize_attempts(attempts),
             },
+            "pagination": pagination,
         })
 
 
+def _parse_review_queue_params(request):
+    """待批阅队列的公共参数，返回 (scope, cursor, page_size)，参数不正确时抛出 ValueError。"""
+    scope = parse_scope(request.GET.get("assignment_id"))
+    page_size = parse_page_size(request.GET.get("page_size"), 50, REVIEW_QUEUE_MAX_PAGE_SIZE)
+    return scope, request.GET.get("cursor") or None, page_size
+
+
 class PracticeAttemptTeacherPendingReviewView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
     def get(self, request):
         if getattr(request.user, "role", "") != "teacher":
             return Response({"code": 403, "info": "仅教师可操作"})
-        assignment_id = request.GET.get("assignment_id")
-        student_id = request.GET.get("student_id")
-
-        attempts = PracticeAttempt.objects.filter(
-            is_review_required=True,
-            status__in=["completed", "expired"],
-        ).select_related("user", "subject", "assignment").order_by("-submitted_at")
-
-        if assignment_id:
-            if assignment_id == "practice":
-                attempts = attempts.filter(assignment__isnull=True)
-            else:
-                attempts = attempts.filter(assignment_id=assignment_id)
-
-        if student_id:
-            attempts = attempts.filter(user_id=student_id)
-
-        data = [
-            {
-                "id": attempt.id,
-                "student_id": attempt.user_id,
-                "student_name": attempt.user.username,
-                "subject_name": attempt.subject.name,
-                "assignment_id": attempt.assignment_id,
-                "assignment_title": attempt.assignment.title if attempt.assignment else None,
-                "submitted_at": attempt.submitted_at,
-                "status": attempt.status,
-                "mode": attempt.mode,
-                "question_type": attempt.question_type,
-                "total_questions": attempt.total_questions,
-            }
-            for attempt in attempts
-        ]
-        return Response({"code": 200, "info": "获取待批阅试卷成功", "data": data})
+        try:
+            scope, cursor, page_size = _parse_review_queue_params(request)
+            student_id = int(request.GET["student_id"]) if request.GET.get("student_id") else None
+            attempts, pagination = pending_attempt_page(
+                request.user, scope=scope, student_id=student_id, cursor=cursor, page_size=page_size,
+            )
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
+        return Response({
+            "code": 200,
+            "info": "获取待批阅试卷成功",
+            "data": [serialize_pending_attempt(attempt) for attempt in attempts],
+            "pagination": pagination,
+            "summary": queue_summary(request.user, scope),
+        })
 
 
 class PracticeAttemptTeacherStudentPendingView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def get(self, request):
         if getattr(request.user, "role", "") != "teacher":
             return Response({"code": 403, "info": "仅教师可操作"})
+        try:
+            scope, cursor, page_size = _parse_review_queue_params(request)
+            data, pagination = pending_student_page(request.user, scope=scope, cursor=cursor, page_size=page_size)
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
 
-        assignment_id = request.GET.get("assignment_id")
-
-        attempts = PracticeAttempt.objects.filter(
-            is_review_required=True,
-            status__in=["completed", "expired"],
-        ).select_related("user", "subject", "assignment").order_by("-submitted_at")
-
-        if assignment_id:
-            if assignment_id == "practice":
-                attempts = attempts.filter(assignment__isnull=True)
-            else:
-                attempts = attempts.filter(assignment_id=assignment_id)
-
-        student_map: "OrderedDict[int, Dict[str, object]]" = OrderedDict()
-        for attempt in attempts:
-            entry = student_map.get(attempt.user_id)
-            if not entry:
-                entry = {
-                    "student_id": attempt.user_id,
-                    "student_name": attempt.user.username,
-                    "pending_count": 0,
-                    "latest_submitted_at": attempt.submitted_at,
-                    "attempts": [],
-                }
-                student_map[attempt.user_id] = entry
-            entry["pending_count"] += 1
-            if not entry["latest_submitted_at"] or (attempt.submitted_at and attempt.submitted_at > entry["latest_submitted_at"]):
-                entry["latest_submitted_at"] = attempt.submitted_at
-            entry["attempts"].append({
-                "id": attempt.id,
-                "assignment_id": attempt.assignment_id,
-                "assignment_title": attempt.assignment.title if attempt.assignment else None,
-                "subject_name": attempt.subject.name,
-                "submitted_at": attempt.submitted_at,
-                "status": attempt.status,
-                "mode": attempt.mode,
-                "question_type": attempt.question_type,
-                "total_questions": attempt.total_questions,
-            })
-
-        data = list(student_map.values())
-        return Response({"code": 200, "info": "获取待批阅学生列表成功", "data": data})
+        return Response({
+            "code": 200,
+            "info": "获取待批阅学生列表成功",
+            "data": data,
+            "pagination": pagination,
+            "summary": queue_summary(request.user, scope),
+        })
 
 
 class TeacherDashboardOverviewView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 8
 
     def get(self, request):
         if getattr(request.user, "role", "") != "teacher":
             return Response({"code": 403, "info": "仅教师可操作"})
 
-        user = request.user
-        question_qs = Question.objects.filter(created_by=user)
-        question_stats = question_qs.aggregate(
-            total=Count("id"),
-            objective=Count("id", filter=Q(question_type="objective")),
-            subjective=Count("id", filter=Q(question_type="subjective")),
-        )
-        subject_rows = (
-            question_qs.values("subject_id", "subject__name")
-            .annotate(
-                total=Count("id"),
-                objective=Count("id", filter=Q(question_type="objective")),
-                subjective=Count("id", filter=Q(question_type="subjective")),
-                last_updated=Max("updated_at"),
-            )
-            .order_by("-last_updated", "subject__name")
-        )
-        question_subjects = [
-            {
-                "subject_id": row["subject_id"],
-                "subject_name": row["subject__name"],
-                "total": row["total"],
-                "objective": row["objective"],
-                "subjective": row["subjective"],
-                "last_updated": row["last_updated"],
-            }
-            for row in subject_rows
-        ]
-
-        assignment_qs = (
-            ExamAssignment.objects.filter(created_by=user)
-            .select_related("subject")
-            .annotate(
-                total_attempts=Count("attempts", distinct=True),
-                pending_reviews=Count(
-                    "attempts",
-                    filter=Q(
-                        attempts__is_review_required=True,
-                        attempts__status__in=["completed", "expired"],
-                    ),
-                    distinct=True,
-                ),
-            )
-            .order_by("start_time")
-        )
-        assignment_list = list(assignment_qs)
-
-        status_counts = {"draft": 0, "published": 0, "closed": 0}
-        phase_counts = {"upcoming": 0, "ongoing": 0, "ended": 0}
-        subject_assignment_map: Dict[int, Dict[str, object]] = {}
-        recent_assignments = []
-
-        for assignment in assignment_list:
-            status_counts[assignment.status] = status_counts.get(assignment.status, 0) + 1
-            phase = assignment.phase
-            if phase in phase_counts:
-                phase_counts[phase] += 1
-            subject_entry = subject_assignment_map.setdefault(
-                assignment.subject_id or 0,
-                {
-                    "subject_id": assignment.subject_id,
-                    "subject_name": assignment.subject.name if assignment.subject else "未分类",
-                    "total": 0,
-                    "upcoming": 0,
-                    "ongoing": 0,
-                    "ended": 0,
-                },
-            )
-            subject_entry["total"] += 1
-            if phase in subject_entry:
-                subject_entry[phase] += 1
-
-        for assignment in assignment_list[:5]:
-            recent_assignments.append({
-                "id": assignment.id,
-                "title": assignment.title,
-                "subject_name": assignment.subject.name if assignment.subject else "",
-                "phase": assignment.phase,
-                "status": assignment.status,
-                "start_time": assignment.start_time,
-                "end_time": assignment.end_time,
-                "total_attempts": getattr(assignment, "total_attempts", 0),
-                "pending_reviews": getattr(assignment, "pending_reviews", 0),
-            })
-
-        pending_qs = PracticeAttempt.objects.filter(
-            is_review_required=True,
-            status__in=["completed", "expired"],
-        ).select_related("user", "subject", "assignment").order_by("-submitted_at")
-        pending_total = pending_qs.count()
-        pending_items = [
-            {
-                "id": attempt.id,
-                "student_name": attempt.user.username,
-                "subject_name": attempt.subject.name,
-                "assignment_id": attempt.assignment_id,
-                "assignment_title": attempt.assignment.title if attempt.assignment else None,
-                "submitted_at": attempt.submitted_at,
-                "mode": attempt.mode,
-                "question_type": attempt.question_type,
-            }
-            for attempt in pending_qs[:5]
-        ]
-
-        payload = {
-            "question_stats": {
-                "total": question_stats.get("total", 0),
-                "objective": question_stats.get("objective", 0),
-                "subjective": question_stats.get("subjective", 0),
-                "subjects": question_subjects,
-            },
-            "assignment_stats": {
-                "total": len(assignment_list),
-                "status": status_counts,
-                "phase": phase_counts,
-                "subjects": sorted(subject_assignment_map.values(), key=lambda item: item["total"], reverse=True),
-                "recent": recent_assignments,
-            },
-            "pending_reviews": {
-                "total": pending_total,
-                "items": pending_items,
-            },
-        }
-
-        return Response({"code": 200, "info": "获取教师概览成功", "data": payload})
+        return Response({"code": 200, "info": "获取教师概览成功", "data": get_teacher_dashboard(request.user)})
 
 
 class StudentDashboardOverviewView(APIView):
+    """学生看板，days 指定趋势天数（默认 7，最多 365）。"""
+
     permission_classes = [IsAuthenticated]
+    query_budget = 6
 
     def get(self, request):
         if getattr(request.user, "role", "") != "student":
@@ -1696,92 +1696,47 @@ class StudentDashboardOverviewView(APIView):
         user = request.user
         now = timezone.now()
 
-        assignments_list = list(
-            ExamAssignment.objects.filter(status="published")
-            .select_related("subject")
-            .order_by("start_time")
-        )
-        assignment_ids = [assignment.id for assignment in assignments_list]
-
-        attempt_map: Dict[int, PracticeAttempt] = {}
-        attempts_qs = (
-            PracticeAttempt.objects.filter(user=user, assignment_id__in=assignment_ids)
-            .select_related("assignment")
-            .order_by("-started_at")
-        )
-        for attempt in attempts_qs:
-            if attempt.assignment_id and attempt.assignment_id not in attempt_map:
-                attempt_map[attempt.assignment_id] = attempt
+        try:
+            days = min(max(int(request.GET.get("days") or 7), 1), ACTIVITY_TREND_MAX_DAYS)
+        except (TypeError, ValueError):
+            days = 7
 
+        # 只读取时间窗口内的可见考试，已按 进行中/未开始/已结束 排序
+        assignments_list = list(student_assignment_queryset(user, now=now))
         completed_statuses = {"completed", "expired"}
         phase_counts = {"upcoming": 0, "ongoing": 0, "ended": 0, "completed": 0}
-        def bump_phase(key: str):
-            phase_counts[key] = phase_counts.get(key, 0) + 1
-
-        for assignment in assignments_list:
-            attempt = attempt_map.get(assignment.id)
-            if attempt and attempt.status in completed_statuses:
-                bump_phase("completed")
-            else:
-                bump_phase(assignment.phase)
-
-        sorted_assignments = sorted(
-            assignments_list,
-            key=lambda item: (
-                0 if item.phase == "ongoing" else (1 if item.phase == "upcoming" else 2),
-                item.start_time,
-            ),
-        )
         assignment_preview = []
-        for assignment in sorted_assignments:
-            attempt = attempt_map.get(assignment.id)
-            student_phase = assignment.phase
-            if attempt and attempt.status in completed_statuses:
-                student_phase = "completed"
-            assignment_preview.append({
-                "id": assignment.id,
-                "title": assignment.title,
-                "subject_name": assignment.subject.name if assignment.subject else "",
-                "phase": assignment.phase,
-                "student_phase": student_phase,
-                "start_time": assignment.start_time,
-                "end_time": assignment.end_time,
-                "duration_seconds": assignment.duration_seconds,
-                "attempt_status": attempt.status if attempt else None,
-                "attempt_id": attempt.id if attempt else None,
-            })
-            if len(assignment_preview) >= 5:
-                break
-
-        practice_qs = PracticeAttempt.objects.filter(user=user)
-        practice_total = practice_qs.count()
-        practice_completed = practice_qs.filter(status__in=["completed", "expired"]).count()
-        practice_ongoing = practice_qs.filter(status="ongoing").count()
-
-        window_start = now - timedelta(days=6)
-        recent_map = {
-            item["day"]: item["count"]
-            for item in (
-                practice_qs.filter(submitted_at__isnull=False, submitted_at__gte=window_start)
-                .annotate(day=TruncDate("submitted_at"))
-                .values("day")
-                .annotate(count=Count("id"))
-            )
-        }
-        trend_payload = []
-        recent_completed = 0
-        for offset in range(6, -1, -1):
-            day = (now - timedelta(days=offset)).date()
-            count = recent_map.get(day, 0)
-            trend_payload.append({"date": day, "count": count})
-            recent_completed += count
+        for assignment in assignments_list:
+            phase = assignment.phase
+            student_phase = "completed" if assignment.attempt_status in completed_statuses else phase
+            phase_counts[student_phase] += 1
+            if len(assignment_preview) < 5:
+                assignment_preview.append({
+                    "id": assignment.id,
+                    "title": assignment.title,
+                    "subject_name": assignment.subject.name if assignment.subject else "",
+                    "phase": phase,
+                    "student_phase": student_phase,
+                    "start_time": assignment.start_time,
+                    "end_time": assignment.end_time,
+                    "duration_seconds": assignment.duration_seconds,
+                    "attempt_status": assignment.attempt_status,
+                    "attempt_id": assignment.attempt_id,
+                })
+
+        totals, trend_payload = load_activity_trend(user.id, days)
+        practice_total = totals["attempts_started"]
+        practice_completed = totals["attempts_completed"]
+        practice_ongoing = max(0, practice_total - practice_completed)
+        recent_completed = sum(item["count"] for item in trend_payload)
 
         progress_percent = 0
         if recent_completed:
-            progress_percent = min(100, int((recent_completed / 7) * 100))
+            progress_percent = min(100, int((recent_completed / days) * 100))
 
         wrong_book_count = WrongBookEntry.objects.filter(user=user).count()
-        pending_reviews = practice_qs.filter(
+        pending_reviews = PracticeAttempt.objects.filter(
+            user=user,
             is_review_required=True,
             status__in=["completed", "expired"],
         ).count()
@@ -1799,6 +1754,7 @@ class StudentDashboardOverviewView(APIView):
                 "ongoing": practice_ongoing,
                 "recent_completed": recent_completed,
                 "trend": trend_payload,
+                "trend_days": days,
                 "progress_percent": progress_percent,
             },
             "wrong_book_count": wrong_book_count,
@@ -1810,6 +1766,7 @@ class StudentDashboardOverviewView(APIView):
 
 class PracticeAttemptTeacherDetailView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 5
 
     def get(self, request, attempt_id: int):
         if getattr(request.user, "role", "") != "teacher":
@@ -1822,17 +1779,13 @@ class PracticeAttemptTeacherDetailView(APIView):
             return Response({"code": 403, "info": "无权查看该试卷"})
 
         serializer = PracticeAttemptSerializer(attempt)
-        item_serializer = PracticeAttemptItemSerializer(
-            attempt.items.select_related("question"),
-            many=True,
-            context={"force_show_solution": True},
-        )
+        item_data = serialize_attempt_items(attempt, context={"force_show_solution": True})
         return Response({
             "code": 200,
             "info": "获取试卷详情成功",
             "data": {
                 "attempt": serializer.data,
-                "items": item_serializer.data,
+                "items": item_data,
             },
         })
 
@@ -1868,7 +1821,6 @@ class PracticeAttemptReviewView(APIView):
                 return Response({"code": 400, "info": "该试卷无需批阅"})
 
             item_map = {item.id: item for item in subjective_items}
-            updated_items = []
             provided_ids = set()
 
             for entry in item_payload:
@@ -1885,16 +1837,16 @@ class PracticeAttemptReviewView(APIView):
                     raw_score = 0
                 item = item_map[item_id]
                 max_score = item.expected_score or resolve_score(item.question.question_type, item.question.score)
-                clamped_score = max(0, min(raw_score, max_score))
-                if item.awarded_score != clamped_score:
-                    item.awarded_score = clamped_score
-                    updated_items.append(item)
+                item.awarded_score = max(0, min(raw_score, max_score))
 
             if not provided_ids:
                 return Response({"code": 400, "info": "请至少为一道题设置得分"})
 
-            if updated_items:
-                PracticeAttemptItem.objects.bulk_update(updated_items, ["awarded_score"])
+            # 单份批阅即完成整份试卷，全部主观题记为已批阅，按题批阅不再列出
+            reviewed_at = timezone.now()
+            for item in subjective_items:
+                item.reviewed_at = reviewed_at
+            PracticeAttemptItem.objects.bulk_update(subjective_items, ["awarded_score", "reviewed_at"])
 
             total_obtained = sum(item.awarded_score for item in all_items)
             total_possible = sum(
@@ -1908,11 +1860,13 @@ class PracticeAttemptReviewView(APIView):
                 attempt.total_score = total_possible
 
             possible = attempt.total_score or total_possible or 0
+            previous_score = attempt.obtained_score
+            previous_total = attempt.total_score
             attempt.obtained_score = max(0, min(total_obtained, possible))
             attempt.review_comment = review_comment
             attempt.is_review_required = False
             attempt.reviewed_by = request.user
-            attempt.reviewed_at = timezone.now()
+            attempt.reviewed_at = reviewed_at
             attempt.save(update_fields=[
                 "obtained_score",
                 "total_score",
@@ -1921,18 +1875,61 @@ class PracticeAttemptReviewView(APIView):
                 "reviewed_by",
                 "reviewed_at",
             ])
+            record_attempt_reviewed(attempt, previous_score)
+            record_reviews_completed([attempt])
+            record_activity_score_change(attempt, previous_score, previous_total)
+            invalidate_dashboards_for_attempts([attempt])
 
         serializer = PracticeAttemptSerializer(attempt)
-        item_serializer = PracticeAttemptItemSerializer(
-            attempt.items.select_related("question"),
-            many=True,
-            context={"force_show_solution": True},
-        )
+        item_data = serialize_attempt_items(attempt, items=all_items, context={"force_show_solution": True})
         return Response({
             "code": 200,
             "info": "批阅完成",
             "data": {
                 "attempt": serializer.data,
-                "items": item_serializer.data,
+                "items": item_data,
             },
         })
+
+
+class QuestionBatchReviewView(APIView):
+    """按题批阅：列出某道主观题的待批阅答案，或一次提交多份作答中该题的得分。"""
+
+    permission_classes = [IsAuthenticated]
+    query_budget = {"GET": 3}
+
+    def get(self, request, question_id: int):
+        if getattr(request.user, "role", "") != "teacher":
+            return Response({"code": 403, "info": "仅教师可操作"})
+        try:
+            scope, cursor, page_size = _parse_review_queue_params(request)
+            data, pagination = pending_question_items(
+                request.user, question_id, scope=scope, cursor=cursor, page_size=page_size,
+            )
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确"})
+        return Response({"code": 200, "info": "获取待批阅答案成功", "data": data, "pagination": pagination})
+
+    def post(self, request, question_id: int):
+        if getattr(request.user, "role", "") != "teacher":
+            return Response({"code": 403, "info": "仅教师可操作"})
+
+        item_payload = request.data.get("items", [])
+        if not isinstance(item_payload, list) or not item_payload:
+            return Response({"code": 400, "info": "请提交题目得分"})
+
+        scores = {}
+        for entry in item_payload:
+            try:
+                item_id = int(entry.get("id"))
+            except (TypeError, ValueError, AttributeError):
+                continue
+            try:
+                scores[item_id] = int(entry.get("awarded_score", 0))
+            except (TypeError, ValueError):
+                scores[item_id] = 0
+        if not scores:
+            return Response({"code": 400, "info": "请至少为一道题设置得分"})
+
+        result = batch_review_question(request.user, question_id, scores)
+        return Response({"code": 200, "info": "批阅完成", "data": result})
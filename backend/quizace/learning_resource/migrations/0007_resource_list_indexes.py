@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning_resource', '0006_alter_resourceclickrecord_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learningresource',
+            index=models.Index(fields=['status', 'create_time', 'id'], name='resource_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='learningresource',
+            index=models.Index(fields=['uploader', 'create_time', 'id'], name='resource_uploader_created'),
+        ),
+    ]
@@ -54,6 +54,11 @@ class LearningResource(models.Model):
         db_table = "learning_resource"
         verbose_name = "学习资源"
         verbose_name_plural = verbose_name
+        indexes = [
+            # 列表按 (create_time, id) 倒序游标分页
+            models.Index(fields=["status", "create_time", "id"], name="resource_status_created"),
+            models.Index(fields=["uploader", "create_time", "id"], name="resource_uploader_created"),
+        ]
 
     def __str__(self):
         return self.name
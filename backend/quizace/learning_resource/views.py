@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Count, F
+from quizace.pagination import paginate_request
 from .models import LearningResource, ResourceClickRecord, ResourceFavorite
 from .serializers import LearningResourceSerializer
 
@@ -71,6 +72,10 @@ class ResourceListView(APIView):
         keyword = request.GET.get("keyword")
         course = request.GET.get("course")
         college = request.GET.get("college")
+        status = request.GET.get("status")
+
+        if all_resources and status in {"0", "1", "2"}:
+            resources = resources.filter(status=int(status))
 
         if keyword:
             resources = resources.filter(name__icontains=keyword)
@@ -81,11 +86,19 @@ class ResourceListView(APIView):
         if college:
             resources = resources.filter(college=college)
 
+        try:
+            resources, pagination = paginate_request(
+                request, resources.select_related("uploader"), ordering=("-create_time", "-id"),
+            )
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确", "data": None})
+
         serializer = LearningResourceSerializer(resources, many=True, context={'request': request})
         return Response({
             "code": 200,
             "info": "获取资源列表成功",
-            "data": serializer.data
+            "data": serializer.data,
+            "pagination": pagination
         })
 
 
@@ -151,12 +164,18 @@ class MyResourceView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        resources = LearningResource.objects.filter(uploader=request.user)
-        serializer = LearningResourceSerializer(resources, many=True)
+        resources = LearningResource.objects.filter(uploader=request.user).select_related("uploader")
+        try:
+            resources, pagination = paginate_request(request, resources, ordering=("-create_time", "-id"))
+        except ValueError:
+            return Response({"code": 400, "info": "参数不正确", "data": None})
+
+        serializer = LearningResourceSerializer(resources, many=True, context={'request': request})
         return Response({
             "code": 200,
             "info": "获取我的资源列表成功",
-            "data": serializer.data
+            "data": serializer.data,
+            "pagination": pagination
         })
 
 
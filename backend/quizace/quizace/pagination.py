@@ -0,0 +1,118 @@
+"""列表接口的游标（keyset）分页。
+
+游标记录上一页最后一条记录的排序字段值，下一页用 WHERE 条件从该位置之后继续取，
+而不是 OFFSET 跳过前面的行：任意一页只扫描索引上的一段，深翻页与第一页耗时相同。
+排序末尾总是补上 id 作为并列时的决胜字段，翻页过程中不会重复或遗漏。
+排序字段须为模型上不可为空的直接字段，最好有与“过滤条件 + 排序”一致的联合索引。
+"""
+import base64
+import datetime
+import decimal
+import json
+from typing import List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def parse_ordering(ordering: Sequence[str]) -> List[Tuple[str, bool]]:
+    """返回 [(字段名, 是否倒序)]，末尾补 id，方向与首个字段一致。"""
+    fields = [(item.lstrip("-"), item.startswith("-")) for item in ordering]
+    if not fields or fields[-1][0] not in {"id", "pk"}:
+        fields.append(("id", fields[0][1] if fields else False))
+    return fields
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        # 保留微秒，DjangoJSONEncoder 会截断到毫秒导致同一毫秒内的记录被跳过
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([_dump_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def cursor_for(instance, fields: List[Tuple[str, bool]]) -> str:
+    """以该记录为上一页最后一条时的游标。"""
+    meta = instance._meta
+    return encode_cursor([getattr(instance, meta.get_field(name).attname) for name, _ in fields])
+
+
+def decode_cursor(cursor: str, model, fields: List[Tuple[str, bool]]) -> list:
+    """按排序字段类型还原游标中的值，格式不正确时抛出 ValueError。"""
+    try:
+        raw_values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError):
+        raise ValueError("invalid cursor")
+    if not isinstance(raw_values, list) or len(raw_values) != len(fields):
+        raise ValueError("invalid cursor")
+    values = []
+    for (name, _), raw in zip(fields, raw_values):
+        if raw is None:
+            raise ValueError("invalid cursor")
+        try:
+            values.append(model._meta.get_field(name).to_python(raw))
+        except ValidationError:
+            raise ValueError("invalid cursor")
+    return values
+
+
+def _after(fields: List[Tuple[str, bool]], values: list) -> Q:
+    """(a, b, id) 在游标之后：a 越过，或 a 相等且 b 越过，依此类推。"""
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+        for prev_index, (prev_name, _) in enumerate(fields[:index]):
+            step &= Q(**{prev_name: values[prev_index]})
+        condition |= step
+    # 冗余的首字段范围条件让数据库直接在索引上定位起点，而不是逐行判断 OR 条件
+    name, descending = fields[0]
+    return Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+
+def parse_page_size(value, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(parsed, maximum) if parsed > 0 else default
+
+
+def keyset_page(
+    queryset,
+    *,
+    ordering: Sequence[str],
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Tuple[list, dict]:
+    """按 ordering 取游标之后的一页，返回 (记录列表, 翻页信息)。
+
+    多取一条判断是否还有下一页，只执行一次查询；游标不正确时抛出 ValueError。
+    """
+    fields = parse_ordering(ordering)
+    if cursor:
+        queryset = queryset.filter(_after(fields, decode_cursor(cursor, queryset.model, fields)))
+    order_by = [f"-{name}" if descending else name for name, descending in fields]
+    items = list(queryset.order_by(*order_by)[:page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    return items, {
+        "page_size": page_size,
+        "has_more": has_more,
+        "next_cursor": cursor_for(items[-1], fields) if has_more else None,
+    }
+
+
+def paginate_request(request, queryset, *, ordering: Sequence[str], default_page_size: int = DEFAULT_PAGE_SIZE,
+                     max_page_size: int = MAX_PAGE_SIZE) -> Tuple[list, dict]:
+    """从请求参数 cursor、page_size 取一页，page_size 超过上限时按上限处理。"""
+    page_size = parse_page_size(request.GET.get("page_size"), default_page_size, max_page_size)
+    return keyset_page(queryset, ordering=ordering, cursor=request.GET.get("cursor") or None, page_size=page_size)
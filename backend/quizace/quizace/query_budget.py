@@ -0,0 +1,125 @@
+"""请求级 SQL 统计：查询次数、数据库耗时与重复查询指纹。
+
+视图可声明 query_budget 属性作为单次请求的查询上限（整数，或按请求方法的字典），
+超出时记录告警；数据库缓存（DatabaseCache）的读写与事务控制语句（BEGIN、SAVEPOINT 等）
+单独计数，不计入预算，与使用 Redis 等缓存后端时的统计口径一致。
+调试模式下统计结果通过响应头返回，便于在浏览器中定位 N+1 查询。
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("quizace.query_budget")
+
+# IN (%s, %s, ...) 的参数个数随数据量变化，归一化后视为同一条查询
+_IN_PARAMS = re.compile(r"\((?:%s, )*%s\)")
+_TRANSACTION_CONTROL = re.compile(r"^\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b", re.IGNORECASE)
+
+
+def fingerprint(sql: str) -> str:
+    return _IN_PARAMS.sub("(...)", sql)
+
+
+def _cache_table_pattern():
+    tables = [
+        config["LOCATION"]
+        for config in getattr(settings, "CACHES", {}).values()
+        if config.get("BACKEND", "").endswith("DatabaseCache")
+    ]
+    if not tables:
+        return None
+    return re.compile(r"""[`"](?:%s)[`"]""" % "|".join(re.escape(table) for table in tables))
+
+
+class QueryRecorder:
+    """通过 connection.execute_wrapper 统计 with 块内执行的查询，不依赖 DEBUG。"""
+
+    def __init__(self):
+        self.count = 0
+        # 缓存读写与事务控制语句，不计入 count
+        self.excluded_count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self._cache_tables = _cache_table_pattern()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if _TRANSACTION_CONTROL.match(sql) or (self._cache_tables is not None and self._cache_tables.search(sql)):
+                self.excluded_count += 1
+            else:
+                self.duration += time.perf_counter() - started
+                self.count += 1
+                self.fingerprints[fingerprint(sql)] += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    @property
+    def duplicates(self) -> dict:
+        """执行超过一次的查询指纹及其次数。"""
+        return {sql: times for sql, times in self.fingerprints.items() if times > 1}
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(times - 1 for times in self.fingerprints.values())
+
+
+def get_view_query_budget(view_func, method: str):
+    view_class = getattr(view_func, "view_class", None) or getattr(view_func, "cls", None)
+    budget = getattr(view_class, "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(method.upper())
+    return budget
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        budget = getattr(request, "_query_budget", None)
+        if budget is not None and recorder.count > budget:
+            top = sorted(recorder.duplicates.items(), key=lambda pair: pair[1], reverse=True)[:3]
+            logger.warning(
+                "%s %s 执行了 %s 条查询，超出预算 %s；重复最多的查询: %s",
+                request.method,
+                request.path,
+                recorder.count,
+                budget,
+                top,
+            )
+        if getattr(settings, "QUERY_BUDGET_HEADERS", settings.DEBUG):
+            response["X-Query-Count"] = str(recorder.count)
+            response["X-Query-Time-Ms"] = f"{recorder.duration_ms:.1f}"
+            response["X-Query-Duplicates"] = str(recorder.duplicate_count)
+            if budget is not None:
+                response["X-Query-Budget"] = str(budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = get_view_query_budget(view_func, request.method)
+        return None
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'quizace.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,6 +106,23 @@ DATABASES = {
     }
 }
 
+# 缓存
+# 看板与考试列表的版本号、后台重算锁、共享试卷与题目池都存放在缓存中，多进程部署时必须使用
+# 各进程共享的后端，进程内的 LocMemCache 会使失效通知只在本进程生效。默认使用数据库缓存
+# （部署时执行 python manage.py createcachetable），有 Redis 时可改为
+# django.core.cache.backends.redis.RedisCache（需安装 redis）。
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'quizace_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            # 版本号不设过期时间，条目上限要足够大，避免被淘汰
+            'MAX_ENTRIES': 200000,
+        },
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -176,3 +194,28 @@ SIMPLE_JWT = {
 
 # 用户模型设置
 AUTH_USER_MODEL = 'user.SysUser'
+
+# 考试作答自动保存写入缓冲日志，由 flush_answer_buffer 定期合并（提交时总会合并）
+EXAM_AUTOSAVE_BUFFERED = True
+
+# 调试模式下在响应头中返回 SQL 统计（X-Query-Count / X-Query-Time-Ms / X-Query-Duplicates）
+QUERY_BUDGET_HEADERS = DEBUG
+
+# 学生考试列表保留最近多少天内结束的考试
+EXAM_FEED_ENDED_DAYS = 30
+
+# 教师看板快照的有效期（秒）；过期后先返回旧快照并在后台重算，超过最长时限则同步重算
+EXAM_DASHBOARD_FRESH_SECONDS = 300
+EXAM_DASHBOARD_MAX_STALE_SECONDS = 600
+EXAM_DASHBOARD_ASYNC_REFRESH = True
+
+# 新增题目与同科目已有题目的估计相似度达到该值时提示近似重复
+EXAM_DUPLICATE_THRESHOLD = 0.7
+
+# 草稿识别队列（process_question_drafts）：识别器导入路径，图片题可改为 exam.ocr.tesseract_recognizer；
+# 每个进程的识别线程数；失败重试次数与退避基准（秒，按 2 的幂增长）；认领超时（秒）后可被重新认领
+EXAM_OCR_RECOGNIZER = "exam.ocr.text_recognizer"
+EXAM_OCR_WORKERS = 2
+EXAM_OCR_MAX_ATTEMPTS = 3
+EXAM_OCR_RETRY_BASE_SECONDS = 30
+EXAM_OCR_LEASE_SECONDS = 300
@@ -0,0 +1,52 @@
+"""测试辅助：按视图声明的 query_budget 校验接口的查询次数。
+
+用法示例（Django TestCase 中）::
+
+    response = assert_query_budget(self.client, "get", "/api/exam/assignments/available/")
+
+    assert_queries_do_not_grow(
+        lambda: self.client.get("/api/exam/assignments/available/"),
+        grow=lambda: create_assignments(20),
+    )
+"""
+from django.urls import resolve
+
+from .query_budget import QueryRecorder, get_view_query_budget
+
+
+def _describe(recorder: QueryRecorder) -> str:
+    lines = [f"共 {recorder.count} 条查询，耗时 {recorder.duration_ms:.1f}ms"]
+    for sql, times in sorted(recorder.duplicates.items(), key=lambda pair: pair[1], reverse=True)[:5]:
+        lines.append(f"  x{times}: {sql[:200]}")
+    return "\n".join(lines)
+
+
+def view_query_budget(path: str, method: str = "get"):
+    return get_view_query_budget(resolve(path.split("?", 1)[0]).func, method)
+
+
+def assert_query_budget(client, method: str, path: str, data=None, *, budget=None, **extra):
+    """请求接口并断言查询次数不超过预算，未指定 budget 时使用视图的 query_budget。"""
+    if budget is None:
+        budget = view_query_budget(path, method)
+    if budget is None:
+        raise AssertionError(f"{path} 对应的视图未声明 query_budget")
+    with QueryRecorder() as recorder:
+        response = getattr(client, method)(path, data, **extra)
+    if recorder.count > budget:
+        raise AssertionError(f"{method.upper()} {path} 超出查询预算 {budget}\n{_describe(recorder)}")
+    return response
+
+
+def assert_queries_do_not_grow(request, grow, *, slack: int = 0):
+    """先执行一次请求，调用 grow 扩充数据后再执行一次，断言查询次数没有随数据量增长。"""
+    with QueryRecorder() as before:
+        request()
+    grow()
+    with QueryRecorder() as after:
+        request()
+    if after.count > before.count + slack:
+        raise AssertionError(
+            f"数据量增加后查询次数从 {before.count} 增长到 {after.count}\n{_describe(after)}"
+        )
+    return before.count, after.count
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_alter_studentprofile_id_alter_teacherprofile_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassRoster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, verbose_name='班级名称')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='说明')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('update_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rosters', to=settings.AUTH_USER_MODEL, verbose_name='负责教师')),
+            ],
+            options={
+                'verbose_name': '班级',
+                'verbose_name_plural': '班级',
+                'db_table': 'class_roster',
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_time', models.DateTimeField(auto_now_add=True, verbose_name='加入时间')),
+                ('roster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='user.classroster', verbose_name='班级')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_memberships', to=settings.AUTH_USER_MODEL, verbose_name='学生')),
+            ],
+            options={
+                'verbose_name': '班级成员',
+                'verbose_name_plural': '班级成员',
+                'db_table': 'class_membership',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='classroster',
+            constraint=models.UniqueConstraint(fields=('teacher', 'name'), name='class_roster_teacher_name'),
+        ),
+        migrations.AddIndex(
+            model_name='classmembership',
+            index=models.Index(fields=['student', 'roster'], name='class_membership_student'),
+        ),
+        migrations.AddConstraint(
+            model_name='classmembership',
+            constraint=models.UniqueConstraint(fields=('roster', 'student'), name='class_membership_roster_student'),
+        ),
+    ]
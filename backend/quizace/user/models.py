@@ -85,6 +85,42 @@ class TeacherProfile(models.Model):
         db_table = "teacher_profile"
         verbose_name = "教师信息"
 
+class ClassRoster(models.Model):
+    """教师维护的班级名单，考试可按班级定向发布"""
+    name = models.CharField(max_length=64, verbose_name="班级名称")
+    teacher = models.ForeignKey(SysUser, on_delete=models.CASCADE, related_name="rosters", verbose_name="负责教师")
+    description = models.CharField(max_length=255, blank=True, verbose_name="说明")
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    update_time = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = "class_roster"
+        verbose_name = "班级"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["teacher", "name"], name="class_roster_teacher_name"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class ClassMembership(models.Model):
+    roster = models.ForeignKey(ClassRoster, on_delete=models.CASCADE, related_name="memberships", verbose_name="班级")
+    student = models.ForeignKey(SysUser, on_delete=models.CASCADE, related_name="class_memberships", verbose_name="学生")
+    create_time = models.DateTimeField(auto_now_add=True, verbose_name="加入时间")
+
+    class Meta:
+        db_table = "class_membership"
+        verbose_name = "班级成员"
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=["roster", "student"], name="class_membership_roster_student"),
+        ]
+        indexes = [
+            # 学生 -> 所在班级的查找走该索引，考试可见性判断依赖它
+            models.Index(fields=["student", "roster"], name="class_membership_student"),
+        ]
+
 class SysUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = SysUser
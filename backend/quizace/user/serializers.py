@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from user.models import SysUser, StudentProfile, TeacherProfile
+from user.models import SysUser, StudentProfile, TeacherProfile, ClassRoster
 
 
 class StudentProfileSerializer(serializers.ModelSerializer):
@@ -132,3 +132,13 @@ class AdminUserManageSerializer(serializers.ModelSerializer):
         elif instance.role == 'teacher':
             TeacherProfile.objects.get_or_create(user=instance)
         return super().to_representation(instance)
+
+
+class ClassRosterSerializer(serializers.ModelSerializer):
+    teacher_name = serializers.CharField(source='teacher.username', read_only=True)
+    member_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta:
+        model = ClassRoster
+        fields = ['id', 'name', 'description', 'teacher', 'teacher_name', 'member_count', 'create_time', 'update_time']
+        read_only_fields = ['id', 'teacher', 'create_time', 'update_time']
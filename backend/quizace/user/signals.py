@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# 班级成员增删后发送（成员通过 bulk_create/批量删除维护，不触发模型信号），参数: roster, student_ids
+roster_members_changed = Signal()
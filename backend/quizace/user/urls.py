@@ -11,6 +11,9 @@ from user.views import (
     AdminUserListCreateView,
     AdminUserDetailView,
     AdminOverviewStatsView,
+    ClassRosterListCreateView,
+    ClassRosterDetailView,
+    ClassRosterMembersView,
 )
 
 urlpatterns = [
@@ -28,4 +31,7 @@ urlpatterns = [
     path('admin/users/', AdminUserListCreateView.as_view(), name='admin_user_list_create'),
     path('admin/users/<int:pk>/', AdminUserDetailView.as_view(), name='admin_user_detail'),
     path('admin/overview/', AdminOverviewStatsView.as_view(), name='admin_overview'),
+    path('classes/', ClassRosterListCreateView.as_view(), name='class_roster_list_create'),
+    path('classes/<int:pk>/', ClassRosterDetailView.as_view(), name='class_roster_detail'),
+    path('classes/<int:pk>/members/', ClassRosterMembersView.as_view(), name='class_roster_members'),
 ]
@@ -10,8 +10,12 @@ from rest_framework import status
 from django.conf import settings
 import os
 from django.utils.text import slugify
-from user.models import SysUser, StudentProfile, TeacherProfile
-from user.serializers import UserSerializer, AdminUserManageSerializer
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from quizace.pagination import paginate_request
+from user.models import SysUser, StudentProfile, TeacherProfile, ClassRoster, ClassMembership
+from user.serializers import UserSerializer, AdminUserManageSerializer, ClassRosterSerializer
+from user.signals import roster_members_changed
 from learning_resource.models import LearningResource
 from forum.models import ForumComment, CommentReply, ResourceComment
 
@@ -225,14 +229,20 @@ class AdminUserListCreateView(APIView):
         keyword = request.GET.get('keyword', '')
 
         manageable_roles = ['student', 'teacher', 'admin']
-        qs = SysUser.objects.filter(role__in=manageable_roles)
+        qs = SysUser.objects.filter(role__in=manageable_roles).select_related('student_profile', 'teacher_profile')
         if role in manageable_roles:
             qs = qs.filter(role=role)
         if keyword:
             qs = qs.filter(username__icontains=keyword)
 
-        serializer = AdminUserManageSerializer(qs.order_by('-create_time'), many=True)
-        return Response({'code': 200, 'info': '获取用户列表成功', 'data': serializer.data})
+        # create_time 可为空，不能作为游标字段；id 随注册顺序递增，按 id 倒序即按创建时间倒序
+        try:
+            users, pagination = paginate_request(request, qs, ordering=('-id',))
+        except ValueError:
+            return Response({'code': 400, 'info': '参数不正确'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = AdminUserManageSerializer(users, many=True)
+        return Response({'code': 200, 'info': '获取用户列表成功', 'data': serializer.data, 'pagination': pagination})
 
     def post(self, request):
         denied = self._ensure_admin(request)
@@ -328,3 +338,143 @@ class AdminOverviewStatsView(APIView):
         }
 
         return Response({'code': 200, 'info': '获取运营数据成功', 'data': data})
+
+
+def parse_student_ids(raw):
+    """解析 student_ids 参数，只保留存在的学生账号"""
+    if not isinstance(raw, (list, tuple)):
+        return []
+    ids = set()
+    for item in raw:
+        try:
+            ids.add(int(item))
+        except (TypeError, ValueError):
+            continue
+    if not ids:
+        return []
+    return list(SysUser.objects.filter(id__in=ids, role='student').values_list('id', flat=True))
+
+
+def add_roster_members(roster, student_ids):
+    if not student_ids:
+        return
+    ClassMembership.objects.bulk_create(
+        [ClassMembership(roster=roster, student_id=student_id) for student_id in student_ids],
+        ignore_conflicts=True,
+    )
+    roster_members_changed.send(sender=ClassRoster, roster=roster, student_ids=student_ids)
+
+
+class ClassRosterListCreateView(APIView):
+    """教师管理的班级；学生返回自己所在的班级"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        role = getattr(request.user, 'role', None)
+        if role == 'teacher':
+            qs = ClassRoster.objects.filter(teacher=request.user)
+        elif role == 'student':
+            qs = ClassRoster.objects.filter(memberships__student=request.user)
+        else:
+            return Response({'code': 403, 'info': '无权查看班级'}, status=status.HTTP_403_FORBIDDEN)
+        qs = qs.select_related('teacher').annotate(member_count=Count('memberships')).order_by('name')
+        serializer = ClassRosterSerializer(qs, many=True)
+        return Response({'code': 200, 'info': '获取班级列表成功', 'data': serializer.data})
+
+    def post(self, request):
+        if getattr(request.user, 'role', None) != 'teacher':
+            return Response({'code': 403, 'info': '仅教师可创建班级'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = ClassRosterSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'code': 400, 'info': '创建班级失败', 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        student_ids = parse_student_ids(request.data.get('student_ids'))
+        try:
+            with transaction.atomic():
+                roster = serializer.save(teacher=request.user)
+                add_roster_members(roster, student_ids)
+        except IntegrityError:
+            return Response({'code': 400, 'info': '班级名称已存在'}, status=status.HTTP_400_BAD_REQUEST)
+        roster.member_count = len(student_ids)
+        return Response({'code': 200, 'info': '创建班级成功', 'data': ClassRosterSerializer(roster).data})
+
+
+class ClassRosterDetailView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def _get_roster(self, request, pk):
+        if getattr(request.user, 'role', None) != 'teacher':
+            return None
+        return ClassRoster.objects.filter(id=pk, teacher=request.user).select_related('teacher').first()
+
+    def get(self, request, pk):
+        roster = self._get_roster(request, pk)
+        if not roster:
+            return Response({'code': 404, 'info': '班级不存在'}, status=status.HTTP_404_NOT_FOUND)
+        members = list(
+            ClassMembership.objects.filter(roster=roster)
+            .order_by('student__username')
+            .values('student_id', 'student__username', 'create_time')
+        )
+        roster.member_count = len(members)
+        data = ClassRosterSerializer(roster).data
+        data['members'] = [
+            {'id': item['student_id'], 'username': item['student__username'], 'joined_at': item['create_time']}
+            for item in members
+        ]
+        return Response({'code': 200, 'info': '获取班级成功', 'data': data})
+
+    def put(self, request, pk):
+        roster = self._get_roster(request, pk)
+        if not roster:
+            return Response({'code': 404, 'info': '班级不存在'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = ClassRosterSerializer(roster, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response({'code': 400, 'info': '更新班级失败', 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            serializer.save()
+        except IntegrityError:
+            return Response({'code': 400, 'info': '班级名称已存在'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'code': 200, 'info': '更新班级成功', 'data': serializer.data})
+
+    def delete(self, request, pk):
+        roster = self._get_roster(request, pk)
+        if not roster:
+            return Response({'code': 404, 'info': '班级不存在'}, status=status.HTTP_404_NOT_FOUND)
+        student_ids = list(roster.memberships.values_list('student_id', flat=True))
+        roster.delete()
+        roster_members_changed.send(sender=ClassRoster, roster=roster, student_ids=student_ids)
+        return Response({'code': 200, 'info': '删除班级成功', 'data': None})
+
+
+class ClassRosterMembersView(APIView):
+    """批量添加/移除班级成员，请求体 {"student_ids": [...]}"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def _get_roster(self, request, pk):
+        if getattr(request.user, 'role', None) != 'teacher':
+            return None
+        return ClassRoster.objects.filter(id=pk, teacher=request.user).first()
+
+    def post(self, request, pk):
+        roster = self._get_roster(request, pk)
+        if not roster:
+            return Response({'code': 404, 'info': '班级不存在'}, status=status.HTTP_404_NOT_FOUND)
+        student_ids = parse_student_ids(request.data.get('student_ids'))
+        if not student_ids:
+            return Response({'code': 400, 'info': '请选择要添加的学生'}, status=status.HTTP_400_BAD_REQUEST)
+        add_roster_members(roster, student_ids)
+        return Response({'code': 200, 'info': '添加成员成功', 'data': {'student_ids': student_ids}})
+
+    def delete(self, request, pk):
+        roster = self._get_roster(request, pk)
+        if not roster:
+            return Response({'code': 404, 'info': '班级不存在'}, status=status.HTTP_404_NOT_FOUND)
+        student_ids = parse_student_ids(request.data.get('student_ids'))
+        if not student_ids:
+            return Response({'code': 400, 'info': '请选择要移除的学生'}, status=status.HTTP_400_BAD_REQUEST)
+        ClassMembership.objects.filter(roster=roster, student_id__in=student_ids).delete()
+        roster_members_changed.send(sender=ClassRoster, roster=roster, student_ids=student_ids)
+        return Response({'code': 200, 'info': '移除成员成功', 'data': {'student_ids': student_ids}})
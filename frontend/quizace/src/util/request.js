@@ -54,6 +54,36 @@ export function get(url, params = {}) {
     });
 }
 
+/* 分页接口的全部数据（如组卷时的题目列表）
+按 pagination.next_cursor 逐页请求；按页码分页的接口（返回 page 与 has_more）按页码递增，
+返回首个响应，其 data.data 为各页数据合并后的列表 */
+
+function nextPageParams(pagination) {
+    if (pagination?.next_cursor) {
+        return { cursor: pagination.next_cursor };
+    }
+    if (pagination?.has_more && pagination.page) {
+        return { page: pagination.page + 1 };
+    }
+    return null;
+}
+
+export async function getAllPages(url, params = {}, pageSize = 100) {
+    let response = await get(url, { ...params, page_size: pageSize });
+    const first = response;
+    const items = [...(response.data.data || [])];
+    let next = response.data.code === 200 ? nextPageParams(response.data.pagination) : null;
+    while (next) {
+        response = await get(url, { ...params, page_size: pageSize, ...next });
+        if (response.data.code !== 200) {
+            return response;
+        }
+        items.push(...(response.data.data || []));
+        next = nextPageParams(response.data.pagination);
+    }
+    return { ...first, data: { ...first.data, data: items, pagination: response.data.pagination } };
+}
+
 /* post请求
 url:请求地址
 params:参数